@@ -0,0 +1,117 @@
+"""Deterministic synthetic corpus of Sims-style string tables and packages."""
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from typing import List, Tuple
+
+from sims4_auto_translator.dbpf import STBL_TYPE_ID, StringTable, write_package
+from sims4_auto_translator.parsers import write_strings_file
+
+WORDS = (
+    'Sim', 'household', 'career', 'skill', 'level', 'mood', 'buff', 'trait', 'aspiration',
+    'cook', 'paint', 'garden', 'romance', 'friendly', 'mischief', 'relationship', 'party',
+    'vacation', 'spell', 'vampire', 'neighbor', 'object', 'lot', 'build', 'cancel', 'accept',
+)
+PLACEHOLDERS = (
+    '{0.SimFirstName}', '{1.SimFirstName}', '{0.String}', '{1.Number}', '{M0.he}{F0.she}',
+    '{M0.his}{F0.her}', '<i>', '</i>', '<b>', '</b>', '\\n',
+)
+
+
+def make_text(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(1, 14))]
+    for _ in range(rng.choice((0, 0, 1, 1, 2, 3))):
+        words.insert(rng.randrange(len(words) + 1), rng.choice(PLACEHOLDERS))
+    text = ' '.join(words)
+    if rng.random() < 0.2:
+        text += f' {rng.randint(1, 10)}'
+    return text[0].upper() + text[1:]
+
+
+def make_entries(count: int, seed: int = 0, repeat_ratio: float = 0.3) -> List[Tuple[int, str]]:
+    """``count`` entries; ``repeat_ratio`` of them reuse an earlier string."""
+    rng = random.Random(seed)
+    entries: List[Tuple[int, str]] = []
+    for i in range(count):
+        if entries and rng.random() < repeat_ratio:
+            text = rng.choice(entries)[1]
+        else:
+            text = make_text(rng)
+        entries.append((rng.getrandbits(32), text))
+    return entries
+
+
+def make_package(path: Path, tables: int, entries_per_table: int, seed: int = 0,
+                 compress: bool = False) -> Path:
+    resources = (
+        (STBL_TYPE_ID, 0, (i << 8) | 0x1,
+         StringTable.from_entries(make_entries(entries_per_table, seed + i)).to_bytes())
+        for i in range(tables)
+    )
+    write_package(path, resources, compress=compress)
+    return path
+
+
+def make_strings_file(path: Path, count: int, seed: int = 0) -> Path:
+    write_strings_file(((f"0x{key:08X}", text) for key, text in make_entries(count, seed)), path)
+    return path
+
+
+def refpack_compress(data: bytes) -> bytes:
+    """Greedy RefPack encoder, good enough to produce test and bench inputs.
+
+    Uses all three back-reference forms (including overlapping ones) and
+    both literal commands.
+    """
+    n = len(data)
+    if n < 1 << 24:
+        out = bytearray(b'\x10\xfb') + n.to_bytes(3, 'big')
+    else:
+        out = bytearray(b'\x90\xfb') + n.to_bytes(4, 'big')
+    last = {}
+    i = lit = 0
+
+    def literals(upto: int, keep: int) -> int:
+        # Emit 0xE0 runs until at most ``keep`` literals remain; return start.
+        start = lit
+        while upto - start > keep:
+            run = min(112, (upto - start) & ~3)
+            out.append(0xE0 | ((run - 4) >> 2))
+            out.extend(data[start:start + run])
+            start += run
+        return start
+
+    while i + 3 <= n:
+        key = data[i:i + 3]
+        cand = last.get(key)
+        last[key] = i
+        if cand is None:
+            i += 1
+            continue
+        offset = i - cand
+        limit = min(1028, n - i)
+        length = 3
+        while length < limit and data[cand + length] == data[i + length]:
+            length += 1
+        if offset > 131072 or (length == 3 and offset > 1024) or (length == 4 and offset > 16384):
+            i += 1
+            continue
+        lit = literals(i, 3)
+        pending = i - lit
+        off = offset - 1
+        if offset <= 1024 and length <= 10:
+            out += bytes((((off >> 3) & 0x60) | ((length - 3) << 2) | pending, off & 0xFF))
+        elif offset <= 16384 and length <= 67:
+            out += bytes((0x80 | (length - 4), (pending << 6) | (off >> 8), off & 0xFF))
+        else:
+            extra = length - 5
+            out += bytes((0xC0 | ((off >> 12) & 0x10) | ((extra >> 6) & 0x0C) | pending,
+                          (off >> 8) & 0xFF, off & 0xFF, extra & 0xFF))
+        out.extend(data[lit:i])
+        i += length
+        lit = i
+    lit = literals(n, 3)
+    out.append(0xFC | (n - lit))
+    out.extend(data[lit:])
+    return bytes(out)
@@ -0,0 +1,150 @@
+"""Micro and end-to-end benchmarks for the hot paths.
+
+Usage::
+
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --compare bench.json --threshold 0.2
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from sims4_auto_translator import refpack
+from sims4_auto_translator.cache import SQLiteCache, cache_key
+from sims4_auto_translator.dbpf import DBPFPackage, StringTable, _read_header, _read_index_v2, build_stbl
+from sims4_auto_translator.deepl_api import DeepLTranslator, RateLimiter
+from sims4_auto_translator.parsers import mask_many, unmask_many
+
+from .corpus import make_entries, make_package, refpack_compress
+
+Result = Dict[str, float]
+
+
+class _StubResponse:
+    status_code = 200
+    headers: Dict[str, str] = {}
+
+    def __init__(self, payload: dict) -> None:
+        self._payload = payload
+
+    def json(self) -> dict:
+        return self._payload
+
+
+class StubSession:
+    """Stands in for ``requests.Session``: echoes texts back uppercased."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+
+    def post(self, url: str, data: dict, timeout: float) -> _StubResponse:
+        self.requests += 1
+        texts = [v for k, v in data.items() if k.startswith('text[')]
+        return _StubResponse({'translations': [{'text': t.upper()} for t in texts]})
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmarks(scale: float = 1.0, repeat: int = 5) -> Dict[str, Result]:
+    results: Dict[str, Result] = {}
+    n = max(10, int(100_000 * scale))
+    entries = make_entries(n, seed=1)
+    texts = [text for _, text in entries]
+    blob = build_stbl(entries)
+    table = StringTable.parse(blob)
+    mb = len(blob) / 1e6
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        pkg_path = make_package(tmp_path / 'Strings_ENG_US.package', max(2, int(200 * scale)), 500, compress=True)
+        with DBPFPackage(pkg_path) as pkg:
+            _, _, _, _, index_offset, count = _read_header(pkg._view)
+            seconds = _best(lambda: _read_index_v2(pkg._view, index_offset, count), repeat)
+        results['read_index'] = {'seconds': seconds, 'entries_per_s': count / seconds}
+
+        seconds = _best(lambda: StringTable.parse(blob), repeat)
+        results['parse_stbl'] = {'seconds': seconds, 'mb_per_s': mb / seconds}
+        seconds = _best(lambda: build_stbl(table), repeat)
+        results['build_stbl'] = {'seconds': seconds, 'mb_per_s': mb / seconds}
+        seconds = _best(lambda: build_stbl(entries), repeat)
+        results['build_stbl_entries'] = {'seconds': seconds, 'mb_per_s': mb / seconds}
+        packed = refpack_compress(blob[:max(4096, int(256 * 1024 * scale))])
+        size = refpack.decompressed_size(packed)
+        seconds = _best(lambda: refpack.decompress(packed, size), repeat)
+        results['refpack_decompress'] = {'seconds': seconds, 'mb_per_s': size / 1e6 / seconds}
+
+        masked, maps = mask_many(texts)
+        seconds = _best(lambda: mask_many(texts), repeat)
+        results['mask_placeholders'] = {'seconds': seconds, 'strings_per_s': n / seconds}
+        seconds = _best(lambda: unmask_many(masked, maps), repeat)
+        results['unmask_placeholders'] = {'seconds': seconds, 'strings_per_s': n / seconds}
+
+        keys = [cache_key(t, 'EN', 'UK') for t in texts]
+        cache = SQLiteCache(tmp_path / 'cache.db')
+        start = time.perf_counter()
+        cache.set_many('en-uk', zip(keys, texts))
+        seconds = time.perf_counter() - start
+        results['cache_save'] = {'seconds': seconds, 'strings_per_s': n / seconds}
+        seconds = _best(lambda: cache.get_many(keys), repeat)
+        results['cache_lookup'] = {'seconds': seconds, 'strings_per_s': n / seconds}
+        cache.close()
+
+        def translate() -> None:
+            translator = DeepLTranslator('bench', cache=SQLiteCache(tmp_path / f'e2e-{time.perf_counter_ns()}.db'))
+            translator.session = StubSession()
+            translator.limiter = RateLimiter(rate=1e6, max_rate=1e6)
+            translator.translate(masked, 'EN', 'UK')
+            translator.cache.close()
+
+        seconds = _best(translate, max(1, repeat // 2))
+        results['translate_e2e'] = {'seconds': seconds, 'strings_per_s': n / seconds}
+    return results
+
+
+def compare(current: Dict[str, Result], baseline: Dict[str, Result], threshold: float) -> List[str]:
+    """Names of benchmarks more than ``threshold`` slower than the baseline."""
+    regressions = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base and result['seconds'] > base['seconds'] * (1 + threshold):
+            regressions.append(f"{name}: {base['seconds']:.4f}s -> {result['seconds']:.4f}s")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1.0, help='corpus size multiplier')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', type=Path, help='write results JSON here')
+    parser.add_argument('--compare', type=Path, help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scale, args.repeat)
+    output = json.dumps(results, indent=2)
+    if args.out:
+        args.out.write_text(output, encoding='utf-8')
+    print(output)
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text(encoding='utf-8')), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
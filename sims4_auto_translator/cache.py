@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import hashlib
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .utils import load_json
+
+# SQLite's historical default limit on bound parameters per statement.
+_LOOKUP_CHUNK = 500
+
+
+def cache_key(text: str, source: str, target: str) -> bytes:
+    """Hash of ``(source, target, text)`` used as the cache key."""
+    raw = f"{source.lower()}\0{target.lower()}\0{text}".encode('utf-8')
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+def lang_pair(source: str, target: str) -> str:
+    return f"{source.lower()}-{target.lower()}"
+
+
+class TranslationCache(ABC):
+    """Interface for translation cache backends."""
+
+    @abstractmethod
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, str]:
+        ...
+
+    @abstractmethod
+    def set_many(self, pair: str, items: Iterable[Tuple[bytes, str]]) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, object]:
+        ...
+
+    def compact(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryCache(TranslationCache):
+    """Process-local cache, useful for tests and throwaway runs."""
+
+    def __init__(self) -> None:
+        self._data: Dict[bytes, Tuple[str, str]] = {}
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, str]:
+        data = self._data
+        return {key: data[key][1] for key in keys if key in data}
+
+    def set_many(self, pair: str, items: Iterable[Tuple[bytes, str]]) -> None:
+        for key, value in items:
+            self._data[key] = (pair, value)
+
+    def stats(self) -> Dict[str, object]:
+        pairs: Dict[str, int] = {}
+        for pair, _ in self._data.values():
+            pairs[pair] = pairs.get(pair, 0) + 1
+        return {'entries': len(self._data), 'pairs': pairs, 'bytes': 0}
+
+
+class SQLiteCache(TranslationCache):
+    """SQLite (WAL mode) cache keyed by :func:`cache_key`.
+
+    The database is opened on first use, so constructing the cache costs
+    nothing regardless of its size.  If ``legacy_json`` points at an old
+    ``translated_cache.json`` file it is imported once and remembered in the
+    ``meta`` table.
+    """
+
+    def __init__(self, path: Path, legacy_json: Optional[Path] = None) -> None:
+        self.path = Path(path)
+        self.legacy_json = legacy_json
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS translations ('
+                'key BLOB PRIMARY KEY, pair TEXT NOT NULL, translation TEXT NOT NULL'
+                ') WITHOUT ROWID'
+            )
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+            conn.commit()
+            self._conn = conn
+            self._migrate_legacy()
+        return self._conn
+
+    def _migrate_legacy(self) -> None:
+        legacy = self.legacy_json
+        if legacy is None or not legacy.exists():
+            return
+        conn = self._conn
+        done = conn.execute("SELECT value FROM meta WHERE name = 'legacy_json'").fetchone()
+        if done:
+            return
+        rows: List[Tuple[bytes, str, str]] = []
+        for legacy_key, value in load_json(legacy).items():
+            pair, sep, text = legacy_key.partition('||')
+            source, dash, target = pair.partition('-')
+            if not sep or not dash:
+                continue
+            rows.append((cache_key(text, source, target), pair, value))
+        with conn:
+            conn.executemany('INSERT OR IGNORE INTO translations VALUES (?, ?, ?)', rows)
+            conn.execute("INSERT INTO meta VALUES ('legacy_json', ?)", (str(legacy),))
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, str]:
+        found: Dict[bytes, str] = {}
+        keys = list(keys)
+        with self._lock:
+            conn = self.conn
+            for i in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[i:i + _LOOKUP_CHUNK]
+                marks = ','.join('?' * len(chunk))
+                found.update(conn.execute(
+                    f'SELECT key, translation FROM translations WHERE key IN ({marks})', chunk
+                ))
+        return found
+
+    def set_many(self, pair: str, items: Iterable[Tuple[bytes, str]]) -> None:
+        with self._lock:
+            conn = self.conn
+            with conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO translations VALUES (?, ?, ?)',
+                    ((key, pair, value) for key, value in items),
+                )
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            conn = self.conn
+            pairs = dict(conn.execute('SELECT pair, COUNT(*) FROM translations GROUP BY pair ORDER BY pair'))
+        size = sum(
+            p.stat().st_size
+            for p in (self.path, Path(f'{self.path}-wal'))
+            if p.exists()
+        )
+        return {'entries': sum(pairs.values()), 'pairs': pairs, 'bytes': size}
+
+    def compact(self) -> None:
+        with self._lock:
+            conn = self.conn
+            conn.execute('VACUUM')
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+import os
+import secrets
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+DEFAULT_PORT = 8766
+# Shared secret of the daemon and its clients; only the user can read it.
+TOKEN_PATH = Path.home() / '.s4at-daemon-token'
+
+
+class DaemonError(Exception):
+    """A job was rejected or failed inside the translator daemon."""
+
+
+def create_token(path: Path = TOKEN_PATH) -> str:
+    """Write a fresh random daemon token to ``path``, readable by the user only."""
+    token = secrets.token_urlsafe(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        # The mode above only applies to new files.
+        os.chmod(path, 0o600)
+        f.write(token)
+    return token
+
+
+def load_token(path: Path = TOKEN_PATH) -> str:
+    try:
+        return path.read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        raise DaemonError(f"No daemon token at {path}; start the daemon with `serve`") from None
+
+
+def submit(server: str, kind: str, job: Dict[str, Any], timeout: Optional[float] = None,
+           token: Optional[str] = None) -> Dict[str, Any]:
+    """Run a ``translate`` or ``pack`` job on the daemon at ``server``.
+
+    Paths in ``job`` must be absolute, since the daemon has its own working
+    directory.  ``token`` defaults to the one the daemon wrote to
+    :data:`TOKEN_PATH`.  Connection failures raise ``OSError``.
+    """
+    import http.client  # deferred: only clients that submit a job pay for it
+
+    headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {token or load_token()}'}
+    url = urlsplit(server if '://' in server else f'http://{server}')
+    conn = http.client.HTTPConnection(url.hostname or '127.0.0.1', url.port or DEFAULT_PORT, timeout=timeout)
+    try:
+        body = json.dumps(job).encode('utf-8')
+        conn.request('POST', f'/jobs/{kind}', body, headers)
+        resp = conn.getresponse()
+        payload = json.loads(resp.read() or b'{}')
+    finally:
+        conn.close()
+    if resp.status != 200:
+        raise DaemonError(payload.get('error') or f'HTTP {resp.status}')
+    return payload
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import hmac
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .deepl_api import DeepLTranslator
+from .memory import TranslationMemory
+from .metrics import metrics
+from .packer import pack_strings_files
+from .planner import translate_file
+from .utils import console
+
+JOB_TYPES = ('translate', 'pack')
+# A Host header naming anything else comes from a DNS-rebound web page.
+LOOPBACK_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
+
+class TranslatorService:
+    """Runs ``translate`` and ``pack`` jobs against one long-lived translator.
+
+    The translator's cache, HTTP connection pool and rate limiter stay warm
+    between jobs, so a job whose strings are all cached costs a file read
+    and write rather than a process start.
+    """
+
+    def __init__(self, translator: DeepLTranslator) -> None:
+        self.translator = translator
+        self.jobs = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def translate(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        memory = TranslationMemory(
+            job.get('memory_skip', ()), job.get('memory_normalize', ()),
+        ) if job.get('memory', True) else None
+        out_paths = [Path(p) for p in job['outputs']]
+        translate_file(Path(job['infile']), out_paths, self.translator, job['source_lang'], job['targets'], memory)
+        result: Dict[str, Any] = {'outputs': [str(p) for p in out_paths]}
+        if memory is not None:
+            result['memory'] = memory.summary()
+        return result
+
+    def pack(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        count = pack_strings_files(
+            Path(job['infile']), Path(job['output']), compress=job.get('compress', False), workers=job.get('workers'),
+        )
+        return {'count': count, 'output': job['output']}
+
+    def run(self, kind: str, job: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        result = self.translate(job) if kind == 'translate' else self.pack(job)
+        result['ms'] = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.jobs += 1
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        stats = self.translator.stats
+        status: Dict[str, Any] = {
+            'jobs': self.jobs,
+            'uptime': time.monotonic() - self.started,
+            'requests': stats.requests,
+            'chars': stats.chars,
+        }
+        if metrics.enabled:
+            status['metrics'] = metrics.snapshot()
+        return status
+
+
+class TranslatorServer(ThreadingHTTPServer):
+    """Local JSON job API around a :class:`TranslatorService`.
+
+    ``POST /jobs/translate`` and ``POST /jobs/pack`` take the same options
+    as the CLI commands, with absolute paths; ``GET /status`` reports
+    counters, and the metrics snapshot when run with ``--metrics-json``.
+
+    Jobs read and write any path the daemon's user can, so the server binds
+    to loopback only and every request must carry ``token`` as a bearer
+    token and a loopback ``Host``; job bodies must be sent as
+    ``application/json``, which a cross-site form post cannot do.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port: int, service: TranslatorService, token: str) -> None:
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.service = service
+        self.token = token
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: TranslatorServer
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _reply(self, status: int, payload: Dict[str, Any], close: bool = False) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if close:
+            # The request body is left unread, so the connection can't be reused.
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _rejected(self) -> Optional[Tuple[int, str]]:
+        host = urlsplit('//' + self.headers.get('Host', '')).hostname
+        if host not in LOOPBACK_HOSTS:
+            return 403, 'Host must be a loopback address'
+        auth = self.headers.get('Authorization', '')
+        if not (auth.startswith('Bearer ') and hmac.compare_digest(auth[7:].encode(), self.server.token.encode())):
+            return 401, 'Missing or wrong daemon token'
+        if self.command == 'POST' and self.headers.get_content_type() != 'application/json':
+            return 415, 'Jobs must be sent as application/json'
+        return None
+
+    def do_GET(self) -> None:
+        rejected = self._rejected()
+        if rejected:
+            self._reply(rejected[0], {'error': rejected[1]}, close=True)
+            return
+        if self.path != '/status':
+            self._reply(404, {'error': 'Not found'})
+            return
+        self._reply(200, self.server.service.status())
+
+    def do_POST(self) -> None:
+        rejected = self._rejected()
+        if rejected:
+            self._reply(rejected[0], {'error': rejected[1]}, close=True)
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        kind = self.path[len('/jobs/'):] if self.path.startswith('/jobs/') else ''
+        if kind not in JOB_TYPES:
+            self._reply(404, {'error': f'Unknown job type {kind!r}'})
+            return
+        try:
+            result = self.server.service.run(kind, json.loads(body or b'{}'))
+        except KeyError as e:
+            self._reply(400, {'error': f'Missing job field {e}'})
+            return
+        except (OSError, ValueError, TypeError) as e:
+            self._reply(400, {'error': str(e)})
+            return
+        except Exception as e:  # reported to the client instead of killing the handler thread
+            self._reply(500, {'error': f'{type(e).__name__}: {e}'})
+            return
+        console.print(f"{kind} {result.get('output') or ', '.join(result['outputs'])} in {result['ms']:.0f} ms")
+        self._reply(200, result)
+
+
+def serve_in_background(service: TranslatorService, token: str, port: int = 0) -> TranslatorServer:
+    """Start a daemon server on a background thread; stop it with ``shutdown()``."""
+    server = TranslatorServer(port, service, token)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
@@ -1,20 +1,83 @@
+import mmap
+import os
 import struct
 import zlib
-from io import BytesIO
+from array import array
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, Iterable, Iterator, List, Tuple
+from typing import Deque, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from . import refpack
+from .metrics import metrics
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
 
 STBL_TYPE_ID = 0x220557DA
 
-class DBPFEntry(Tuple[int, int, int, int, int]):
-    pass
+HEADER_SIZE = 96
+_HEADER = struct.Struct('<4s17I24s')
+# DBPF 1.x index layouts, keyed by index minor version.
+_INDEX_V0 = struct.Struct('<IIIII')
+_INDEX_V1 = struct.Struct('<IIIIII')
+# DBPF 2.x index entry with every field present (no constant-field flags).
+_INDEX_V2 = struct.Struct('<IIIIIIIHH')
+# Index flag bits 0-3 mark type, group, instance high and instance low as
+# constant: the value is stored once after the flags word and omitted from
+# every entry.
+_CONSTANT_FIELDS = 4
+_EXTENDED_SIZE = 0x80000000
+
+NO_COMPRESSION = 0x0000
+ZLIB_COMPRESSION = 0x5A42
+REFPACK_COMPRESSION = 0xFFFF
+STREAMABLE_COMPRESSION = 0xFFFE
+DELETED = 0xFFE0
+
+
+def _kernel_copy(src_fd: int, dst_fd: int, offset: int, size: int) -> int:
+    """Copy a byte range between files without passing it through Python.
+
+    Tries ``copy_file_range`` (which can share extents on CoW filesystems),
+    then ``sendfile``.  Writes at, and advances, the current position of
+    ``dst_fd``.  Returns the number of bytes copied, which is short (often 0)
+    where neither call is available or the filesystems refuse.
+    """
+    copied = 0
+    for name in ('copy_file_range', 'sendfile'):
+        if not hasattr(os, name):
+            continue
+        try:
+            while copied < size:
+                if name == 'copy_file_range':
+                    n = os.copy_file_range(src_fd, dst_fd, size - copied, offset + copied)
+                else:
+                    n = os.sendfile(dst_fd, src_fd, offset + copied, size - copied)
+                if not n:
+                    break
+                copied += n
+        except OSError:
+            continue
+        if copied >= size:
+            break
+    return copied
+
 
+class DBPFEntry(NamedTuple):
+    type_id: int
+    group: int
+    instance: int
+    offset: int
+    size: int
+    mem_size: int
+    compression: int
 
-def _read_header(f: BytesIO) -> Tuple[int, int, int, int, int, int]:
-    header = f.read(96)
-    if len(header) < 96 or header[:4] != b'DBPF':
+
+def _read_header(buf: Buffer) -> Tuple[int, int, int, int, int, int]:
+    if len(buf) < HEADER_SIZE or bytes(buf[:4]) != b'DBPF':
         raise ValueError('Not a DBPF package')
-    values = struct.unpack('<4s17I24s', header)
+    values = _HEADER.unpack_from(buf, 0)
     major = values[1]
     minor = values[2]
     index_major = values[8]
@@ -27,90 +90,493 @@ def _read_header(f: BytesIO) -> Tuple[int, int, int, int, int, int]:
     return major, minor, index_major, index_minor, index_offset, index_count
 
 
-def _read_index(f: BytesIO, index_major: int, index_minor: int, index_offset: int, count: int) -> List[Tuple[int, int, int, int, int, int]]:
-    f.seek(index_offset)
-    entries = []
-    entry_size = 24 if index_minor == 1 else 20
-    for _ in range(count):
-        data = f.read(entry_size)
-        if len(data) < entry_size:
-            break
-        if entry_size == 20:
-            type_id, group, instance, offset, size = struct.unpack('<IIIII', data)
-            instance_hi, instance_lo = 0, instance
+def _read_index(buf: Buffer, index_major: int, index_minor: int, index_offset: int, count: int) -> List[DBPFEntry]:
+    layout = _INDEX_V1 if index_minor == 1 else _INDEX_V0
+    # Truncated indexes are read up to the last complete entry.
+    available = max(0, len(buf) - index_offset) // layout.size
+    count = min(count, available)
+    with memoryview(buf)[index_offset:index_offset + count * layout.size] as table:
+        if layout is _INDEX_V0:
+            return [
+                DBPFEntry(type_id, group, instance, offset, size, size, 0)
+                for type_id, group, instance, offset, size in layout.iter_unpack(table)
+            ]
+        return [
+            DBPFEntry(type_id, group, (inst_hi << 32) | inst_lo, offset, size, size, 0)
+            for type_id, group, inst_hi, inst_lo, offset, size in layout.iter_unpack(table)
+        ]
+
+
+def _read_index_v2(buf: Buffer, index_offset: int, count: int) -> List[DBPFEntry]:
+    if not count:
+        # Empty packages often have no index at all (offset 0).
+        return []
+    if index_offset + 4 > len(buf):
+        raise ValueError('DBPF index out of range')
+    (flags,) = struct.unpack_from('<I', buf, index_offset)
+    if flags >> _CONSTANT_FIELDS:
+        raise ValueError(f'Unsupported DBPF index flags 0x{flags:08X}')
+    constant = [bool(flags & (1 << bit)) for bit in range(_CONSTANT_FIELDS)]
+    start = index_offset + 4 + 4 * sum(constant)
+    if start > len(buf):
+        raise ValueError('DBPF index out of range')
+    constants = struct.unpack_from(f'<{sum(constant)}I', buf, index_offset + 4)
+    layout = _INDEX_V2 if not flags else struct.Struct('<' + 'I' * constant.count(False) + 'IIIHH')
+    available = max(0, len(buf) - start) // layout.size
+    count = min(count, available)
+    with memoryview(buf)[start:start + count * layout.size] as table:
+        rows = layout.iter_unpack(table)
+        if flags:
+            # Splice the constants back in: pick each field from
+            # ``constants + row`` so every row has the full layout.
+            order = []
+            fixed, varying = 0, len(constants)
+            for is_constant in constant:
+                if is_constant:
+                    order.append(fixed)
+                    fixed += 1
+                else:
+                    order.append(varying)
+                    varying += 1
+            pick = itemgetter(*order, *range(varying, varying + 5))
+            rows = (pick(constants + row) for row in rows)
+        return [
+            DBPFEntry(type_id, group, (inst_hi << 32) | inst_lo, offset,
+                      size & ~_EXTENDED_SIZE, mem_size, compression)
+            for type_id, group, inst_hi, inst_lo, offset, size, mem_size, compression, _ in rows
+        ]
+
+
+def decode_resource(data: Buffer, compression: int, mem_size: int) -> memoryview:
+    """Decompress a resource body according to its index entry.
+
+    The result is checked against the index's decompressed size, which also
+    sizes the output buffer up front.
+    """
+    if compression == NO_COMPRESSION:
+        return memoryview(data)
+    if compression == ZLIB_COMPRESSION:
+        try:
+            out = zlib.decompress(data, bufsize=max(mem_size, 1))
+        except zlib.error as e:
+            raise ValueError(f'Invalid zlib resource: {e}') from e
+        if len(out) != mem_size:
+            raise ValueError(f'zlib resource is {len(out)} bytes, index says {mem_size}')
+        return memoryview(out)
+    if compression == REFPACK_COMPRESSION:
+        return memoryview(refpack.decompress(data, mem_size))
+    if compression == DELETED:
+        raise ValueError('Resource is marked as deleted')
+    raise ValueError(f'Unsupported compression type 0x{compression:04X}')
+
+
+class DBPFPackage:
+    """Memory-mapped DBPF package with lazy, zero-copy access to resources.
+
+    The index is decoded once when the package is opened; resource bodies are
+    only touched when :meth:`read` slices them out of the mapping.  Slices are
+    ``memoryview`` objects backed by the mapping, so they must not be used
+    after the package is closed.
+    """
+
+    def __init__(self, path: Path, entries: Optional[List[DBPFEntry]] = None) -> None:
+        # ``entries`` (e.g. from the package index cache) skips the index parse.
+        self.path = Path(path)
+        self._file = self.path.open('rb')
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < HEADER_SIZE:
+                raise ValueError('Not a DBPF package')
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self._view = memoryview(self._mmap)
+        try:
+            (self.major, self.minor, self.index_major, self.index_minor,
+             self.index_offset, count) = _read_header(self._view)
+            if entries is not None:
+                self.entries = entries
+            elif self.major >= 2:
+                self.entries = _read_index_v2(self._view, self.index_offset, count)
+            else:
+                self.entries = _read_index(self._view, self.index_major, self.index_minor, self.index_offset, count)
+        except Exception:
+            self.close()
+            raise
+        metrics.count('dbpf.packages_opened')
+        metrics.count('dbpf.bytes_mapped', size)
+
+    def __enter__(self) -> 'DBPFPackage':
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def close(self) -> None:
+        if self._view is None:
+            return
+        self._view.release()
+        self._view = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # mmap.close() refuses while slices handed out by read() are
+            # still exported.  Those views keep the mmap object alive, and
+            # the mapping is released when that object is collected.
+            pass
+        self._file.close()
+
+    def iter_entries(self, type_id: Optional[int] = None, instance: Optional[int] = None,
+                     include_deleted: bool = False) -> Iterator[DBPFEntry]:
+        for entry in self.entries:
+            if entry.compression == DELETED and not include_deleted:
+                continue
+            if type_id is not None and entry.type_id != type_id:
+                continue
+            if instance is not None and entry.instance != instance:
+                continue
+            yield entry
+
+    def read(self, entry: DBPFEntry) -> memoryview:
+        if self._view is None:
+            raise ValueError('Package is closed')
+        end = entry.offset + entry.size
+        if end > len(self._view):
+            raise ValueError(f'Resource 0x{entry.instance:016X} extends past end of package')
+        return self._view[entry.offset:end]
+
+    def read_resource(self, entry: DBPFEntry) -> memoryview:
+        """Body of ``entry``, decompressed; uncompressed bodies stay zero-copy."""
+        view = self.read(entry)
+        metrics.count('dbpf.bytes_read', entry.size)
+        if entry.compression == NO_COMPRESSION:
+            return view
+        with view, metrics.timed('dbpf.decompress'):
+            return decode_resource(view, entry.compression, entry.mem_size)
+
+    def iter_stbl(self) -> Iterator[Tuple[int, memoryview]]:
+        for entry in self.iter_entries(STBL_TYPE_ID):
+            yield entry.instance, self.read_resource(entry)
+
+
+class DBPFWriter:
+    """Sequential DBPF 2.1 package writer.
+
+    Resource bodies are streamed straight to the output file as they are
+    added; the index and header are written by :meth:`close`.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open('wb')
+        self._file.write(bytes(HEADER_SIZE))
+        self._offset = HEADER_SIZE
+        self.entries: List[DBPFEntry] = []
+
+    def __enter__(self) -> 'DBPFWriter':
+        return self
+
+    def __exit__(self, exc_type: object, *exc: object) -> None:
+        if exc_type is None:
+            self.close()
         else:
-            type_id, group, instance_hi, instance_lo, offset, size = struct.unpack('<IIIIII', data)
-        entries.append((type_id, group, instance_hi, instance_lo, offset, size))
-    return entries
+            self._file.close()
+
+    def add_raw(self, type_id: int, group: int, instance: int, body: Buffer,
+                mem_size: Optional[int] = None, compression: int = NO_COMPRESSION) -> DBPFEntry:
+        """Append an already encoded resource body."""
+        size = len(body)
+        if mem_size is None:
+            mem_size = size
+        entry = DBPFEntry(type_id, group, instance, self._offset, size, mem_size, compression)
+        self._file.write(body)
+        self._offset += size
+        self.entries.append(entry)
+        return entry
+
+    def add_copy(self, package: 'DBPFPackage', entry: DBPFEntry, instance: Optional[int] = None) -> DBPFEntry:
+        """Append ``entry`` of ``package`` byte for byte, without decoding it.
+
+        The body keeps its compression type and sizes; only ``instance`` may
+        be changed.  The copy runs in the kernel where possible and falls
+        back to writing the mapped slice.
+        """
+        with package.read(entry) as view:
+            self._file.flush()
+            done = _kernel_copy(package.fileno(), self._file.fileno(), entry.offset, entry.size)
+            if done:
+                # Resync the buffered writer with the descriptor's position.
+                self._file.seek(self._offset + done)
+            if done < entry.size:
+                self._file.write(view[done:])
+        if instance is None:
+            instance = entry.instance
+        copied = entry._replace(instance=instance, offset=self._offset)
+        self._offset += entry.size
+        self.entries.append(copied)
+        return copied
+
+    def add(self, type_id: int, group: int, instance: int, data: Buffer, compress: bool = False) -> DBPFEntry:
+        if compress:
+            return self.add_raw(type_id, group, instance, zlib.compress(data), len(data), ZLIB_COMPRESSION)
+        return self.add_raw(type_id, group, instance, data)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        index = bytearray(4 + _INDEX_V2.size * len(self.entries))
+        pos = 4
+        for entry in self.entries:
+            _INDEX_V2.pack_into(
+                index, pos, entry.type_id, entry.group, entry.instance >> 32,
+                entry.instance & 0xFFFFFFFF, entry.offset, entry.size | _EXTENDED_SIZE,
+                entry.mem_size, entry.compression, 1,
+            )
+            pos += _INDEX_V2.size
+        self._file.write(index)
+        metrics.count('dbpf.packages_written')
+        metrics.count('dbpf.bytes_written', self._offset + len(index))
+        header = _HEADER.pack(
+            b'DBPF', 2, 1, 0, 0, 0, 0, 0, 0, len(self.entries), 0, len(index),
+            0, 0, 0, 3, self._offset, 0, bytes(24),
+        )
+        self._file.seek(0)
+        self._file.write(header)
+        self._file.close()
+
+
+def write_package(
+    path: Path,
+    resources: Iterable[Tuple[int, int, int, Buffer]],
+    compress: bool = False,
+    workers: Optional[int] = None,
+) -> List[DBPFEntry]:
+    """Write ``(type_id, group, instance, data)`` resources to a DBPF package.
+
+    With ``compress`` enabled, bodies are zlib-compressed on a thread pool
+    (zlib releases the GIL) while earlier bodies are written in order.
+    """
+    with DBPFWriter(path) as writer:
+        if not compress:
+            for type_id, group, instance, data in resources:
+                writer.add(type_id, group, instance, data)
+            return writer.entries
+        workers = workers or os.cpu_count() or 1
+        pending: Deque[Tuple[int, int, int, int, 'Future[bytes]']] = deque()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for type_id, group, instance, data in resources:
+                pending.append((type_id, group, instance, len(data), pool.submit(zlib.compress, data)))
+                # Keep a bounded window of bodies in flight.
+                if len(pending) >= workers * 2:
+                    t, g, i, mem_size, future = pending.popleft()
+                    writer.add_raw(t, g, i, future.result(), mem_size, ZLIB_COMPRESSION)
+            while pending:
+                t, g, i, mem_size, future = pending.popleft()
+                writer.add_raw(t, g, i, future.result(), mem_size, ZLIB_COMPRESSION)
+        return writer.entries
+
+
+def fnv32(name: str) -> int:
+    """FNV-1 32-bit hash of ``name`` as used for STBL string keys."""
+    value = 0x811C9DC5
+    for byte in name.lower().encode('utf-8'):
+        value = ((value * 0x01000193) & 0xFFFFFFFF) ^ byte
+    return value
+
+
+def fnv64(name: str) -> int:
+    """FNV-1 64-bit hash of ``name`` as used for Sims 4 resource instances."""
+    value = 0xCBF29CE484222325
+    for byte in name.lower().encode('utf-8'):
+        value = ((value * 0x100000001B3) & 0xFFFFFFFFFFFFFFFF) ^ byte
+    return value
 
 
 def iter_stbl_from_package(path: Path) -> Iterator[Tuple[int, bytes]]:
-    with path.open('rb') as f:
-        buf = BytesIO(f.read())
-    major, minor, index_major, index_minor, index_offset, count = _read_header(buf)
-    entries = _read_index(buf, index_major, index_minor, index_offset, count)
-    for type_id, group, inst_hi, inst_lo, offset, size in entries:
-        if type_id != STBL_TYPE_ID:
-            continue
-        buf.seek(offset)
-        yield ((inst_hi << 32) | inst_lo), buf.read(size)
+    with DBPFPackage(path) as pkg:
+        for entry in pkg.iter_entries(STBL_TYPE_ID):
+            with pkg.read_resource(entry) as view:
+                data = bytes(view)
+            yield entry.instance, data
+
 
+_STBL_HEADER = struct.Struct('<4sHBQ2sI')
+_STBL_ENTRY = struct.Struct('<IBH')
 
-def parse_stbl(data: bytes) -> List[Tuple[str, str]]:
-    f = BytesIO(data)
-    magic = f.read(4)
-    if magic != b'STBL':
+
+def _stbl_payload(data: Buffer) -> Tuple[memoryview, int, int]:
+    """Return ``(entry_block, compressed_flag, count)`` for an STBL blob."""
+    view = memoryview(data)
+    if bytes(view[:4]) != b'STBL':
+        # Bare resource bodies without their index entry: sniff the codec.
         try:
-            data = zlib.decompress(data)
+            view = memoryview(refpack.decompress(view) if refpack.is_refpack(view) else zlib.decompress(view))
         except Exception as e:
             raise ValueError('Invalid STBL data') from e
-        f = BytesIO(data)
-        magic = f.read(4)
-        if magic != b'STBL':
+        if bytes(view[:4]) != b'STBL':
             raise ValueError('Invalid STBL data')
+    if len(view) < _STBL_HEADER.size:
+        raise ValueError('Invalid STBL data')
+    _, version, compressed_flag, count, _, string_len = _STBL_HEADER.unpack_from(view, 0)
+    start = _STBL_HEADER.size
+    return view[start:start + string_len], compressed_flag, count
+
+
+def key_hash(key: str) -> int:
+    """STBL key hash of a ``.strings`` key: hex as written, otherwise FNV-32."""
+    try:
+        return int(key, 16)
+    except ValueError:
+        return fnv32(key)
+
+
+class StringTable:
+    """Columnar STBL string table.
+
+    Key hashes live in an ``array('I')``, flags in a ``bytearray`` and the
+    UTF-8 text of every entry in one shared buffer addressed by start/length
+    arrays.  Text is only decoded when it is read.
+    """
+
+    __slots__ = ('keys', 'flags', '_starts', '_lengths', '_buffer', '_packed')
 
-    version = struct.unpack('<H', f.read(2))[0]
-    compressed_flag = f.read(1)
-    count = struct.unpack('<Q', f.read(8))[0]
-    f.read(2)  # reserved
-    string_len = struct.unpack('<I', f.read(4))[0]
-    strings = f.read(string_len)
-    if compressed_flag == b"\x01":
+    def __init__(self) -> None:
+        self.keys = array('I')
+        self.flags = bytearray()
+        self._starts = array('I')
+        self._lengths = array('H')
+        self._buffer: Buffer = b''
+        # True when ``_buffer`` is exactly the serialised entry block.
+        self._packed = False
+
+    @classmethod
+    def parse(cls, data: Buffer) -> 'StringTable':
+        block, compressed_flag, count = _stbl_payload(data)
+        if compressed_flag == 1:
+            try:
+                block = memoryview(zlib.decompress(block))
+            except Exception as e:
+                raise ValueError('Invalid compressed STBL data') from e
+        elif not isinstance(block.obj, bytes):
+            # Don't pin mmaps or mutable buffers for the lifetime of the table.
+            block = memoryview(bytes(block))
+
+        table = cls()
+        keys_append = table.keys.append
+        flags_append = table.flags.append
+        starts_append = table._starts.append
+        lengths_append = table._lengths.append
+        unpack_from = _STBL_ENTRY.unpack_from
+        end = len(block)
+        pos = 0
         try:
-            strings = zlib.decompress(strings)
-        except Exception as e:
-            raise ValueError('Invalid compressed STBL data') from e
-
-    entries: List[Tuple[str, str]] = []
-    f = BytesIO(strings)
-    for _ in range(count):
-        key_hash = struct.unpack('<I', f.read(4))[0]
-        flags = f.read(1)
-        length = struct.unpack('<H', f.read(2))[0]
-        text = f.read(length).decode('utf-8', errors='ignore')
-        entries.append((f"0x{key_hash:08X}", text))
-    return entries
-
-
-def build_stbl(entries: Iterable[Tuple[str, str]]) -> bytes:
-    out = BytesIO()
-    out.write(b'STBL')
-    out.write(struct.pack('<H', 5))
-    out.write(b'\x00')
-    entries = list(entries)
-    out.write(struct.pack('<Q', len(entries)))
-    out.write(b'\x00\x00')
-    # placeholder for length
-    length_pos = out.tell()
-    out.write(b'\x00\x00\x00\x00')
-    start = out.tell()
-    for key_str, text in entries:
-        key = int(key_str, 16)
-        encoded = text.encode('utf-8')
-        out.write(struct.pack('<IBH', key, 0, len(encoded)))
-        out.write(encoded)
-    end = out.tell()
-    string_len = end - start
-    out.seek(length_pos)
-    out.write(struct.pack('<I', string_len))
-    return out.getvalue()
+            for _ in range(count):
+                key, flag, length = unpack_from(block, pos)
+                pos += 7
+                keys_append(key)
+                flags_append(flag)
+                starts_append(pos)
+                lengths_append(length)
+                pos += length
+        except struct.error as e:
+            raise ValueError('Truncated STBL data') from e
+        if pos > end:
+            raise ValueError('Truncated STBL data')
+        table._buffer = block[:pos]
+        table._packed = True
+        metrics.count('stbl.strings_parsed', count)
+        return table
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Tuple[Union[int, str], str]]) -> 'StringTable':
+        """Build a table from ``(key, text)`` pairs.
+
+        Keys may be integers or hex strings; any other string key is hashed
+        with :func:`fnv32` the way the game hashes string identifiers.
+        """
+        table = cls()
+        chunks = []
+        pos = 0
+        for key, text in entries:
+            if isinstance(key, str):
+                key = key_hash(key)
+            encoded = text.encode('utf-8')
+            if len(encoded) > 0xFFFF:
+                raise ValueError(f'String for key 0x{key:08X} is too long for STBL')
+            table.keys.append(key)
+            table.flags.append(0)
+            table._starts.append(pos)
+            table._lengths.append(len(encoded))
+            chunks.append(encoded)
+            pos += len(encoded)
+        table._buffer = b''.join(chunks)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __getstate__(self) -> Tuple[array, bytearray, array, array, bytes, bool]:
+        # Pickled as a handful of flat buffers so tables cross process
+        # boundaries cheaply.
+        return self.keys, self.flags, self._starts, self._lengths, bytes(self._buffer), self._packed
+
+    def __setstate__(self, state: Tuple[array, bytearray, array, array, bytes, bool]) -> None:
+        self.keys, self.flags, self._starts, self._lengths, self._buffer, self._packed = state
+
+    def __getitem__(self, index: int) -> Tuple[int, str]:
+        return self.keys[index], self.text(index)
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        return zip(self.keys, self.texts())
+
+    def text(self, index: int) -> str:
+        start = self._starts[index]
+        return str(self._buffer[start:start + self._lengths[index]], 'utf-8', 'ignore')
+
+    def texts(self) -> List[str]:
+        buf = self._buffer
+        return [str(buf[s:s + n], 'utf-8', 'ignore') for s, n in zip(self._starts, self._lengths)]
+
+    def hex_keys(self) -> List[str]:
+        return [f"0x{key:08X}" for key in self.keys]
+
+    def entries(self) -> List[Tuple[str, str]]:
+        return list(zip(self.hex_keys(), self.texts()))
+
+    def to_bytes(self) -> bytes:
+        count = len(self.keys)
+        if self._packed:
+            block_len = len(self._buffer)
+        else:
+            block_len = 7 * count + sum(self._lengths)
+        out = bytearray(_STBL_HEADER.size + block_len)
+        _STBL_HEADER.pack_into(out, 0, b'STBL', 5, 0, count, b'\x00\x00', block_len)
+        pos = _STBL_HEADER.size
+        if self._packed:
+            out[pos:] = self._buffer
+            return bytes(out)
+        buf = self._buffer
+        pack_into = _STBL_ENTRY.pack_into
+        for key, flag, start, length in zip(self.keys, self.flags, self._starts, self._lengths):
+            pack_into(out, pos, key, flag, length)
+            pos += 7
+            out[pos:pos + length] = buf[start:start + length]
+            pos += length
+        return bytes(out)
+
+
+def parse_stbl(data: Buffer) -> List[Tuple[str, str]]:
+    return StringTable.parse(data).entries()
+
+
+def build_stbl(entries: Union[StringTable, Iterable[Tuple[Union[int, str], str]]]) -> bytes:
+    table = entries if isinstance(entries, StringTable) else StringTable.from_entries(entries)
+    return table.to_bytes()
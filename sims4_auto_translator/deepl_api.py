@@ -1,105 +1,289 @@
 from __future__ import annotations
 
-import os
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set
+from urllib.parse import quote_plus
 
 import requests
+import requests.adapters
 from rich.console import Console
 
-from .utils import load_json, save_json
+from .cache import SQLiteCache, TranslationCache, cache_key, lang_pair
+from .metrics import SAMPLE_WINDOW, metrics
+from .utils import DEFAULT_CONCURRENCY
 
 console = Console()
-CACHE_PATH = Path('translated_cache.json')
+CACHE_PATH = Path('translated_cache.db')
+LEGACY_CACHE_PATH = Path('translated_cache.json')
 DEEPL_FREE_ENDPOINT = 'https://api-free.deepl.com/v2/translate'
 DEEPL_PRO_ENDPOINT = 'https://api.deepl.com/v2/translate'
 
+# DeepL accepts at most 50 texts and 128 KiB of request body per call.
+MAX_TEXTS_PER_REQUEST = 50
+MAX_REQUEST_BYTES = 128 * 1024
+_REQUEST_OVERHEAD = 256  # auth_key, language codes and separators
+_TEXT_FIELD_OVERHEAD = len('&text%5B00%5D=')
+MAX_ATTEMPTS = 5
+REQUEST_TIMEOUT = 10
+BATCH_SIZE_BUCKETS = (1, 5, 10, 25, 49, 50)
+
+
+def open_cache(path: Optional[Path] = None) -> SQLiteCache:
+    return SQLiteCache(path or CACHE_PATH, legacy_json=LEGACY_CACHE_PATH)
+
+
+BatchCallback = Callable[[int, int, int], None]
+
+
+class TranslationCancelled(Exception):
+    pass
+
+
+def _form_size(text: str) -> int:
+    """Bytes ``text`` adds to a form-encoded request as ``text[i]=...``."""
+    return len(quote_plus(text)) + _TEXT_FIELD_OVERHEAD
+
+
+def plan_batches(texts: Iterable[str], max_bytes: int = MAX_REQUEST_BYTES,
+                 max_texts: int = MAX_TEXTS_PER_REQUEST) -> List[List[str]]:
+    """Pack texts into batches that fit the API's request-size limits."""
+    batches: List[List[str]] = []
+    batch: List[str] = []
+    size = _REQUEST_OVERHEAD
+    for text in texts:
+        text_size = _form_size(text)
+        if batch and (len(batch) >= max_texts or size + text_size > max_bytes):
+            batches.append(batch)
+            batch = []
+            size = _REQUEST_OVERHEAD
+        batch.append(text)
+        size += text_size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    value = resp.headers.get('Retry-After')
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RequestStats:
+    """Request counters and latencies recorded by :class:`DeepLTranslator`.
+
+    Only the latest ``SAMPLE_WINDOW`` latencies are kept, since a daemon's
+    translator lives as long as the process.
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.retries = 0
+        self.chars = 0
+        self.latencies: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, chars: int = 0, retry: bool = False) -> None:
+        with self._lock:
+            self.requests += 1
+            self.chars += chars
+            self.latencies.append(seconds)
+            if retry:
+                self.retries += 1
+
+    def percentile(self, pct: float) -> float:
+        with self._lock:
+            ordered = sorted(self.latencies)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class RateLimiter:
+    """Adaptive token bucket shared by all in-flight requests.
+
+    The request rate is halved whenever the API throttles us (honouring
+    ``Retry-After`` when given) and grows back additively on success.
+    """
+
+    def __init__(self, rate: float = 50.0, min_rate: float = 0.2, max_rate: float = 100.0) -> None:
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._tokens = max(rate, 1.0)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(max(self.rate, 1.0), self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._blocked_until and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = max(self._blocked_until - now, (1.0 - self._tokens) / self.rate)
+            metrics.add_time('deepl.rate_limit_wait', wait)
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + 0.5)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> float:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            wait = retry_after if retry_after is not None else 1.0 / self.rate
+            self._blocked_until = max(self._blocked_until, time.monotonic() + wait)
+            return wait
+
 
 class DeepLTranslator:
-    def __init__(self, auth_key: str) -> None:
+    def __init__(
+        self,
+        auth_key: str,
+        cache: Optional[TranslationCache] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        endpoint: Optional[str] = None,
+        pool_size: Optional[int] = None,
+    ) -> None:
         if auth_key.startswith('free:'):
             self.endpoint = DEEPL_FREE_ENDPOINT
             auth_key = auth_key[len('free:'):]
         else:
             self.endpoint = DEEPL_PRO_ENDPOINT
+        if endpoint:
+            self.endpoint = endpoint
         self.auth_key = auth_key
-        self.cache: Dict[str, Dict[str, str]] = load_json(CACHE_PATH)
+        self.stats = RequestStats()
+        self._cache = cache
+        self.concurrency = max(1, concurrency)
+        self.limiter = RateLimiter()
+        self.session = requests.Session()
+        # Concurrent translate() calls (one per target language) share the pool.
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size or self.concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @property
+    def cache(self) -> TranslationCache:
+        # Opened lazily so startup cost doesn't depend on the cache size.
+        if self._cache is None:
+            self._cache = open_cache()
+        return self._cache
 
-    def _cache_key(self, text: str, source: str, target: str) -> str:
-        pair = f"{source.lower()}-{target.lower()}"
-        return f"{pair}||{text}"
+    def _cache_key(self, text: str, source: str, target: str) -> bytes:
+        return cache_key(text, source, target)
 
-    def translate(self, texts: Iterable[str], source: str, target: str) -> List[str]:
-        results: List[str] = []
-        uncached: List[str] = []
+    def _post_batch(self, batch: List[str], source: str, target: str,
+                    cancel: Optional[threading.Event] = None) -> Optional[List[str]]:
+        """Send one batch, retrying with backoff. Returns ``None`` on failure."""
+        data = {
+            'auth_key': self.auth_key,
+            'source_lang': source.upper(),
+            'target_lang': target.upper(),
+            **{f'text[{i}]': t for i, t in enumerate(batch)},
+        }
+        chars = sum(map(len, batch))
+        metrics.observe('deepl.batch_size', len(batch), BATCH_SIZE_BUCKETS)
+        for attempt in range(MAX_ATTEMPTS):
+            if cancel is not None and cancel.is_set():
+                return None
+            self.limiter.acquire()
+            try:
+                start = time.perf_counter()
+                resp = self.session.post(self.endpoint, data=data, timeout=REQUEST_TIMEOUT)
+                ok_chars = chars if resp.status_code == 200 else 0
+                elapsed = time.perf_counter() - start
+                self.stats.record(elapsed, ok_chars, retry=attempt > 0)
+                metrics.observe('deepl.request_latency', elapsed)
+                if attempt:
+                    metrics.count('deepl.retries')
+                if resp.status_code == 200:
+                    self.limiter.on_success()
+                    return [t['text'] for t in resp.json()['translations']]
+                if resp.status_code in (429, 500, 503):
+                    wait = self.limiter.on_throttle(_retry_after(resp))
+                    metrics.count('deepl.throttled')
+                    console.print(f"DeepL rate limited, retrying in {wait:.1f}s...")
+                    continue
+                resp.raise_for_status()
+            except Exception as e:  # network error or HTTPError
+                wait = 2 ** attempt
+                console.print(f"Error contacting DeepL: {e}. Retrying in {wait}s")
+                metrics.count('deepl.errors')
+                metrics.add_time('deepl.backoff', wait)
+                time.sleep(wait)
+        console.print("Failed to translate batch after retries")
+        return None
+
+    def translate(
+        self,
+        texts: Iterable[str],
+        source: str,
+        target: str,
+        progress: Optional[BatchCallback] = None,
+        cancel: Optional[threading.Event] = None,
+        failed: Optional[Set[str]] = None,
+    ) -> List[str]:
+        """Translate ``texts``, returning results in input order.
+
+        ``progress`` is called as ``progress(done, total, cached)`` over the
+        unique texts after the cache lookup and after every batch.  Setting
+        ``cancel`` stops sending new batches; finished batches stay cached
+        and :class:`TranslationCancelled` is raised.  Texts of batches that
+        still fail after retries come back untranslated and are added to
+        ``failed``, so callers can avoid recording them as done.
+        """
+        texts = list(texts)
+        keys: Dict[str, bytes] = {}
         for text in texts:
-            key = self._cache_key(text, source, target)
-            if key in self.cache:
-                results.append(self.cache[key])
-            else:
-                results.append('')
-                uncached.append(text)
+            if text not in keys:
+                keys[text] = self._cache_key(text, source, target)
+        with metrics.timed('cache.lookup'):
+            cached = self.cache.get_many(list(keys.values()))
+        uncached = [text for text, key in keys.items() if key not in cached]
+        metrics.count('cache.hits', len(keys) - len(uncached))
+        metrics.count('cache.misses', len(uncached))
+        done = len(keys) - len(uncached)
+        if progress is not None:
+            progress(done, len(keys), done)
         if not uncached:
-            return results
-
-        batches: List[List[str]] = []
-        batch: List[str] = []
-        total_chars = 0
-        for text in uncached:
-            if len(batch) >= 50 or total_chars + len(text) > 20000:
-                batches.append(batch)
-                batch = []
-                total_chars = 0
-            batch.append(text)
-            total_chars += len(text)
-        if batch:
-            batches.append(batch)
+            return [cached[keys[text]] for text in texts]
 
+        pair = lang_pair(source, target)
         translated: Dict[str, str] = {}
-        for batch in batches:
-            for attempt in range(5):
-                try:
-                    resp = requests.post(
-                        self.endpoint,
-                        data={
-                            'auth_key': self.auth_key,
-                            'source_lang': source.upper(),
-                            'target_lang': target.upper(),
-                            **{f'text[{i}]': t for i, t in enumerate(batch)},
-                        },
-                        timeout=10,
-                    )
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        for orig, trans in zip(batch, [t['text'] for t in data['translations']]):
-                            translated[orig] = trans
-                        break
-                    if resp.status_code in (429, 500, 503):
-                        wait = 2 ** attempt
-                        console.print(f"DeepL rate limited, retrying in {wait}s...")
-                        time.sleep(wait)
-                        continue
-                    resp.raise_for_status()
-                except Exception as e:  # network error or HTTPError
-                    wait = 2 ** attempt
-                    console.print(f"Error contacting DeepL: {e}. Retrying in {wait}s")
-                    time.sleep(wait)
-            else:
-                console.print("Failed to translate batch after retries")
-                for orig in batch:
-                    translated[orig] = orig
-
-        for text, result in translated.items():
-            key = self._cache_key(text, source, target)
-            self.cache[key] = result
-        save_json(self.cache, CACHE_PATH)
-
-        idx = 0
-        for i, text in enumerate(texts):
-            key = self._cache_key(text, source, target)
-            if results[i]:
-                continue
-            results[i] = self.cache.get(key, translated.get(uncached[idx], text))
-            idx += 1
-        return results
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {
+                pool.submit(self._post_batch, batch, source, target, cancel): batch
+                for batch in plan_batches(uncached)
+            }
+            for future in as_completed(futures):
+                batch = futures[future]
+                results = future.result()
+                if results is None:
+                    metrics.count('deepl.failed_batches')
+                    # Fall back to the source text, but don't cache it.
+                    translated.update(zip(batch, batch))
+                    if failed is not None:
+                        failed.update(batch)
+                else:
+                    translated.update(zip(batch, results))
+                    # Persist each batch as it lands so finished work survives a crash.
+                    with metrics.timed('cache.store'):
+                        self.cache.set_many(pair, [(keys[orig], trans) for orig, trans in zip(batch, results)])
+                    done += len(batch)
+                if progress is not None:
+                    progress(done, len(keys), len(keys) - len(uncached))
+        if cancel is not None and cancel.is_set():
+            raise TranslationCancelled(f'Cancelled with {done} of {len(keys)} strings translated')
+
+        return [cached[keys[text]] if keys[text] in cached else translated.get(text, text) for text in texts]
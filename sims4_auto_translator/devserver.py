@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+
+class ServerConfig:
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        latency_dist: str = 'fixed',
+        jitter_ms: float = 0.0,
+        rate_429: float = 0.0,
+        rate_503: float = 0.0,
+        retry_after: Optional[float] = 1.0,
+        quota_chars: int = 0,
+        seed: int = 0,
+    ) -> None:
+        if latency_dist not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f'Unknown latency distribution {latency_dist!r}')
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.rate_503 = rate_503
+        self.retry_after = retry_after
+        self.quota_chars = quota_chars
+        self.seed = seed
+
+
+class FakeDeepLServer(ThreadingHTTPServer):
+    """Local stand-in for DeepL's ``/v2/translate`` endpoint.
+
+    Accepts the same form-encoded ``auth_key``/``text[i]`` requests, with
+    configurable latency, injected 429/503 responses and per-key quotas, so
+    batching and concurrency can be tuned offline.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: ServerConfig) -> None:
+        super().__init__(address, _Handler)
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.usage: Dict[str, int] = {}
+        self.requests = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/v2/translate'
+
+    def latency(self) -> float:
+        cfg = self.config
+        with self._lock:
+            if cfg.latency_dist == 'uniform':
+                ms = self._rng.uniform(cfg.latency_ms - cfg.jitter_ms, cfg.latency_ms + cfg.jitter_ms)
+            elif cfg.latency_dist == 'lognormal':
+                sigma = cfg.jitter_ms / cfg.latency_ms if cfg.latency_ms else 0.0
+                ms = cfg.latency_ms * self._rng.lognormvariate(0.0, sigma)
+            else:
+                ms = cfg.latency_ms
+        return max(ms, 0.0) / 1000
+
+    def roll_error(self) -> Optional[int]:
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.config.rate_429:
+            return 429
+        if roll < self.config.rate_429 + self.config.rate_503:
+            return 503
+        return None
+
+    def charge(self, key: str, chars: int) -> bool:
+        """Record usage for ``key``; ``False`` once its quota is exhausted."""
+        with self._lock:
+            used = self.usage.get(key, 0)
+            if self.config.quota_chars and used + chars > self.config.quota_chars:
+                return False
+            self.usage[key] = used + chars
+            return True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeDeepLServer
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _reply(self, status: int, payload: Optional[dict] = None, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload or {}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qsl(self.rfile.read(length).decode('utf-8'), keep_blank_values=True)
+        if self.path.split('?')[0] != '/v2/translate':
+            self._reply(404, {'message': 'Not found'})
+            return
+        with server._lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            time.sleep(server.latency())
+            self._translate(dict(form), [v for k, v in form if k == 'text'])
+        finally:
+            with server._lock:
+                server.in_flight -= 1
+
+    def _translate(self, fields: Dict[str, str], repeated: List[str]) -> None:
+        server = self.server
+        key = fields.get('auth_key', '')
+        if not key:
+            self._reply(403, {'message': 'Authorization failure'})
+            return
+        status = server.roll_error()
+        if status is not None:
+            with server._lock:
+                server.throttled += 1
+            headers = {}
+            if server.config.retry_after is not None:
+                headers['Retry-After'] = f'{server.config.retry_after:g}'
+            self._reply(status, {'message': 'Too many requests'}, headers)
+            return
+        indexed = sorted(
+            (int(name[5:-1]), value) for name, value in fields.items()
+            if name.startswith('text[') and name.endswith(']')
+        )
+        texts = [value for _, value in indexed] + repeated
+        if not texts or not fields.get('target_lang'):
+            self._reply(400, {'message': 'Missing text or target_lang'})
+            return
+        if not server.charge(key, sum(map(len, texts))):
+            self._reply(456, {'message': 'Quota exceeded'})
+            return
+        target = fields['target_lang']
+        source = fields.get('source_lang') or 'EN'
+        self._reply(200, {'translations': [
+            {'detected_source_language': source, 'text': f'[{target}] {text}'} for text in texts
+        ]})
+
+
+def serve_in_background(config: ServerConfig, host: str = '127.0.0.1', port: int = 0) -> FakeDeepLServer:
+    """Start a server on a daemon thread; stop it with ``shutdown()``."""
+    server = FakeDeepLServer((host, port), config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
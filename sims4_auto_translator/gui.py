@@ -1,20 +1,19 @@
 from __future__ import annotations
 
 import os
+import queue
+import threading
+import time
 import tkinter as tk
 import tkinter.ttk as ttk
 from pathlib import Path
+from typing import List
 from tkinter import filedialog, messagebox
 
-from .deepl_api import DeepLTranslator
-from .parsers import (
-    mask_placeholders,
-    parse_strings_file,
-    unmask_placeholders,
-    write_strings_file,
-)
-from .packer import pack_strings_to_package
-
+from .deepl_api import DEFAULT_CONCURRENCY, DeepLTranslator, TranslationCancelled
+from .memory import TranslationMemory
+from .pkgindex import PackageIndex
+from .planner import TRANSLATE_WORKERS, translate_folder_targets
 
 
 def run_gui() -> None:
@@ -25,7 +24,7 @@ def run_gui() -> None:
     source_var = tk.StringVar(value='EN')
     tk.Entry(root, textvariable=source_var).grid(row=0, column=1)
 
-    tk.Label(root, text='Target Lang:').grid(row=1, column=0, sticky='e')
+    tk.Label(root, text='Target Lang(s):').grid(row=1, column=0, sticky='e')
     target_var = tk.StringVar(value='UK')
     tk.Entry(root, textvariable=target_var).grid(row=1, column=1)
 
@@ -46,13 +45,101 @@ def run_gui() -> None:
     tk.Checkbutton(root, text='Use Game Folder', variable=use_game_var).grid(row=4, column=3, sticky='w')
 
     pack_var = tk.BooleanVar(value=False)
-    tk.Checkbutton(root, text='Create .package', variable=pack_var).grid(row=5, column=0, columnspan=2, sticky='w')
+    tk.Checkbutton(root, text='Create .package', variable=pack_var).grid(row=5, column=0, sticky='w')
+    patch_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(root, text='Patch packages', variable=patch_var).grid(row=5, column=1, sticky='w')
+    memory_var = tk.BooleanVar(value=True)
+    tk.Checkbutton(root, text='Reuse similar strings', variable=memory_var).grid(row=5, column=2, columnspan=2, sticky='w')
 
     progress = tk.IntVar(value=0)
     progress_bar = tk.ttk.Progressbar(root, variable=progress, maximum=100)
     progress_bar.grid(row=6, column=0, columnspan=4, sticky='ew', pady=5)
 
+    status_var = tk.StringVar(value='')
+    tk.Label(root, textvariable=status_var, anchor='w').grid(row=7, column=0, columnspan=4, sticky='ew')
+
+    events: 'queue.Queue[tuple]' = queue.Queue()
+    cancel_event = threading.Event()
+    state = {'running': False, 'started': 0.0}
+
+    def worker(folder: Path, output_root: Path, key: str, source: str, targets: List[str], pack: bool, patch: bool, memory: bool) -> None:
+        # Runs off the Tk thread; it only talks to the UI through ``events``.
+        if len(targets) == 1:
+            output_roots = {targets[0]: output_root}
+        else:
+            output_roots = {t: output_root / f'{source.lower()}-{t.lower()}' for t in targets}
+        # Each target keeps TRANSLATE_WORKERS chunks in flight.
+        translator = DeepLTranslator(key, pool_size=DEFAULT_CONCURRENCY * len(targets) * TRANSLATE_WORKERS)
+        try:
+            plans = translate_folder_targets(
+                folder, output_roots, translator, source,
+                pack=pack, workers=os.cpu_count() or 1,
+                progress=lambda done, total: events.put(('files', done, total)),
+                on_batch=lambda done, total, cached: events.put(('strings', done, total, cached)),
+                cancel=cancel_event,
+                memory=TranslationMemory() if memory else None,
+                patch=patch, index=PackageIndex(),
+            )
+            total = sum(plan.total for plan in plans.values())
+            unique = sum(plan.unique for plan in plans.values())
+            events.put(('done', output_root, total, unique))
+        except TranslationCancelled:
+            events.put(('cancelled',))
+        except Exception as e:  # surfaced in a dialog rather than lost on the thread
+            events.put(('error', str(e)))
+
+    def show_strings(done: int, total: int, cached: int) -> None:
+        if not state['started']:
+            # Throughput is measured from the first batch, not the scan.
+            state['started'] = time.monotonic()
+        progress_bar.configure(maximum=max(total, 1))
+        progress.set(done)
+        elapsed = max(time.monotonic() - state['started'], 1e-6)
+        rate = (done - cached) / elapsed
+        hit_rate = cached / total * 100 if total else 100.0
+        eta = f'{int((total - done) / rate)}s' if rate > 0 else '?'
+        status_var.set(
+            f'Translating {done}/{total} strings · {rate:.0f} strings/s · '
+            f'cache hits {hit_rate:.0f}% · ETA {eta}'
+        )
+
+    def finish() -> None:
+        state['running'] = False
+        translate_button.configure(state='normal')
+        cancel_button.configure(state='disabled')
+
+    def poll() -> None:
+        while True:
+            try:
+                event = events.get_nowait()
+            except queue.Empty:
+                break
+            kind = event[0]
+            if kind == 'strings':
+                show_strings(*event[1:])
+            elif kind == 'files':
+                done, total = event[1:]
+                progress_bar.configure(maximum=max(total, 1))
+                progress.set(done)
+                status_var.set(f'Writing {done}/{total} files')
+            elif kind == 'done':
+                finish()
+                output_root, total, unique = event[1:]
+                status_var.set(f'{total} strings, {unique} unique sent for translation')
+                messagebox.showinfo('Done', f'Translated files saved to {output_root}')
+            elif kind == 'cancelled':
+                finish()
+                status_var.set('Cancelled; finished batches are kept in the cache')
+            elif kind == 'error':
+                finish()
+                status_var.set('Failed')
+                messagebox.showerror('Error', event[1])
+        if state['running']:
+            root.after(100, poll)
+
     def start_translation() -> None:
+        if state['running']:
+            return
         folder = game_var.get()
         if not folder:
             messagebox.showerror('Error', 'Game folder not selected')
@@ -61,61 +148,39 @@ def run_gui() -> None:
         if use_game_var.get() or output_root is None:
             output_root = Path(folder)
         source = source_var.get().upper()
-        target = target_var.get().upper()
-        file_list = list(Path(folder).rglob('*.strings'))
-        package_list = list(Path(folder).rglob('Strings_*.package'))
-        if not file_list and not package_list:
+        targets = [t.strip().upper() for t in target_var.get().split(',') if t.strip()]
+        if not targets:
+            messagebox.showerror('Error', 'Target language required')
+            return
+        if not any(Path(folder).rglob('*.strings')) and not any(Path(folder).rglob('Strings_*.package')):
             messagebox.showerror('Error', 'No .strings or Strings_*.package files found')
             return
         key = apikey_var.get() or os.environ.get('DEEPL_AUTH_KEY', '')
         if not key:
             messagebox.showerror('Error', 'API key required')
             return
-        translator = DeepLTranslator(key)
-        progress_bar.configure(maximum=len(file_list) + len(package_list))
         progress.set(0)
-        progress_index = 0
-        for fp in file_list:
-            entries = parse_strings_file(fp)
-            texts = [e[1] for e in entries]
-            masked = []
-            maps = []
-            for t in texts:
-                m, mp = mask_placeholders(t)
-                masked.append(m)
-                maps.append(mp)
-            translated = translator.translate(masked, source, target)
-            restored = [unmask_placeholders(t, mp) for t, mp in zip(translated, maps)]
-            out_path = output_root / fp.relative_to(folder)
-            write_strings_file(zip([e[0] for e in entries], restored), out_path)
-            if pack_var.get():
-                pack_strings_to_package(zip([e[0] for e in entries], restored), out_path.with_suffix('.package'))
-            progress_index += 1
-            progress.set(progress_index)
-            root.update_idletasks()
-
-        from .dbpf import iter_stbl_from_package, parse_stbl
-        for pkg in package_list:
-            for inst, data in iter_stbl_from_package(pkg):
-                entries = parse_stbl(data)
-                texts = [e[1] for e in entries]
-                masked = []
-                maps = []
-                for t in texts:
-                    m, mp = mask_placeholders(t)
-                    masked.append(m)
-                    maps.append(mp)
-                translated = translator.translate(masked, source, target)
-                restored = [unmask_placeholders(t, mp) for t, mp in zip(translated, maps)]
-                out_rel = pkg.relative_to(folder).with_suffix(f'_{inst:08X}.strings')
-                out_path = output_root / out_rel
-                write_strings_file(zip([e[0] for e in entries], restored), out_path)
-                progress_index += 1
-                progress.set(progress_index)
-                root.update_idletasks()
-        messagebox.showinfo('Done', f'Translated files saved to {output_root}')
-
-    tk.Button(root, text='Translate', command=start_translation).grid(row=7, column=0, columnspan=4, pady=5)
+        status_var.set('Scanning...')
+        cancel_event.clear()
+        state['running'] = True
+        state['started'] = 0.0
+        translate_button.configure(state='disabled')
+        cancel_button.configure(state='normal')
+        threading.Thread(
+            target=worker,
+            args=(Path(folder), output_root, key, source, targets, pack_var.get(), patch_var.get(), memory_var.get()),
+            daemon=True,
+        ).start()
+        root.after(100, poll)
+
+    def cancel_translation() -> None:
+        cancel_event.set()
+        status_var.set('Cancelling after the current batch...')
+
+    translate_button = tk.Button(root, text='Translate', command=start_translation)
+    translate_button.grid(row=8, column=0, columnspan=2, pady=5)
+    cancel_button = tk.Button(root, text='Cancel', command=cancel_translation, state='disabled')
+    cancel_button.grid(row=8, column=2, columnspan=2, pady=5)
 
     root.mainloop()
 
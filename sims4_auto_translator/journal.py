@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from .cache import TranslationCache
+
+JOURNAL_NAME = '.s4at-journal.jsonl'
+JOURNAL_VERSION = 1
+
+
+class Journal:
+    """Append-only record of a folder run, stored in the output folder.
+
+    Every finished DeepL batch and every written output file is appended as
+    one JSON line and fsynced, so a killed run can be resumed: batches are
+    replayed into the cache and finished outputs are skipped.  A torn last
+    line from a crash mid-write is ignored.
+    """
+
+    def __init__(self, output_root: Path, header: Dict[str, Any], resume: bool = False) -> None:
+        self.path = output_root / JOURNAL_NAME
+        self.header = {'type': 'run', 'version': JOURNAL_VERSION, **header}
+        self._batches: List[Tuple[str, List[Tuple[bytes, str]]]] = []
+        self._outputs: Dict[str, str] = {}
+        # Batches and outputs are recorded from pipeline and per-target threads.
+        self._lock = threading.Lock()
+        if resume and self.path.exists():
+            self._load()
+            mode = 'a'
+        else:
+            output_root.mkdir(parents=True, exist_ok=True)
+            mode = 'w'
+        self._file = self.path.open(mode, encoding='utf-8')
+        if mode == 'w':
+            self._append(self.header)
+
+    def _load(self) -> None:
+        with self.path.open('rb+') as f:
+            data = f.read()
+            # Drop a torn final line so new records start on a fresh line.
+            end = data.rfind(b'\n') + 1
+            if end < len(data):
+                f.truncate(end)
+        records = []
+        for line in data[:end].decode('utf-8').splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        if not records or records[0] != self.header:
+            raise ValueError(f"{self.path} belongs to a different run; start without --resume")
+        for record in records[1:]:
+            if record['type'] == 'batch':
+                items = [(bytes.fromhex(key), value) for key, value in record['items']]
+                self._batches.append((record['pair'], items))
+            elif record['type'] == 'output':
+                self._outputs[record['path']] = record['digest']
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    @property
+    def batches(self) -> int:
+        return len(self._batches)
+
+    def replay(self, cache: TranslationCache) -> int:
+        """Write journaled batch results into ``cache``; returns the count."""
+        for pair, items in self._batches:
+            cache.set_many(pair, items)
+        return sum(len(items) for _, items in self._batches)
+
+    def record_batch(self, pair: str, items: Sequence[Tuple[bytes, str]]) -> None:
+        record = {'type': 'batch', 'pair': pair, 'items': [[key.hex(), value] for key, value in items]}
+        with self._lock:
+            self._batches.append((pair, list(items)))
+            self._append(record)
+
+    def finished(self, rel: str, digest: str) -> bool:
+        """Whether output ``rel`` was fully written from a source with ``digest``."""
+        return self._outputs.get(rel) == digest
+
+    def record_output(self, rel: str, digest: str) -> None:
+        with self._lock:
+            self._outputs[rel] = digest
+            self._append({'type': 'output', 'path': rel, 'digest': digest})
+
+    def close(self, completed: bool = False) -> None:
+        """Close the journal; a completed run has nothing to resume, so it is removed."""
+        self._file.close()
+        if completed:
+            self.path.unlink()
+
+
+class JournaledCache(TranslationCache):
+    """Cache wrapper that also appends every stored batch to the journal of
+    its language pair (``journals`` is keyed by :func:`lang_pair`)."""
+
+    def __init__(self, cache: TranslationCache, journals: Dict[str, Journal]) -> None:
+        self.inner = cache
+        self.journals = journals
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, str]:
+        return self.inner.get_many(keys)
+
+    def set_many(self, pair: str, items: Iterable[Tuple[bytes, str]]) -> None:
+        items = list(items)
+        self.inner.set_many(pair, items)
+        journal = self.journals.get(pair)
+        if journal is not None:
+            journal.record_batch(pair, items)
+
+    def stats(self) -> Dict[str, object]:
+        return self.inner.stats()
+
+    def compact(self) -> None:
+        self.inner.compact()
+
+    def close(self) -> None:
+        self.inner.close()
@@ -1,24 +1,94 @@
 from __future__ import annotations
 
+import json
 import os
+import sys
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 import typer
 from rich import print
 
-from .deepl_api import DeepLTranslator
-from .parsers import (
-    mask_placeholders,
-    parse_strings_file,
-    unmask_placeholders,
-    write_strings_file,
+# Only light modules are imported up front; each command imports what it
+# needs, so `--help` and thin `--server` clients start quickly.
+from .client import DEFAULT_PORT, TOKEN_PATH, DaemonError, create_token, submit
+from .memory import CATEGORIES, DEFAULT_CATEGORIES
+from .metrics import metrics
+from .pkgindex import INDEX_CACHE_PATH
+from .utils import DEFAULT_CONCURRENCY, confirm
+
+SERVER_HELP = "Run the job on a `serve` daemon at this address (env S4AT_SERVER)"
+MEMORY_SKIP_HELP = f"Normalisation to disable: {', '.join(DEFAULT_CATEGORIES)}"
+MEMORY_NORMALIZE_HELP = (
+    f"Lossy normalisation to enable: {', '.join(c for c in CATEGORIES if c not in DEFAULT_CATEGORIES)}; "
+    "the stripped affix is re-appended untranslated"
 )
-from .packer import pack_strings_to_package
-from .utils import confirm, console
-from .gui import run_gui
 
 app = typer.Typer(help="Sims 4 Auto Translator")
+cache_app = typer.Typer(help="Inspect and maintain the translation cache")
+app.add_typer(cache_app, name='cache')
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    metrics_json: Optional[Path] = typer.Option(
+        None, '--metrics-json', envvar='S4AT_METRICS',
+        help="Write stage timers, counters and request latencies to this JSON file",
+    ),
+    profile: Optional[Path] = typer.Option(
+        None, '--profile', help="Write cProfile stats of the main thread to this file",
+    ),
+) -> None:
+    if metrics_json is not None:
+        metrics.enable()
+        start = time.perf_counter()
+        command = ctx.invoked_subcommand
+
+        def write_metrics() -> None:
+            metrics.write_json(metrics_json, command=command, wall_seconds=time.perf_counter() - start)
+            print(f"Metrics written to {metrics_json}")
+        ctx.call_on_close(write_metrics)
+    if profile is not None:
+        import cProfile
+
+        profiler = cProfile.Profile()
+
+        def write_profile() -> None:
+            profiler.disable()
+            profiler.dump_stats(str(profile))
+            print(f"Profile written to {profile}; inspect it with `python -m pstats {profile}`")
+        # Registered after the metrics writer so it runs first and the
+        # profile doesn't include writing the metrics.
+        ctx.call_on_close(write_profile)
+        profiler.enable()
+
+
+def parse_targets(values: List[str]) -> List[str]:
+    """Upper-cased target languages from repeated and/or comma-separated options."""
+    targets: List[str] = []
+    for value in values:
+        for lang in value.split(','):
+            lang = lang.strip().upper()
+            if lang and lang not in targets:
+                targets.append(lang)
+    return targets
+
+
+def output_dir(root: Path, source_lang: str, target_lang: str) -> Path:
+    return root / f"{source_lang.lower()}-{target_lang.lower()}"
+
+
+def run_remote(server: str, kind: str, job: Dict[str, object]) -> Dict[str, object]:
+    """Submit a job to a ``serve`` daemon, exiting with a message on failure."""
+    try:
+        return submit(server, kind, job)
+    except DaemonError as e:
+        print(f"[red]{e}[/red]")
+    except OSError as e:
+        print(f"[red]No translator daemon at {server} ({e}); start one with `serve`[/red]")
+    raise typer.Exit(code=1)
 
 
 @app.command()
@@ -26,54 +96,376 @@ def translate(
     infile: Path = typer.Argument(..., help="Input .strings file"),
     apikey: str = typer.Option(None, help="DeepL API key"),
     source_lang: str = typer.Option('EN', help="Source language code"),
-    target_lang: str = typer.Option('UK', help="Target language code"),
+    target_lang: List[str] = typer.Option(['UK'], help="Target language code(s); repeat or comma-separate"),
+    concurrency: int = typer.Option(DEFAULT_CONCURRENCY, help="DeepL requests in flight"),
+    memory: bool = typer.Option(True, '--memory/--no-memory', help="Reuse translations of near-identical strings"),
+    memory_skip: List[str] = typer.Option([], '--memory-skip', help=MEMORY_SKIP_HELP),
+    memory_normalize: List[str] = typer.Option([], '--memory-normalize', help=MEMORY_NORMALIZE_HELP),
+    server: Optional[str] = typer.Option(None, envvar='S4AT_SERVER', help=SERVER_HELP),
     yes: bool = typer.Option(False, '--yes', help="Skip confirmation"),
 ) -> None:
     if not infile.exists():
         print(f"[red]File {infile} not found[/red]")
         raise typer.Exit(code=1)
+    targets = parse_targets(target_lang)
+    out_paths = [output_dir(Path('output'), source_lang, target) / infile.name for target in targets]
+    if server:
+        result = run_remote(server, 'translate', {
+            'infile': str(infile.resolve()), 'outputs': [str(p.resolve()) for p in out_paths],
+            'source_lang': source_lang, 'targets': targets, 'memory': memory, 'memory_skip': memory_skip,
+            'memory_normalize': memory_normalize,
+        })
+        if 'memory' in result:
+            print(result['memory'])
+    else:
+        from .deepl_api import DeepLTranslator
+        from .memory import TranslationMemory
+        from .planner import TRANSLATE_WORKERS, report_memory, translate_file
+
+        try:
+            tm = TranslationMemory(memory_skip, memory_normalize) if memory else None
+        except ValueError as e:
+            print(f"[red]{e}[/red]")
+            raise typer.Exit(code=1)
+        key = apikey or os.environ.get('DEEPL_AUTH_KEY')
+        if not key:
+            print("[red]DeepL API key required[/red]")
+            raise typer.Exit(code=1)
+        translator = DeepLTranslator(key, concurrency=concurrency, pool_size=concurrency * len(targets) * TRANSLATE_WORKERS)
+        translate_file(infile, out_paths, translator, source_lang, targets, tm)
+        if tm is not None:
+            report_memory(tm)
+    for out_path in out_paths:
+        print(f"[green]Translation saved to {out_path}[/green]")
+
+
+@app.command('translate-folder')
+def translate_folder_command(
+    folder: Path = typer.Argument(..., help="Folder with .strings files and Strings_*.package files"),
+    output: Path = typer.Option(Path('output'), help="Output root; each target goes to <output>/<source>-<target>"),
+    apikey: str = typer.Option(None, help="DeepL API key"),
+    source_lang: str = typer.Option('EN', help="Source language code"),
+    target_lang: List[str] = typer.Option(['UK'], help="Target language code(s); repeat or comma-separate"),
+    concurrency: int = typer.Option(DEFAULT_CONCURRENCY, help="DeepL requests in flight per target"),
+    workers: int = typer.Option(os.cpu_count() or 1, help="STBL decoding processes"),
+    chunksize: int = typer.Option(4, min=1, help="STBL resources handed to a decoding process at a time"),
+    pack: bool = typer.Option(False, '--pack', help="Also pack each translated .strings file"),
+    patch: bool = typer.Option(False, '--patch', help="Also write translated copies of each Strings_*.package"),
+    incremental: bool = typer.Option(True, '--incremental/--full', help="Skip sources unchanged since the last run"),
+    merge: bool = typer.Option(
+        False, '--merge', help="Keep existing target-language translations; only translate missing keys",
+    ),
+    memory: bool = typer.Option(True, '--memory/--no-memory', help="Reuse translations of near-identical strings"),
+    memory_skip: List[str] = typer.Option([], '--memory-skip', help=MEMORY_SKIP_HELP),
+    memory_normalize: List[str] = typer.Option([], '--memory-normalize', help=MEMORY_NORMALIZE_HELP),
+    resume: bool = typer.Option(False, '--resume', help="Continue an interrupted run from its journal"),
+    endpoint: Optional[str] = typer.Option(None, help="Translate endpoint override, e.g. a fake-deepl server"),
+) -> None:
+    """Translate a whole folder, journaling progress so it can be resumed."""
+    from .cache import lang_pair
+    from .deepl_api import DeepLTranslator, open_cache
+    from .journal import Journal, JournaledCache
+    from .memory import TranslationMemory
+    from .pkgindex import PackageIndex
+    from .planner import TRANSLATE_WORKERS, translate_folder_targets
+
+    if not folder.is_dir():
+        print(f"[red]Folder {folder} not found[/red]")
+        raise typer.Exit(code=1)
     key = apikey or os.environ.get('DEEPL_AUTH_KEY')
     if not key:
         print("[red]DeepL API key required[/red]")
         raise typer.Exit(code=1)
-    translator = DeepLTranslator(key)
-    entries = parse_strings_file(infile)
-    masked = []
-    maps = []
-    for _, text in entries:
-        m, mp = mask_placeholders(text)
-        masked.append(m)
-        maps.append(mp)
-    translated = translator.translate(masked, source_lang, target_lang)
-    restored = [unmask_placeholders(t, mp) for t, mp in zip(translated, maps)]
-    out_dir = Path('output') / f"{source_lang.lower()}-{target_lang.lower()}"
-    out_dir.mkdir(parents=True, exist_ok=True)
-    write_strings_file(zip([k for k, _ in entries], restored), out_dir / infile.name)
-    print(f"[green]Translation saved to {out_dir / infile.name}[/green]")
+    try:
+        tm = TranslationMemory(memory_skip, memory_normalize) if memory else None
+    except ValueError as e:
+        print(f"[red]{e}[/red]")
+        raise typer.Exit(code=1)
+    targets = parse_targets(target_lang)
+    output_roots = {target: output_dir(output, source_lang, target) for target in targets}
+    cache = open_cache()
+    journals: Dict[str, Journal] = {}
+    try:
+        for target, root in output_roots.items():
+            header = {'folder': str(folder.resolve()), 'source': source_lang.upper(), 'target': target}
+            journal = journals[target] = Journal(root, header, resume=resume)
+            if journal.batches:
+                replayed = journal.replay(cache)
+                print(f"Resuming {target}: {replayed} translations recovered from {journal.batches} journaled batches")
+    except ValueError as e:
+        print(f"[red]{e}[/red]")
+        raise typer.Exit(code=1)
+    by_pair = {lang_pair(source_lang, target): journal for target, journal in journals.items()}
+    translator = DeepLTranslator(
+        key, cache=JournaledCache(cache, by_pair), concurrency=concurrency,
+        endpoint=endpoint, pool_size=concurrency * len(targets) * TRANSLATE_WORKERS,
+    )
+    completed = False
+    try:
+        plans = translate_folder_targets(
+            folder, output_roots, translator, source_lang,
+            pack=pack, incremental=incremental, workers=workers, chunksize=chunksize, memory=tm,
+            journals=journals, patch=patch, index=PackageIndex(), merge=merge,
+        )
+        # Keep the journal while outputs still hold source text, so --resume retries only those.
+        completed = not any(plan.incomplete for plan in plans.values())
+    except KeyboardInterrupt:
+        print("[yellow]Interrupted; rerun with --resume to continue[/yellow]")
+        raise typer.Exit(code=130)
+    finally:
+        for journal in journals.values():
+            journal.close(completed)
+    for target, plan in plans.items():
+        print(f"[green]{len(plan.sources)} files translated into {output_roots[target]}[/green]")
 
 
 @app.command()
-def verify(infile: Path = typer.Argument(...), yes: bool = typer.Option(False, '--yes')) -> None:
-    print(f"Verifying {infile} ... (placeholder)")
+def verify(
+    source: Path = typer.Argument(..., help="Source .strings file, package or folder"),
+    translated: Path = typer.Argument(..., help="Translated file, package or folder"),
+    workers: Optional[int] = typer.Option(None, help="Worker processes (default: CPU count)"),
+    json_out: bool = typer.Option(False, '--json', help="Print defects as JSON lines"),
+    yes: bool = typer.Option(False, '--yes'),
+) -> None:
+    from .verify import verify_paths
+
+    if not source.exists():
+        print(f"[red]File {source} not found[/red]")
+        raise typer.Exit(code=1)
+    defects = verify_paths(source, translated, workers=workers)
+    if json_out:
+        for defect in defects:
+            sys.stdout.write(json.dumps(defect._asdict(), ensure_ascii=False) + '\n')
+    else:
+        for defect in defects:
+            print(f"{defect.path}:{defect.line} {defect.key} [yellow]{defect.kind}[/yellow] {defect.detail}")
+        if defects:
+            print(f"[red]{len(defects)} problems found[/red]")
+        else:
+            print("[green]No problems found[/green]")
+    if defects:
+        raise typer.Exit(code=1)
 
 
 @app.command()
 def pack(
-    infile: Path = typer.Argument(..., help="Input .strings file"),
+    infile: Path = typer.Argument(..., help="Input .strings file or folder of .strings files"),
     out_package: Path = typer.Argument(..., help="Output .package"),
+    compress: bool = typer.Option(False, '--compress', help="zlib-compress STBL resources"),
+    workers: Optional[int] = typer.Option(None, help="Compression threads"),
+    server: Optional[str] = typer.Option(None, envvar='S4AT_SERVER', help=SERVER_HELP),
     yes: bool = typer.Option(False, '--yes'),
 ) -> None:
+    if not infile.exists():
+        print(f"[red]File {infile} not found[/red]")
+        raise typer.Exit(code=1)
     if not confirm(f"Pack {infile} into {out_package}?", yes):
         raise typer.Exit()
-    entries = parse_strings_file(infile)
-    pack_strings_to_package(entries, out_package)
-    print(f"[green]Package written to {out_package}[/green]")
+    if server:
+        result = run_remote(server, 'pack', {
+            'infile': str(infile.resolve()), 'output': str(out_package.resolve()),
+            'compress': compress, 'workers': workers,
+        })
+        count = result['count']
+    else:
+        from .packer import pack_strings_files
+
+        count = pack_strings_files(infile, out_package, compress=compress, workers=workers)
+    print(f"[green]Package with {count} string tables written to {out_package}[/green]")
+
+
+@app.command()
+def serve(
+    apikey: str = typer.Option(None, help="DeepL API key"),
+    port: int = typer.Option(DEFAULT_PORT, help="Port to listen on"),
+    concurrency: int = typer.Option(DEFAULT_CONCURRENCY, help="DeepL requests in flight per job"),
+    endpoint: Optional[str] = typer.Option(None, help="Translate endpoint override, e.g. a fake-deepl server"),
+) -> None:
+    """Keep a translator, its cache and connections warm for `--server` jobs."""
+    from .daemon import TranslatorServer, TranslatorService
+    from .deepl_api import DeepLTranslator, open_cache
+    from .planner import TRANSLATE_WORKERS
+
+    key = apikey or os.environ.get('DEEPL_AUTH_KEY')
+    if not key:
+        print("[red]DeepL API key required[/red]")
+        raise typer.Exit(code=1)
+    cache = open_cache()
+    translator = DeepLTranslator(
+        key, cache=cache, concurrency=concurrency, endpoint=endpoint, pool_size=concurrency * TRANSLATE_WORKERS,
+    )
+    server = TranslatorServer(port, TranslatorService(translator), create_token())
+    print(f"Translator daemon listening on {server.url}; use --server {server.url} or set S4AT_SERVER")
+    print(f"Clients authenticate with the token in {TOKEN_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        cache.close()
+
+
+@app.command()
+def scan(
+    folder: Path = typer.Argument(..., help="Game install or mods folder"),
+    index_path: Path = typer.Option(INDEX_CACHE_PATH, '--index', help="Package index cache file"),
+    list_packages: bool = typer.Option(False, '--list', help="Print one line per package with string tables"),
+) -> None:
+    """Count the string tables of every package below a folder."""
+    from .pkgindex import PackageIndex
+
+    if not folder.is_dir():
+        print(f"[red]Folder {folder} not found[/red]")
+        raise typer.Exit(code=1)
+    start = time.perf_counter()
+    index = PackageIndex(index_path)
+    rows = []
+    errors = []
+    for pkg in sorted(folder.rglob('*.package')):
+        try:
+            entries = index.stbl_entries(pkg)
+        except (OSError, ValueError) as e:
+            errors.append(f"{pkg}: {e}")
+            continue
+        rows.append((pkg, len(entries), sum(entry.mem_size for entry in entries)))
+    index.save()
+    elapsed = (time.perf_counter() - start) * 1000
+    for error in errors:
+        print(f"[yellow]{error}[/yellow]")
+    if list_packages:
+        sys.stdout.write(''.join(
+            f"{pkg.relative_to(folder)}\t{count}\t{size}\n" for pkg, count, size in rows if count
+        ))
+    tables = sum(count for _, count, _ in rows)
+    size = sum(size for _, _, size in rows)
+    print(
+        f"[green]{len(rows)} packages, {tables} string tables, {size / 1024:.1f} KiB "
+        f"in {elapsed:.0f} ms ({index.hits} cached, {index.misses} parsed)[/green]"
+    )
+
+
+@app.command()
+def patch(
+    source: Path = typer.Argument(..., help="Source Strings_*.package"),
+    translated: Path = typer.Argument(..., help="Folder with the translated <name>_<instance>.strings dumps"),
+    out_package: Path = typer.Argument(..., help="Output .package"),
+    target_lang: str = typer.Option('UK', help="Target language; selects the STBL locale byte"),
+    compress: bool = typer.Option(False, '--compress', help="zlib-compress the translated STBL resources"),
+) -> None:
+    """Copy a package with its string tables replaced by translations."""
+    from .packer import locale_code, patch_package_from_dumps
+
+    if not source.exists():
+        print(f"[red]File {source} not found[/red]")
+        raise typer.Exit(code=1)
+    try:
+        count = patch_package_from_dumps(
+            source, translated / source.stem, out_package, locale_code(target_lang), compress=compress,
+        )
+    except ValueError as e:
+        print(f"[red]{e}[/red]")
+        raise typer.Exit(code=1)
+    print(f"[green]{count} string tables replaced in {out_package}[/green]")
+
+
+@cache_app.command('stats')
+def cache_stats(path: Optional[Path] = typer.Option(None, help="Cache database")) -> None:
+    from .deepl_api import CACHE_PATH, open_cache
+
+    if not (path or CACHE_PATH).exists():
+        print(f"No cache at {path or CACHE_PATH}")
+        return
+    stats = open_cache(path).stats()
+    print(f"{stats['entries']} cached translations, {stats['bytes'] / 1024:.1f} KiB on disk")
+    for pair, count in stats['pairs'].items():
+        print(f"  {pair}: {count}")
+
+
+@cache_app.command('compact')
+def cache_compact(path: Optional[Path] = typer.Option(None, help="Cache database")) -> None:
+    from .deepl_api import CACHE_PATH, open_cache
+
+    if not (path or CACHE_PATH).exists():
+        print(f"No cache at {path or CACHE_PATH}")
+        return
+    cache = open_cache(path)
+    before = cache.stats()['bytes']
+    cache.compact()
+    after = cache.stats()['bytes']
+    print(f"[green]Cache compacted: {before / 1024:.1f} KiB -> {after / 1024:.1f} KiB[/green]")
+
+
+@app.command('fake-deepl')
+def fake_deepl(
+    port: int = typer.Option(8765, help="Port to listen on"),
+    latency_ms: float = typer.Option(50.0, help="Mean response latency"),
+    latency_dist: str = typer.Option('fixed', help="fixed, uniform or lognormal"),
+    jitter_ms: float = typer.Option(0.0, help="Latency spread"),
+    rate_429: float = typer.Option(0.0, help="Fraction of requests answered with 429"),
+    rate_503: float = typer.Option(0.0, help="Fraction of requests answered with 503"),
+    retry_after: Optional[float] = typer.Option(1.0, help="Retry-After seconds on errors"),
+    quota: int = typer.Option(0, help="Characters allowed per auth key (0 = unlimited)"),
+) -> None:
+    """Run a local DeepL-compatible server for offline testing."""
+    from .devserver import FakeDeepLServer, ServerConfig
+
+    config = ServerConfig(latency_ms, latency_dist, jitter_ms, rate_429, rate_503, retry_after, quota)
+    server = FakeDeepLServer(('127.0.0.1', port), config)
+    print(f"Fake DeepL listening on {server.endpoint}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+@app.command()
+def loadtest(
+    endpoint: Optional[str] = typer.Option(None, help="Translate endpoint (default: start a local fake)"),
+    strings: int = typer.Option(20000, help="Number of strings to translate"),
+    concurrency: int = typer.Option(DEFAULT_CONCURRENCY, help="DeepL requests in flight"),
+    latency_ms: float = typer.Option(50.0, help="Fake server mean latency"),
+    latency_dist: str = typer.Option('fixed', help="Fake server latency distribution"),
+    jitter_ms: float = typer.Option(0.0, help="Fake server latency spread"),
+    rate_429: float = typer.Option(0.0, help="Fake server 429 rate"),
+    rate_503: float = typer.Option(0.0, help="Fake server 503 rate"),
+    retry_after: Optional[float] = typer.Option(0.5, help="Fake server Retry-After seconds"),
+) -> None:
+    """Drive the translator against a DeepL stand-in and report throughput."""
+    from .cache import MemoryCache
+    from .deepl_api import DeepLTranslator
+    from .devserver import ServerConfig, serve_in_background
+
+    server = None
+    if endpoint is None:
+        config = ServerConfig(latency_ms, latency_dist, jitter_ms, rate_429, rate_503, retry_after)
+        server = serve_in_background(config)
+        endpoint = server.endpoint
+    texts = [f"Load test string {i} for {{0.SimFirstName}} with some words" for i in range(strings)]
+    translator = DeepLTranslator('loadtest', cache=MemoryCache(), concurrency=concurrency, endpoint=endpoint)
+    start = time.perf_counter()
+    translator.translate(texts, 'EN', 'UK')
+    elapsed = time.perf_counter() - start
+    stats = translator.stats
+    print(f"Translated {len(texts)} strings ({stats.chars} chars) in {elapsed:.2f}s")
+    print(f"  chars/sec:   {stats.chars / elapsed:,.0f}")
+    print(f"  requests:    {stats.requests} ({stats.retries} retries)")
+    print(f"  latency p50: {stats.percentile(50) * 1000:.1f} ms, p99: {stats.percentile(99) * 1000:.1f} ms")
+    if server is not None:
+        print(f"  peak server concurrency: {server.peak_in_flight}, throttled responses: {server.throttled}")
+        server.shutdown()
 
 
 @app.command()
 def gui() -> None:
+    from .gui import run_gui
+
     run_gui()
 
 
 if __name__ == '__main__':
+    import multiprocessing
+
+    # Needed for process-pool workers in frozen (PyInstaller) builds.
+    multiprocessing.freeze_support()
     app()
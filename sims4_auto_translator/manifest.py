@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from .cache import lang_pair
+from .parsers import parse_strings_file
+from .utils import load_json, save_json
+
+MANIFEST_NAME = '.s4at-manifest.json'
+MANIFEST_VERSION = 1
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class Manifest:
+    """Content hashes of the sources translated by the previous run.
+
+    Stored as ``.s4at-manifest.json`` in the output folder.  Files are first
+    compared by size and mtime, then by content hash; tables by the hash of
+    their raw data and individual strings by the hash of their source text.
+    """
+
+    def __init__(self, output_root: Path, source_lang: str, target_lang: str) -> None:
+        self.output_root = output_root
+        self.path = output_root / MANIFEST_NAME
+        self.pair = lang_pair(source_lang, target_lang)
+        data = load_json(self.path)
+        if data.get('version') != MANIFEST_VERSION or data.get('pair') != self.pair:
+            data = {}
+        self._old: Dict[str, Any] = data.get('files', {})
+        self._new: Dict[str, Any] = {}
+
+    def _old_table(self, rel: str, table: str) -> Dict[str, Any]:
+        return self._old.get(rel, {}).get('tables', {}).get(table, {})
+
+    def unchanged_file(self, rel: str, st: os.stat_result) -> bool:
+        old = self._old.get(rel)
+        if (
+            old is not None
+            and old['size'] == st.st_size
+            and old['mtime_ns'] == st.st_mtime_ns
+            and all((self.output_root / t['output']).exists() for t in old['tables'].values())
+        ):
+            self._new[rel] = old
+            return True
+        self._new[rel] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'tables': {}}
+        return False
+
+    def unchanged_table(self, rel: str, table: str, digest: str) -> bool:
+        old = self._old_table(rel, table)
+        if old.get('hash') == digest and (self.output_root / old['output']).exists():
+            self._new[rel]['tables'][table] = old
+            return True
+        return False
+
+    def known_translations(self, rel: str, table: str, keys: List[str], texts: List[str]) -> Dict[int, str]:
+        """Existing translations for keys whose source text hasn't changed."""
+        old = self._old_table(rel, table)
+        if not old:
+            return {}
+        out_path = self.output_root / old['output']
+        if not out_path.exists():
+            return {}
+        existing = dict(parse_strings_file(out_path))
+        previous = old['keys']
+        return {
+            i: existing[key]
+            for i, (key, text) in enumerate(zip(keys, texts))
+            if key in existing and previous.get(key) == text_hash(text)
+        }
+
+    def invalidate_file(self, rel: str) -> None:
+        """Make the next run look inside ``rel`` instead of skipping it by size and mtime."""
+        self._new[rel]['mtime_ns'] = -1
+
+    def record_table(self, rel: str, table: str, digest: str, output: Path,
+                     keys: List[str], texts: List[str]) -> None:
+        self._new[rel]['tables'][table] = {
+            'hash': digest,
+            'output': output.relative_to(self.output_root).as_posix(),
+            'keys': {key: text_hash(text) for key, text in zip(keys, texts)},
+        }
+
+    def save(self) -> None:
+        save_json({'version': MANIFEST_VERSION, 'pair': self.pair, 'files': self._new}, self.path)
+
+
+class ManifestGroup:
+    """The manifests of several target languages, consulted as one by a scan.
+
+    A file or table counts as unchanged only if it is unchanged for every
+    target; each manifest still records its own entries.
+    """
+
+    def __init__(self, manifests: Iterable[Manifest]) -> None:
+        self.manifests = list(manifests)
+
+    def unchanged_file(self, rel: str, st: os.stat_result) -> bool:
+        # Every manifest must be asked: the check also carries entries forward.
+        return all([m.unchanged_file(rel, st) for m in self.manifests])
+
+    def unchanged_table(self, rel: str, table: str, digest: str) -> bool:
+        return all([m.unchanged_table(rel, table, digest) for m in self.manifests])
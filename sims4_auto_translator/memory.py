@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import re
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    # Annotations only: the CLI imports CATEGORIES without pulling in requests.
+    from .deepl_api import BatchCallback, DeepLTranslator
+
+# Normalisations applied to masked text before lookup.  Placeholders are
+# already canonical at this point: masking numbers them by position, so
+# "{0.String}" and "{1.String}" both become "§§PLH_000§§".
+CATEGORIES = ('whitespace', 'punctuation', 'digits')
+# Punctuation and digit stripping are opt-in: the affixes are re-appended
+# verbatim, which is wrong for targets with their own punctuation rules
+# (Spanish ¿…?, French spacing, full-width CJK marks) and sends DeepL
+# fragments ("Are you sure" for "Are you sure?", "Page 1 of" for "Page 1 of 3").
+DEFAULT_CATEGORIES = ('whitespace',)
+
+_INNER_SPACE = re.compile(r'[ \t]{2,}')
+_TRAILING_PUNCT = re.compile(r'[.!?:;…]+$')
+# Only a number at the very end is abstracted ("Level 2"); numbers inside a
+# sentence usually drive plural agreement in the target language.
+_TRAILING_NUMBER = re.compile(r'\s+\d+(?:[.,]\d+)?%?$')
+
+
+class TranslationMemory:
+    """Reuse one translation for strings that share a canonical template.
+
+    Each masked string is split into ``prefix + template + suffix`` where the
+    affixes carry surrounding whitespace and, when ``enabled``, trailing
+    punctuation and a trailing number.  Templates are translated once and
+    re-instantiated for every variant.  Categories listed in ``disabled`` are
+    left untouched.
+    """
+
+    def __init__(self, disabled: Iterable[str] = (), enabled: Iterable[str] = ()) -> None:
+        disabled = set(disabled)
+        enabled = set(enabled)
+        unknown = (disabled | enabled) - set(CATEGORIES)
+        if unknown:
+            raise ValueError(f"Unknown translation memory categories: {', '.join(sorted(unknown))}")
+        active = (set(DEFAULT_CATEGORIES) | enabled) - disabled
+        self.whitespace = 'whitespace' in active
+        self.punctuation = 'punctuation' in active
+        self.digits = 'digits' in active
+        self.inputs = 0
+        self.templates = 0
+        self.saved_chars = 0
+        self._lock = threading.Lock()
+
+    def normalize(self, text: str) -> Tuple[str, str, str]:
+        """Split ``text`` into ``(prefix, template, suffix)``."""
+        prefix = suffix = ''
+        body = text
+        if self.whitespace:
+            stripped = body.lstrip()
+            prefix = body[:len(body) - len(stripped)]
+            body = stripped.rstrip()
+            suffix = stripped[len(body):]
+            body = _INNER_SPACE.sub(' ', body)
+        if self.punctuation:
+            match = _TRAILING_PUNCT.search(body)
+            if match and match.start():
+                suffix = match.group() + suffix
+                body = body[:match.start()]
+        if self.digits:
+            match = _TRAILING_NUMBER.search(body)
+            if match and any(c.isalpha() for c in body[:match.start()]):
+                suffix = match.group() + suffix
+                body = body[:match.start()]
+        return prefix, body, suffix
+
+    @property
+    def hit_rate(self) -> float:
+        return 1 - self.templates / self.inputs if self.inputs else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Translation memory: {self.inputs} strings matched {self.templates} templates "
+            f"({self.hit_rate:.1%} hit rate, {self.saved_chars} characters saved)"
+        )
+
+    def translate(
+        self,
+        translator: DeepLTranslator,
+        texts: Iterable[str],
+        source: str,
+        target: str,
+        progress: Optional[BatchCallback] = None,
+        cancel: Optional[threading.Event] = None,
+        failed: Optional[Set[str]] = None,
+    ) -> List[str]:
+        """Translate ``texts`` through their templates; see ``DeepLTranslator.translate``."""
+        texts = list(texts)
+        parts: Dict[str, Tuple[str, str, str]] = {}
+        templates: Dict[str, int] = {}
+        for text in texts:
+            if text not in parts:
+                parts[text] = split = self.normalize(text)
+                if split[1]:
+                    templates.setdefault(split[1], len(templates))
+        missed: Set[str] = set()
+        translated = translator.translate(
+            list(templates), source, target, progress=progress, cancel=cancel, failed=missed,
+        )
+        if missed and failed is not None:
+            failed.update(text for text, (_, template, _) in parts.items() if template in missed)
+        # Only templates shared by several strings save anything.
+        variants: Dict[str, List[int]] = {}
+        for text, (_, template, _) in parts.items():
+            if template:
+                variants.setdefault(template, []).append(len(text))
+        saved = sum(sum(sizes) - len(template) for template, sizes in variants.items() if len(sizes) > 1)
+        with self._lock:
+            self.inputs += len(parts)
+            self.templates += len(templates)
+            self.saved_chars += saved
+        results = []
+        for text in texts:
+            prefix, template, suffix = parts[text]
+            body = translated[templates[template]] if template else ''
+            results.append(prefix + body + suffix)
+        return results
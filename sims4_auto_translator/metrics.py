@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Sequence
+
+# Default histogram bucket upper bounds, in seconds.
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Percentiles are taken over the most recent samples only, so a long-lived
+# daemon's histograms stay a fixed size.
+SAMPLE_WINDOW = 10000
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Histogram:
+    __slots__ = ('bounds', 'counts', 'count', 'total', 'max', 'recent')
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = float('-inf')
+        self.recent: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+
+    def add(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.recent)
+
+        def pct(p: float) -> float:
+            return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+        buckets = {f'le_{bound:g}': n for bound, n in zip(self.bounds, self.counts)}
+        buckets['inf'] = self.counts[-1]
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'p50': pct(50),
+            'p90': pct(90),
+            'p99': pct(99),
+            'max': self.max,
+            'buckets': buckets,
+        }
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics: 'Metrics', name: str) -> None:
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc: object) -> None:
+        self.metrics.add_time(self.name, time.perf_counter() - self.start)
+
+
+class Metrics:
+    """Process-wide counters, stage timers and latency samples.
+
+    Disabled by default: every recording call then returns after a single
+    attribute check, and :meth:`timed` hands out a shared no-op context, so
+    instrumented code pays (almost) nothing.  Names are dotted,
+    ``<module>.<what>``.  Work done in process-pool workers is not seen.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = {}
+        self.timers: Dict[str, List[float]] = {}
+        self.histograms: Dict[str, _Histogram] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.timers.clear()
+            self.histograms.clear()
+
+    def count(self, name: str, value: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_time(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = [1, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+
+    def timed(self, name: str) -> Any:
+        """Context manager adding its wall time to timer ``name``."""
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        """Record one sample (e.g. a request latency) for histogram ``name``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = _Histogram(buckets)
+            histogram.add(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            timers = {name: {'count': int(n), 'seconds': total} for name, (n, total) in self.timers.items()}
+            histograms = {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+        return {
+            'counters': dict(sorted(counters.items())),
+            'timers': dict(sorted(timers.items())),
+            'histograms': histograms,
+        }
+
+    def write_json(self, path: Path, **extra: Any) -> None:
+        """Write :meth:`snapshot`, plus ``extra`` top-level fields, to ``path``."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({**extra, **self.snapshot()}, indent=2), encoding='utf-8')
+
+
+metrics = Metrics()
@@ -1,19 +1,174 @@
 from __future__ import annotations
 
-import tempfile
-import zipfile
+import os
 from pathlib import Path
-from typing import Iterable, Tuple
+from typing import Dict, Iterable, Optional, Set, Tuple, Union
 
-from .parsers import write_strings_file
+from .dbpf import DELETED, STBL_TYPE_ID, DBPFPackage, DBPFWriter, StringTable, fnv64, write_package
+from .metrics import metrics
+from .parsers import parse_strings_file
 from .utils import console
 
+STBL_GROUP = 0x00000000
+# Instance bits that identify a table regardless of its locale byte.
+INSTANCE_MASK = 0x00FFFFFFFFFFFFFF
 
-def pack_strings_to_package(strings: Iterable[Tuple[str, str]], output_path: Path) -> None:
-    """Write strings to a simple .package (ZIP based) archive."""
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with tempfile.TemporaryDirectory() as tmp:
-        tmp_path = Path(tmp) / "language.strings"
-        write_strings_file(strings, tmp_path)
-        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zf:
-            zf.write(tmp_path, arcname="language.strings")
+# Locale byte (bits 56-63 of an STBL instance) for DeepL target languages.
+# Languages the game doesn't ship replace English (0x00), as translation
+# mods for them do.
+LOCALE_CODES = {
+    'EN': 0x00, 'EN-GB': 0x00, 'EN-US': 0x00,
+    'ZH': 0x01, 'ZH-HANS': 0x01,
+    'ZH-HANT': 0x02,
+    'CS': 0x03,
+    'DA': 0x04,
+    'NL': 0x05,
+    'FI': 0x06,
+    'FR': 0x07,
+    'DE': 0x08,
+    'IT': 0x0B,
+    'JA': 0x0C,
+    'KO': 0x0D,
+    'NB': 0x0E,
+    'PL': 0x0F,
+    'PT': 0x11, 'PT-BR': 0x11, 'PT-PT': 0x11,
+    'RU': 0x12,
+    'ES': 0x13, 'ES-419': 0x13,
+    'SV': 0x15,
+}
+
+
+_warned_fallbacks: Set[str] = set()
+
+
+def locale_code(lang: str) -> int:
+    lang = lang.upper()
+    code = LOCALE_CODES.get(lang)
+    if code is None:
+        code = 0x00
+        if lang not in _warned_fallbacks:
+            _warned_fallbacks.add(lang)
+            console.print(f"[yellow]The game has no {lang} locale; its tables replace the English (0x00) slot[/yellow]")
+    return code
+
+
+def locale_of(instance: int) -> int:
+    return instance >> 56
+
+
+def with_locale(instance: int, locale: int) -> int:
+    """Replace the locale byte of an STBL instance ID."""
+    return (locale << 56) | (instance & INSTANCE_MASK)
+
+
+def stbl_instance(name: str, locale: int = 0) -> int:
+    """Build an STBL instance ID from a name hash and a locale code."""
+    return with_locale(fnv64(name), locale)
+
+
+def pack_tables(
+    tables: Iterable[Tuple[int, Union[StringTable, bytes]]],
+    output_path: Path,
+    compress: bool = False,
+    workers: Optional[int] = None,
+) -> int:
+    """Write ``(instance, table)`` pairs as STBL resources of a DBPF package."""
+    resources = (
+        (STBL_TYPE_ID, STBL_GROUP, instance, table.to_bytes() if isinstance(table, StringTable) else table)
+        for instance, table in tables
+    )
+    with metrics.timed('packer.pack'):
+        return len(write_package(output_path, resources, compress=compress, workers=workers))
+
+
+def pack_strings_to_package(
+    strings: Iterable[Tuple[str, str]],
+    output_path: Path,
+    instance: Optional[int] = None,
+    compress: bool = False,
+) -> None:
+    """Write strings to a DBPF package as a single STBL resource."""
+    if instance is None:
+        instance = stbl_instance(output_path.stem)
+    pack_tables([(instance, StringTable.from_entries(strings))], output_path, compress=compress)
+
+
+def pack_strings_files(
+    infile: Path,
+    output_path: Path,
+    compress: bool = False,
+    workers: Optional[int] = None,
+) -> int:
+    """Pack a ``.strings`` file, or every one below a folder, one STBL per file."""
+    files = sorted(infile.rglob('*.strings')) if infile.is_dir() else [infile]
+    tables = (
+        (stbl_instance(fp.stem), StringTable.from_entries(parse_strings_file(fp)))
+        for fp in files
+    )
+    return pack_tables(tables, output_path, compress=compress, workers=workers)
+
+
+def patch_package(
+    source: Path,
+    output_path: Path,
+    tables: Dict[int, Union[StringTable, bytes]],
+    locale: int,
+    compress: bool = False,
+) -> int:
+    """Write a copy of ``source`` with its STBL resources replaced.
+
+    ``tables`` maps source STBL instances to their translations, which are
+    stored under the instance with ``locale`` as its locale byte.  Every
+    other resource (and any STBL without a translation) is copied by byte
+    range and keeps its compression; the index is rewritten to match.
+    An STBL already stored under a replacement's instance (an older
+    translation shipped in the package) is dropped.  Returns the number of
+    tables replaced.
+    """
+    output_path = Path(output_path)
+    if output_path.exists() and os.path.samefile(source, output_path):
+        raise ValueError(f"Refusing to patch {source} in place; choose another output folder")
+    superseded = {with_locale(instance, locale) for instance in tables if locale_of(instance) != locale}
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    replaced = 0
+    try:
+        with metrics.timed('packer.patch'), DBPFPackage(source) as package, DBPFWriter(tmp_path) as writer:
+            for entry in package.entries:
+                translatable = entry.type_id == STBL_TYPE_ID and entry.compression != DELETED
+                if translatable and entry.instance in superseded:
+                    continue
+                table = tables.get(entry.instance) if translatable else None
+                if table is None:
+                    writer.add_copy(package, entry)
+                    continue
+                data = table.to_bytes() if isinstance(table, StringTable) else table
+                writer.add(STBL_TYPE_ID, entry.group, with_locale(entry.instance, locale), data, compress=compress)
+                replaced += 1
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    metrics.count('packer.tables_replaced', replaced)
+    return replaced
+
+
+def patch_package_from_dumps(
+    source: Path,
+    dump_base: Path,
+    output_path: Path,
+    locale: int,
+    tables: Optional[Dict[int, Union[StringTable, bytes]]] = None,
+    compress: bool = False,
+) -> int:
+    """Patch ``source`` with translated ``<dump_base>_<instance>.strings`` files.
+
+    Tables already in ``tables`` take precedence over dumps on disk.
+    """
+    tables = dict(tables or {})
+    with DBPFPackage(source) as package:
+        instances = [entry.instance for entry in package.iter_entries(STBL_TYPE_ID)]
+    for instance in instances:
+        dump = dump_base.with_name(f"{dump_base.name}_{instance:08X}.strings")
+        if instance not in tables and dump.exists():
+            tables[instance] = StringTable.from_entries(parse_strings_file(dump))
+    return patch_package(source, output_path, tables, locale, compress=compress)
@@ -1,44 +1,163 @@
 from __future__ import annotations
 
+import os
 import re
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
-PLACEHOLDER_PATTERN = re.compile(r"\{[^\}]+\}|<[^>]+>")
+from .metrics import metrics
 
+READ_BLOCK_SIZE = 1 << 20
+WRITE_BATCH_SIZE = 4096
+
+# Game tokens kept out of machine translation: {0.SimFirstName}, gendered
+# {M0.he}{F0.she} pairs, markup such as <i>/</i>, and line breaks (both the
+# escaped \n form used in .strings dumps and real newlines).
+PLACEHOLDER_PATTERN = re.compile(r"\{[^\}]+\}|<[^>]+>|\\n|\r?\n")
+SENTINEL_PATTERN = re.compile(r"§§PLH_\d{3,}§§")
+# Capturing variants: split() then returns text and tokens interleaved.
+_PLACEHOLDER_SPLIT = re.compile(f"({PLACEHOLDER_PATTERN.pattern})")
+_SENTINEL_SPLIT = re.compile(f"({SENTINEL_PATTERN.pattern})")
+# Below this many placeholders, C-level str.replace beats a regex pass.
+_SINGLE_PASS_MIN = 16
+
+_SENTINELS = [f"§§PLH_{i:03d}§§" for i in range(100)]
 
-def mask_placeholders(text: str) -> Tuple[str, Dict[str, str]]:
-    mapping: Dict[str, str] = {}
 
-    def repl(match: re.Match[str]) -> str:
-        placeholder = match.group(0)
-        key = f"§§PLH_{len(mapping):03d}§§"
-        mapping[key] = placeholder
-        return key
+def _sentinels(count: int) -> List[str]:
+    while len(_SENTINELS) < count:
+        _SENTINELS.append(f"§§PLH_{len(_SENTINELS):03d}§§")
+    return _SENTINELS
 
-    masked = PLACEHOLDER_PATTERN.sub(repl, text)
-    return masked, mapping
+
+def mask_placeholders(text: str) -> Tuple[str, Dict[str, str]]:
+    parts = _PLACEHOLDER_SPLIT.split(text)
+    if len(parts) == 1:
+        return text, {}
+    tokens = parts[1::2]
+    sentinels = _sentinels(len(tokens))[:len(tokens)]
+    parts[1::2] = sentinels
+    return ''.join(parts), dict(zip(sentinels, tokens))
 
 
 def unmask_placeholders(text: str, mapping: Dict[str, str]) -> str:
-    for key, value in mapping.items():
-        text = text.replace(key, value)
-    return text
+    if len(mapping) < _SINGLE_PASS_MIN:
+        for key, value in mapping.items():
+            text = text.replace(key, value)
+        return text
+    # One pass over the text with a dict lookup per sentinel.
+    parts = _SENTINEL_SPLIT.split(text)
+    get = mapping.get
+    parts[1::2] = [get(token, token) for token in parts[1::2]]
+    return ''.join(parts)
 
 
-def parse_strings_file(path: Path) -> List[Tuple[str, str]]:
-    entries = []
-    with path.open('r', encoding='utf-8') as f:
-        for line in f:
-            if not line.strip():
+def mask_many(texts: Iterable[str]) -> Tuple[List[str], List[Dict[str, str]]]:
+    """Mask a whole list of strings; see :func:`mask_placeholders`."""
+    masked: List[str] = []
+    maps: List[Dict[str, str]] = []
+    with metrics.timed('parsers.mask'):
+        for text in texts:
+            m, mp = mask_placeholders(text)
+            masked.append(m)
+            maps.append(mp)
+    metrics.count('parsers.strings_masked', len(masked))
+    return masked, maps
+
+
+def unmask_many(texts: Iterable[str], maps: Sequence[Dict[str, str]]) -> List[str]:
+    """Restore placeholders in a list of strings masked by :func:`mask_many`."""
+    with metrics.timed('parsers.unmask'):
+        return [unmask_placeholders(text, mapping) for text, mapping in zip(texts, maps)]
+
+
+def _parse_lines(text: str) -> Iterator[Tuple[str, str]]:
+    if '\r' in text:
+        # Match text-mode universal newlines.
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    for line in text.split('\n'):
+        if not line.strip():
+            continue
+        key, _, value = line.partition('=')
+        yield key.strip(), value.strip()
+
+
+def iter_strings_file(path: Path) -> Iterator[Tuple[str, str]]:
+    """Yield ``(key, value)`` entries of a ``.strings`` file.
+
+    The file is read as bytes in large blocks which are split and decoded in
+    bulk, so memory stays bounded by the block size.
+    """
+    with path.open('rb') as f:
+        tail = b''
+        while True:
+            block = f.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            metrics.count('parsers.bytes_read', len(block))
+            if tail:
+                block = tail + block
+            cut = block.rfind(b'\n')
+            if cut < 0:
+                tail = block
                 continue
-            key, _, value = line.partition('=')
-            entries.append((key.strip(), value.strip()))
-    return entries
+            tail = block[cut + 1:]
+            yield from _parse_lines(block[:cut].decode('utf-8'))
+        if tail:
+            yield from _parse_lines(tail.decode('utf-8'))
+
+
+def parse_strings_file(path: Path) -> List[Tuple[str, str]]:
+    return list(iter_strings_file(path))
+
 
+def write_strings_file(entries: Iterable[Tuple[str, str]], path: Path, fsync: bool = False) -> None:
+    """Write entries from any iterable, replacing ``path`` atomically.
 
-def write_strings_file(entries: Iterable[Tuple[str, str]], path: Path) -> None:
+    With ``fsync`` the data is on disk before the file is renamed into place.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open('w', encoding='utf-8') as f:
-        for key, value in entries:
-            f.write(f"{key} = {value}\n")
+    tmp_path = path.with_name(path.name + '.tmp')
+    entries = iter(entries)
+    with tmp_path.open('w', encoding='utf-8') as f:
+        while True:
+            chunk = list(islice(entries, WRITE_BATCH_SIZE))
+            if not chunk:
+                break
+            f.write(''.join([f"{key} = {value}\n" for key, value in chunk]))
+            metrics.count('parsers.strings_written', len(chunk))
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_strings_files(rows: Iterable[Tuple[str, Sequence[str]]], paths: Sequence[Path], fsync: bool = False) -> None:
+    """Write ``(key, [value per path])`` rows to several files in one pass.
+
+    Each file is replaced atomically, as with :func:`write_strings_file`.
+    """
+    tmp_paths = []
+    for path in paths:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_paths.append(path.with_name(path.name + '.tmp'))
+    files = [tmp_path.open('w', encoding='utf-8') for tmp_path in tmp_paths]
+    try:
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, WRITE_BATCH_SIZE))
+            if not chunk:
+                break
+            for i, f in enumerate(files):
+                f.write(''.join([f"{key} = {values[i]}\n" for key, values in chunk]))
+            metrics.count('parsers.strings_written', len(chunk) * len(files))
+        if fsync:
+            for f in files:
+                f.flush()
+                os.fsync(f.fileno())
+    finally:
+        for f in files:
+            f.close()
+    for tmp_path, path in zip(tmp_paths, paths):
+        os.replace(tmp_path, path)
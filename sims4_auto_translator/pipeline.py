@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Sequence
+
+from .metrics import metrics
+
+# Items allowed to wait between two stages before the upstream one blocks.
+DEFAULT_QUEUE_SIZE = 2
+_POLL = 0.1
+_DONE = object()
+
+
+class Stage(NamedTuple):
+    """One step of a :func:`run_pipeline`: ``fn`` on ``workers`` threads."""
+
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+
+
+class _Failure(NamedTuple):
+    error: BaseException
+
+
+def _put(q: 'queue.Queue[Any]', item: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: 'queue.Queue[Any]', stop: threading.Event) -> Any:
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def run_pipeline(
+    items: Iterable[Any],
+    stages: Sequence[Stage],
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+) -> Iterator[Any]:
+    """Pass ``items`` through ``stages`` concurrently, yielding results in input order.
+
+    Items are pulled from ``items`` on a feeder thread and every stage runs
+    on its own worker threads, connected by queues of ``queue_size``; so
+    while one item is in the slowest stage the next is being prepared and
+    the previous one consumed.  The number of items in flight is capped,
+    which bounds memory (including the reorder buffer) and makes a slow
+    consumer hold back the whole pipeline.  The first exception raised by
+    ``items`` or a stage is re-raised here; closing the iterator early stops
+    the threads once their current item is done.
+    """
+    stages = list(stages)
+    queues: List['queue.Queue[Any]'] = [queue.Queue(queue_size) for _ in stages]
+    results: 'queue.Queue[Any]' = queue.Queue()
+    stop = threading.Event()
+    in_flight = threading.Semaphore(sum(stage.workers for stage in stages) + queue_size * (len(stages) + 1))
+    remaining = [stage.workers for stage in stages]
+    lock = threading.Lock()
+
+    def feed() -> None:
+        try:
+            for seq, item in enumerate(items):
+                while not in_flight.acquire(timeout=_POLL):
+                    if stop.is_set():
+                        return
+                if not _put(queues[0], (seq, item), stop):
+                    return
+        except BaseException as e:
+            results.put(_Failure(e))
+            stop.set()
+            return
+        for _ in range(stages[0].workers):
+            _put(queues[0], _DONE, stop)
+
+    def work(index: int) -> None:
+        stage = stages[index]
+        inbox = queues[index]
+        last = index == len(stages) - 1
+        outbox = results if last else queues[index + 1]
+        timer = f'pipeline.{stage.name}'
+        while True:
+            task = _get(inbox, stop)
+            if task is _DONE:
+                break
+            seq, item = task
+            try:
+                with metrics.timed(timer):
+                    item = stage.fn(item)
+            except BaseException as e:
+                results.put(_Failure(e))
+                stop.set()
+                return
+            if not _put(outbox, (seq, item), stop):
+                return
+        with lock:
+            remaining[index] -= 1
+            finished = not remaining[index]
+        if finished:
+            # The last worker of a stage tells every worker downstream.
+            for _ in range(1 if last else stages[index + 1].workers):
+                _put(outbox, _DONE, stop)
+
+    threads = [threading.Thread(target=feed, name='pipeline-feed', daemon=True)]
+    for index, stage in enumerate(stages):
+        threads.extend(
+            threading.Thread(target=work, args=(index,), name=f'pipeline-{stage.name}-{n}', daemon=True)
+            for n in range(stage.workers)
+        )
+    for thread in threads:
+        thread.start()
+    pending: Dict[int, Any] = {}
+    expected = 0
+    try:
+        while True:
+            result = results.get()
+            if result is _DONE:
+                break
+            if isinstance(result, _Failure):
+                raise result.error
+            seq, value = result
+            pending[seq] = value
+            while expected in pending:
+                value = pending.pop(expected)
+                expected += 1
+                in_flight.release()
+                yield value
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from .dbpf import STBL_TYPE_ID, DBPFEntry, DBPFPackage
+
+INDEX_CACHE_PATH = Path('package_index.bin')
+_MAGIC = b'S4PI'
+_VERSION = 2
+_FILE_HEADER = struct.Struct('<4sHI')
+# path length, size, mtime_ns, inode, DBPF major/minor, index major/minor,
+# index offset, resource count, STBL entry count
+_RECORD = struct.Struct('<HQqQIIIIIII')
+_ENTRY = struct.Struct('<IIQIIIH')
+
+
+class PackageInfo(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    inode: int
+    major: int
+    minor: int
+    index_major: int
+    index_minor: int
+    index_offset: int
+    count: int
+    stbl: List[DBPFEntry]
+
+
+def _stamp(st: os.stat_result) -> tuple:
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+class PackageIndex:
+    """Sidecar cache of package headers and STBL index entries.
+
+    Records are keyed by absolute path and validated against size, mtime and
+    inode, so unchanged packages are answered from a single ``stat`` without
+    being opened.  The cache is one compact binary file, rewritten
+    atomically by :meth:`save` when something changed.
+    """
+
+    def __init__(self, path: Path = INDEX_CACHE_PATH) -> None:
+        self.path = Path(path)
+        self._records: Dict[str, PackageInfo] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        try:
+            self._load(self.path.read_bytes())
+        except (OSError, ValueError, struct.error):
+            # Missing, stale or corrupt: start over.
+            self._records = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _load(self, data: bytes) -> None:
+        magic, version, count = _FILE_HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError('Unknown package index format')
+        view = memoryview(data)
+        pos = _FILE_HEADER.size
+        for _ in range(count):
+            path_len, *fields, stbl_count = _RECORD.unpack_from(view, pos)
+            pos += _RECORD.size
+            path = bytes(view[pos:pos + path_len]).decode('utf-8')
+            pos += path_len
+            end = pos + stbl_count * _ENTRY.size
+            if end > len(view):
+                raise ValueError('Truncated package index')
+            stbl = [DBPFEntry(*values) for values in _ENTRY.iter_unpack(view[pos:end])]
+            pos = end
+            self._records[path] = PackageInfo(path, *fields, stbl)
+
+    def lookup(self, package: Path, st: Optional[os.stat_result] = None) -> PackageInfo:
+        """Header and STBL entries of ``package``, parsing it only if it changed."""
+        key = os.path.abspath(package)
+        st = st or os.stat(key)
+        info = self._records.get(key)
+        if info is not None and (info.size, info.mtime_ns, info.inode) == _stamp(st):
+            self.hits += 1
+            return info
+        self.misses += 1
+        with DBPFPackage(Path(key)) as pkg:
+            info = PackageInfo(
+                key, *_stamp(st), pkg.major, pkg.minor, pkg.index_major, pkg.index_minor,
+                pkg.index_offset, len(pkg), list(pkg.iter_entries(STBL_TYPE_ID)),
+            )
+        self._records[key] = info
+        self._dirty = True
+        return info
+
+    def stbl_entries(self, package: Path, st: Optional[os.stat_result] = None) -> List[DBPFEntry]:
+        return self.lookup(package, st).stbl
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        parts: List[bytes] = [_FILE_HEADER.pack(_MAGIC, _VERSION, len(self._records))]
+        for info in self._records.values():
+            path = info.path.encode('utf-8')
+            parts.append(_RECORD.pack(len(path), *info[1:-1], len(info.stbl)))
+            parts.append(path)
+            parts.extend(_ENTRY.pack(*entry) for entry in info.stbl)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        tmp_path.write_bytes(b''.join(parts))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
@@ -0,0 +1,609 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from contextlib import closing
+from itertools import accumulate, islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+from .dbpf import STBL_TYPE_ID, DBPFEntry, DBPFPackage, StringTable, decode_resource, key_hash
+from .deepl_api import BatchCallback, DeepLTranslator
+from .journal import Journal
+from .manifest import Manifest, ManifestGroup, content_hash
+from .memory import TranslationMemory
+from .metrics import metrics
+from .packer import locale_code, locale_of, pack_strings_to_package, patch_package_from_dumps, with_locale
+from .parsers import (
+    iter_strings_file, mask_many, parse_strings_file, unmask_many, unmask_placeholders, write_strings_file,
+    write_strings_files,
+)
+from .pipeline import Stage, run_pipeline
+from .pkgindex import PackageIndex
+from .utils import console
+
+ProgressCallback = Callable[[int, int], None]
+STREAM_BATCH_SIZE = 5000
+# Unique strings per translation step of a folder run.  Outputs are written
+# as soon as every string they use is translated, overlapping with the next
+# chunks; two chunks are in flight so the tail of one hides behind the next.
+CHUNK_SIZE = 1000
+TRANSLATE_WORKERS = 2
+
+
+class Source(NamedTuple):
+    """One translatable table: a ``.strings`` file or an STBL instance."""
+
+    path: Path
+    instance: Optional[int]
+    keys: List[str]
+    texts: List[str]
+    digest: str = ''
+
+    @property
+    def table_id(self) -> str:
+        return '' if self.instance is None else f"{self.instance:016X}"
+
+    def output_path(self, folder: Path, output_root: Path) -> Path:
+        rel = self.path.relative_to(folder)
+        if self.instance is None:
+            return output_root / rel
+        return output_root / rel.with_name(f"{rel.stem}_{self.instance:08X}.strings")
+
+
+def _decode_stbl(task: Tuple[str, DBPFEntry]) -> StringTable:
+    """Process-pool worker: read and decode one STBL resource."""
+    path, entry = task
+    with open(path, 'rb') as f:
+        f.seek(entry.offset)
+        return StringTable.parse(decode_resource(f.read(entry.size), entry.compression, entry.mem_size))
+
+
+def _scan_packages(
+    folder: Path, manifest: Optional[Union[Manifest, ManifestGroup]], workers: int, chunksize: int,
+    index: Optional[PackageIndex], digests: bool,
+) -> Iterator[Source]:
+    # The index walk and change detection stay in this process; only the
+    # CPU-bound STBL decoding is farmed out.
+    pending: List[Tuple[Path, str, DBPFEntry]] = []
+    for pkg in sorted(folder.rglob('Strings_*.package')):
+        rel = pkg.relative_to(folder).as_posix()
+        st = pkg.stat()
+        if manifest is not None and manifest.unchanged_file(rel, st):
+            continue
+        entries = index.stbl_entries(pkg, st) if index is not None else None
+        if entries is not None and manifest is None and not digests and workers > 1:
+            # Nothing to hash here, so the package needn't be opened at all.
+            pending.extend((pkg, '', entry) for entry in entries)
+            continue
+        with DBPFPackage(pkg, entries=entries) as package:
+            for entry in package.iter_entries(STBL_TYPE_ID):
+                digest = ''
+                with package.read(entry) as view:
+                    metrics.count('dbpf.bytes_read', entry.size)
+                    if manifest is not None or digests:
+                        digest = content_hash(view)
+                        if manifest is not None and manifest.unchanged_table(rel, f"{entry.instance:016X}", digest):
+                            continue
+                    if workers <= 1:
+                        with metrics.timed('stbl.decode'):
+                            table = StringTable.parse(decode_resource(view, entry.compression, entry.mem_size))
+                if workers <= 1:
+                    yield Source(pkg, entry.instance, table.hex_keys(), table.texts(), digest)
+                else:
+                    pending.append((pkg, digest, entry))
+    if index is not None:
+        index.save()
+    if not pending:
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = [(str(pkg), entry) for pkg, _, entry in pending]
+        # map() yields in submission order, so output doesn't depend on
+        # which worker finishes first.
+        tables = pool.map(_decode_stbl, tasks, chunksize=chunksize)
+        for (pkg, digest, entry), table in zip(pending, tables):
+            # Decoded in a worker process, whose own metrics are lost.
+            metrics.count('dbpf.bytes_read', entry.size)
+            metrics.count('stbl.strings_parsed', len(table))
+            yield Source(pkg, entry.instance, table.hex_keys(), table.texts(), digest)
+
+
+def scan_folder(
+    folder: Path,
+    manifest: Optional[Union[Manifest, ManifestGroup]] = None,
+    workers: int = 1,
+    chunksize: int = 4,
+    index: Optional[PackageIndex] = None,
+    digests: bool = False,
+) -> Iterator[Source]:
+    """Yield translatable sources below ``folder``.
+
+    With a ``manifest``, files and STBL instances whose content matches the
+    previous run (and whose output still exists) are skipped.  Sources carry
+    a content digest when there is a manifest or ``digests`` is set.  With
+    ``workers`` > 1, STBL resources are decoded on a process pool in chunks
+    of ``chunksize`` resources.  With an ``index``, STBL entries of
+    unchanged packages come from the package index cache.
+    """
+    for fp in sorted(folder.rglob('*.strings')):
+        digest = ''
+        if manifest is not None:
+            rel = fp.relative_to(folder).as_posix()
+            if manifest.unchanged_file(rel, fp.stat()):
+                continue
+            digest = content_hash(fp.read_bytes())
+            if manifest.unchanged_table(rel, '', digest):
+                continue
+        elif digests:
+            digest = content_hash(fp.read_bytes())
+        entries = parse_strings_file(fp)
+        yield Source(fp, None, [k for k, _ in entries], [t for _, t in entries], digest)
+    yield from _scan_packages(folder, manifest, workers, chunksize, index, digests)
+
+
+class ExistingTranslations:
+    """Target-language tables that already exist for the sources of a run.
+
+    For an STBL source these are the table with the same instance and the
+    target's locale byte in the source package, overlaid by the output file
+    of an earlier run; for a ``.strings`` source, just the output file.
+    Tables are indexed by key hash, so keys match whatever their spelling.
+    """
+
+    def __init__(self, folder: Path, output_root: Path, source_lang: str, target_lang: str) -> None:
+        self.folder = folder
+        self.output_root = output_root
+        self.source_locale = locale_code(source_lang)
+        self.locale = locale_code(target_lang)
+        self.kept = 0
+        # Sources arrive grouped by package, so one open package is enough.
+        self._package: Optional[DBPFPackage] = None
+        self._stbl: Dict[int, DBPFEntry] = {}
+
+    def is_translation(self, source: Source) -> bool:
+        """Whether ``source`` is itself an existing target-language table."""
+        return (
+            source.instance is not None
+            and self.locale != self.source_locale
+            and locale_of(source.instance) == self.locale
+        )
+
+    def _package_table(self, path: Path, instance: int) -> Dict[int, str]:
+        if self._package is None or self._package.path != path:
+            self.close()
+            self._package = DBPFPackage(path)
+            self._stbl = {entry.instance: entry for entry in self._package.iter_entries(STBL_TYPE_ID)}
+        entry = self._stbl.get(with_locale(instance, self.locale))
+        if entry is None or entry.instance == instance:
+            return {}
+        with self._package.read_resource(entry) as view:
+            table = StringTable.parse(view)
+        return dict(zip(table.keys, table.texts()))
+
+    def close(self) -> None:
+        if self._package is not None:
+            self._package.close()
+            self._package = None
+
+    def lookup(self, source: Source) -> Dict[int, str]:
+        """Existing translations of ``source``, keyed by key hash."""
+        existing: Dict[int, str] = {}
+        if source.instance is not None:
+            existing.update(self._package_table(source.path, source.instance))
+        out_path = source.output_path(self.folder, self.output_root)
+        if out_path.exists():
+            existing.update((key_hash(key), text) for key, text in parse_strings_file(out_path))
+        return existing
+
+    def known(self, source: Source) -> Dict[int, str]:
+        """Entry indexes of ``source`` that are already translated.
+
+        Entries missing from the existing table, or still identical to the
+        source text, are left out so they get translated.
+        """
+        existing = self.lookup(source)
+        if not existing:
+            return {}
+        known = {}
+        for i, (key, text) in enumerate(zip(source.keys, source.texts)):
+            translated = existing.get(key_hash(key))
+            if translated is not None and translated != text:
+                known[i] = translated
+        self.kept += len(known)
+        return known
+
+
+class TranslationPlan:
+    """Deduplicates masked strings across every source of a run.
+
+    Each unique masked string is translated once; results are fanned back
+    out to every source that uses it.
+    """
+
+    def __init__(self) -> None:
+        self.sources: List[Source] = []
+        self._unique: Dict[str, int] = {}
+        self._refs: List[List[int]] = []
+        self._maps: List[List[Dict[str, str]]] = []
+        self._known: List[Dict[int, str]] = []
+        self._translated: List[str] = []
+        # Unique strings whose DeepL batch failed and fell back to the source.
+        self._failed: Set[int] = set()
+        self.total = 0
+
+    @property
+    def unique(self) -> int:
+        return len(self._unique)
+
+    def add(
+        self,
+        source: Source,
+        known: Optional[Dict[int, str]] = None,
+        masked: Optional[Tuple[List[str], List[Dict[str, str]]]] = None,
+    ) -> None:
+        """Add a source; ``known`` maps entry indexes to existing translations.
+
+        ``masked`` is the result of ``mask_many(source.texts)`` when the caller
+        already has it (it is shared, not copied).
+        """
+        known = known or {}
+        unique = self._unique
+        masked, maps = masked or mask_many(source.texts)
+        refs = [-1 if i in known else unique.setdefault(m, len(unique)) for i, m in enumerate(masked)]
+        self.sources.append(source)
+        self._refs.append(refs)
+        self._maps.append(maps)
+        self._known.append(known)
+        self.total += len(refs)
+
+    def stream(
+        self,
+        translator: DeepLTranslator,
+        source_lang: str,
+        target_lang: str,
+        progress: Optional[BatchCallback] = None,
+        cancel: Optional[threading.Event] = None,
+        memory: Optional[TranslationMemory] = None,
+        chunk_size: int = CHUNK_SIZE,
+        workers: int = TRANSLATE_WORKERS,
+    ) -> Iterator[Tuple[Source, List[str]]]:
+        """Translate in chunks, yielding ``(source, restored)`` in source order
+        as soon as every string of the source has been translated.
+
+        ``progress`` totals cover the whole plan.
+        """
+        translate = translator.translate if memory is None else partial(memory.translate, translator)
+        unique = list(self._unique)
+        chunks = [unique[i:i + chunk_size] for i in range(0, len(unique), chunk_size)]
+        # Unique strings that must be translated before source i (and every
+        # source before it) can be restored.
+        ready = list(accumulate((max(refs, default=-1) + 1 for refs in self._refs), max))
+        lock = threading.Lock()
+        reports: Dict[int, Tuple[int, int, int]] = {}
+
+        def chunk_progress(index: int) -> Optional[BatchCallback]:
+            if progress is None:
+                return None
+
+            def report(done: int, total: int, cached: int) -> None:
+                with lock:
+                    reports[index] = (done, total, cached)
+                    waiting = sum(len(chunk) for i, chunk in enumerate(chunks) if i not in reports)
+                    done, total, cached = (sum(column) for column in zip(*reports.values()))
+                progress(done, total + waiting, cached)
+            return report
+
+        def translate_chunk(task: Tuple[int, List[str]]) -> Tuple[List[str], List[int]]:
+            index, chunk = task
+            failed: Set[str] = set()
+            texts = translate(
+                chunk, source_lang, target_lang, progress=chunk_progress(index), cancel=cancel, failed=failed,
+            )
+            base = index * chunk_size
+            return texts, [base + i for i, text in enumerate(chunk) if text in failed]
+
+        self._translated = translated = []
+        self._failed = set()
+        next_source = 0
+        results = run_pipeline(enumerate(chunks), [Stage('translate', translate_chunk, workers)])
+        with closing(results):
+            while True:
+                while next_source < len(self.sources) and ready[next_source] <= len(translated):
+                    yield self.sources[next_source], self.restored(next_source)
+                    next_source += 1
+                if next_source == len(self.sources):
+                    return
+                texts, failed = next(results)
+                translated.extend(texts)
+                self._failed.update(failed)
+
+    def complete(self, index: int) -> bool:
+        """Whether every string of source ``index`` was actually translated."""
+        return self._failed.isdisjoint(self._refs[index])
+
+    @property
+    def incomplete(self) -> int:
+        """Sources left with untranslated strings by failed batches."""
+        return sum(not self.complete(i) for i in range(len(self.sources)))
+
+    def restored(self, index: int) -> List[str]:
+        translated = self._translated
+        known = self._known[index]
+        return [
+            known[i] if ref < 0 else unmask_placeholders(translated[ref], mapping)
+            for i, (ref, mapping) in enumerate(zip(self._refs[index], self._maps[index]))
+        ]
+
+    def __iter__(self) -> Iterator[Tuple[Source, List[str]]]:
+        for i, source in enumerate(self.sources):
+            yield source, self.restored(i)
+
+
+def report_memory(memory: TranslationMemory) -> None:
+    console.print(memory.summary())
+
+
+def translate_stream(
+    entries: Iterable[Tuple[str, str]],
+    translator: DeepLTranslator,
+    source_lang: str,
+    target_lang: str,
+    batch_size: int = STREAM_BATCH_SIZE,
+    memory: Optional[TranslationMemory] = None,
+) -> Iterator[Tuple[str, str]]:
+    """Translate ``(key, text)`` entries lazily, ``batch_size`` at a time.
+
+    Only a few batches are held in memory, so arbitrarily large inputs
+    translate in constant memory.
+    """
+    for key, (text,) in translate_stream_targets(entries, translator, source_lang, [target_lang], batch_size, memory):
+        yield key, text
+
+
+def translate_stream_targets(
+    entries: Iterable[Tuple[str, str]],
+    translator: DeepLTranslator,
+    source_lang: str,
+    target_langs: Sequence[str],
+    batch_size: int = STREAM_BATCH_SIZE,
+    memory: Optional[TranslationMemory] = None,
+    workers: int = TRANSLATE_WORKERS,
+) -> Iterator[Tuple[str, List[str]]]:
+    """Like :func:`translate_stream` for several targets at once.
+
+    Batches flow through a pipeline: reading and masking, translation
+    (``workers`` batches at a time, each into every target concurrently)
+    and restoring run on their own threads, so while one batch is with
+    DeepL the next is parsed and the previous one written by the caller.
+    Yields ``(key, [translation per target])`` in input order.
+    """
+    translate = translator.translate if memory is None else partial(memory.translate, translator)
+    entries = iter(entries)
+    chunks = iter(lambda: list(islice(entries, batch_size)), [])
+
+    def mask(chunk: List[Tuple[str, str]]) -> Tuple[List[str], List[str], List[Dict[str, str]]]:
+        masked, maps = mask_many(text for _, text in chunk)
+        return [key for key, _ in chunk], masked, maps
+
+    with ThreadPoolExecutor(max_workers=len(target_langs) * workers) as pool:
+        def translate_batch(batch: Tuple[List[str], List[str], List[Dict[str, str]]]) -> Tuple[List[str], list, list]:
+            keys, masked, maps = batch
+            futures = [pool.submit(translate, masked, source_lang, target) for target in target_langs]
+            return keys, [future.result() for future in futures], maps
+
+        def restore(batch: Tuple[List[str], list, list]) -> List[Tuple[str, List[str]]]:
+            keys, columns, maps = batch
+            columns = [unmask_many(column, maps) for column in columns]
+            return list(zip(keys, map(list, zip(*columns))))
+
+        stages = [Stage('mask', mask), Stage('translate', translate_batch, workers), Stage('restore', restore)]
+        for rows in run_pipeline(chunks, stages):
+            yield from rows
+
+
+def translate_file(
+    infile: Path,
+    out_paths: Sequence[Path],
+    translator: DeepLTranslator,
+    source_lang: str,
+    target_langs: Sequence[str],
+    memory: Optional[TranslationMemory] = None,
+) -> None:
+    """Translate a ``.strings`` file into ``out_paths`` (one per target) in one streaming pass."""
+    rows = translate_stream_targets(iter_strings_file(infile), translator, source_lang, target_langs, memory=memory)
+    write_strings_files(rows, out_paths)
+
+
+def translate_folder(
+    folder: Path,
+    output_root: Path,
+    translator: DeepLTranslator,
+    source_lang: str,
+    target_lang: str,
+    pack: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    incremental: bool = True,
+    workers: int = 1,
+    chunksize: int = 4,
+    on_batch: Optional[BatchCallback] = None,
+    cancel: Optional[threading.Event] = None,
+    memory: Optional[TranslationMemory] = None,
+    journal: Optional[Journal] = None,
+    patch: bool = False,
+    index: Optional[PackageIndex] = None,
+    merge: bool = False,
+) -> TranslationPlan:
+    """Translate every ``.strings`` file and STBL instance below ``folder``.
+
+    When ``incremental`` is set, a manifest in ``output_root`` lets re-runs
+    skip unchanged sources and reuse translations of unchanged strings.
+    ``progress`` reports written outputs, ``on_batch`` translated strings;
+    setting ``cancel`` raises ``TranslationCancelled`` after the batches in
+    flight finish.  With a ``memory``, near-identical strings share one
+    translation.  With a ``journal``, outputs it records as finished are
+    skipped and every new output is fsynced and recorded.  With ``patch``,
+    each package with translated tables is also copied to ``output_root``
+    with its STBLs replaced (see :func:`patch_package`).  With ``merge``,
+    only keys without an existing translation are translated.  ``workers``
+    and ``chunksize`` set the STBL decoding pool (see :func:`scan_folder`).
+    """
+    plans = translate_folder_targets(
+        folder, {target_lang: output_root}, translator, source_lang,
+        pack=pack, progress=progress, incremental=incremental, workers=workers, chunksize=chunksize,
+        on_batch=on_batch, cancel=cancel, memory=memory,
+        journals=None if journal is None else {target_lang: journal}, patch=patch, index=index, merge=merge,
+    )
+    return plans[target_lang]
+
+
+def translate_folder_targets(
+    folder: Path,
+    output_roots: Dict[str, Path],
+    translator: DeepLTranslator,
+    source_lang: str,
+    pack: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    incremental: bool = True,
+    workers: int = 1,
+    chunksize: int = 4,
+    on_batch: Optional[BatchCallback] = None,
+    cancel: Optional[threading.Event] = None,
+    memory: Optional[TranslationMemory] = None,
+    journals: Optional[Dict[str, Journal]] = None,
+    patch: bool = False,
+    index: Optional[PackageIndex] = None,
+    merge: bool = False,
+) -> Dict[str, TranslationPlan]:
+    """Translate ``folder`` into every target language in ``output_roots``.
+
+    Sources are scanned, parsed and masked once and shared by per-target
+    plans, which are then translated concurrently through one translator.
+    Each target keeps its own manifest, journal and cache entries; a source
+    is only skipped by the scan when it is unchanged for every target.
+    Callbacks report totals summed over all targets.  With ``merge``, keys
+    that already have a translation (see :class:`ExistingTranslations`)
+    are kept and only the rest are sent to DeepL.
+    """
+    targets = list(output_roots)
+    manifests = {
+        target: Manifest(root, source_lang, target) for target, root in output_roots.items()
+    } if incremental else {}
+    journals = journals or {}
+    plans = {target: TranslationPlan() for target in targets}
+    group = ManifestGroup(manifests.values()) if manifests else None
+    existing = {
+        target: ExistingTranslations(folder, root, source_lang, target) for target, root in output_roots.items()
+    } if merge else {}
+    resumed = 0
+    start = time.perf_counter()
+    # A journal matches outputs to sources by digest, even without a manifest.
+    sources = scan_folder(folder, group, workers=workers, chunksize=chunksize, index=index, digests=bool(journals))
+    for source in sources:
+        metrics.count('planner.sources')
+        rel = source.path.relative_to(folder).as_posix()
+        masked = None
+        for target in targets:
+            merged = existing.get(target)
+            if merged is not None and merged.is_translation(source):
+                continue
+            manifest = manifests.get(target)
+            if manifest is not None and manifest.unchanged_table(rel, source.table_id, source.digest):
+                continue
+            journal = journals.get(target)
+            if journal is not None:
+                out_path = source.output_path(folder, output_roots[target])
+                if journal.finished(out_path.relative_to(output_roots[target]).as_posix(), source.digest):
+                    if manifest is not None:
+                        manifest.record_table(rel, source.table_id, source.digest, out_path, source.keys, source.texts)
+                    resumed += 1
+                    continue
+            known = merged.known(source) if merged is not None else {}
+            if manifest is not None:
+                known.update(manifest.known_translations(rel, source.table_id, source.keys, source.texts))
+            if masked is None:
+                masked = mask_many(source.texts)
+            plans[target].add(source, known, masked)
+    metrics.add_time('planner.scan', time.perf_counter() - start)
+    for merged in existing.values():
+        merged.close()
+    if resumed:
+        console.print(f"Resuming: {resumed} outputs already written")
+    for target, plan in plans.items():
+        label = f"{target}: " if len(targets) > 1 else ''
+        if target in existing:
+            console.print(f"{label}{existing[target].kept} existing translations kept")
+        console.print(f"{label}{plan.total} strings collapsed into {plan.unique} unique strings to translate")
+
+    lock = threading.Lock()
+    batches: Dict[str, Tuple[int, int, int]] = {}
+    written = [0]
+    total_files = sum(len(plan.sources) for plan in plans.values())
+
+    def batch_progress(target: str) -> Optional[BatchCallback]:
+        if on_batch is None:
+            return None
+
+        def report(done: int, total: int, cached: int) -> None:
+            with lock:
+                batches[target] = (done, total, cached)
+                sums = [sum(column) for column in zip(*batches.values())]
+            on_batch(*sums)
+        return report
+
+    def run(target: str) -> None:
+        plan = plans[target]
+        output_root = output_roots[target]
+        manifest = manifests.get(target)
+        journal = journals.get(target)
+        patched: Dict[Path, Dict[int, StringTable]] = {}
+        translated = plan.stream(
+            translator, source_lang, target, progress=batch_progress(target), cancel=cancel, memory=memory,
+        )
+        for index, (source, restored) in enumerate(translated):
+            complete = plan.complete(index)
+            out_path = source.output_path(folder, output_root)
+            with metrics.timed('planner.write'):
+                write_strings_file(zip(source.keys, restored), out_path, fsync=journal is not None)
+            if pack and source.instance is None:
+                pack_strings_to_package(zip(source.keys, restored), out_path.with_suffix('.package'))
+            if patch and source.instance is not None:
+                patched.setdefault(source.path, {})[source.instance] = StringTable.from_entries(
+                    zip(source.keys, restored)
+                )
+            if journal is not None and complete:
+                journal.record_output(out_path.relative_to(output_root).as_posix(), source.digest)
+            if manifest is not None:
+                rel = source.path.relative_to(folder).as_posix()
+                if complete:
+                    manifest.record_table(rel, source.table_id, source.digest, out_path, source.keys, source.texts)
+                else:
+                    # Not recorded, so the next run translates it again.
+                    manifest.invalidate_file(rel)
+            if progress is not None:
+                with lock:
+                    written[0] += 1
+                    done = written[0]
+                progress(done, total_files)
+        for pkg, tables in patched.items():
+            # Tables skipped as unchanged are taken from their existing dumps.
+            out_pkg = output_root / pkg.relative_to(folder)
+            patch_package_from_dumps(pkg, out_pkg.with_suffix(''), out_pkg, locale_code(target), tables)
+        if manifest is not None:
+            manifest.save()
+        if plan.incomplete:
+            label = f"{target}: " if len(targets) > 1 else ''
+            console.print(
+                f"[yellow]{label}{plan.incomplete} outputs kept source text after failed DeepL requests; "
+                "they will be retried on the next run[/yellow]"
+            )
+
+    if len(targets) == 1:
+        run(targets[0])
+    else:
+        with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+            list(pool.map(run, targets))
+    if memory is not None:
+        report_memory(memory)
+    return plans
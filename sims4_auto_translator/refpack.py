@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import Optional, Union
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+REFPACK_MAGIC = 0xFB
+_FLAG_LARGE = 0x80
+_FLAG_COMPRESSED_SIZE = 0x01
+
+
+def is_refpack(data: Buffer) -> bool:
+    # The flags byte always has 0x10 set; 0x80 and 0x01 select size fields.
+    return len(data) >= 5 and data[1] == REFPACK_MAGIC and data[0] & 0x7E == 0x10
+
+
+def decompressed_size(data: Buffer) -> int:
+    """Uncompressed size declared in a RefPack header."""
+    return _header(data)[1]
+
+
+def _header(data: Buffer) -> tuple:
+    if len(data) < 5 or data[1] != REFPACK_MAGIC:
+        raise ValueError('Not RefPack data')
+    flags = data[0]
+    width = 4 if flags & _FLAG_LARGE else 3
+    pos = 2
+    if flags & _FLAG_COMPRESSED_SIZE:
+        pos += width
+    size = int.from_bytes(bytes(data[pos:pos + width]), 'big')
+    return pos + width, size
+
+
+def decompress(data: Buffer, size: Optional[int] = None) -> bytes:
+    """Decode a RefPack (QFS) stream.
+
+    The output is allocated once at the size from the header, which must
+    match ``size`` (the index's decompressed size) when given.  Literal runs
+    and back-references are copied as memoryview slices; overlapping
+    references are expanded by doubling, so long runs cost a handful of
+    slice copies rather than one step per byte.
+    """
+    src = memoryview(data)
+    pos, declared = _header(src)
+    if size is not None and declared != size:
+        raise ValueError(f'RefPack size {declared} does not match index size {size}')
+    out = bytearray(declared)
+    dst = memoryview(out)
+    end = len(src)
+    o = 0
+    try:
+        while pos < end:
+            b0 = src[pos]
+            if b0 < 0x80:
+                b1 = src[pos + 1]
+                pos += 2
+                literal = b0 & 0x03
+                length = ((b0 & 0x1C) >> 2) + 3
+                offset = ((b0 & 0x60) << 3) + b1 + 1
+            elif b0 < 0xC0:
+                b1 = src[pos + 1]
+                b2 = src[pos + 2]
+                pos += 3
+                literal = b1 >> 6
+                length = (b0 & 0x3F) + 4
+                offset = ((b1 & 0x3F) << 8) + b2 + 1
+            elif b0 < 0xE0:
+                b1 = src[pos + 1]
+                b2 = src[pos + 2]
+                b3 = src[pos + 3]
+                pos += 4
+                literal = b0 & 0x03
+                length = ((b0 & 0x0C) << 6) + b3 + 5
+                offset = ((b0 & 0x10) << 12) + (b1 << 8) + b2 + 1
+            elif b0 < 0xFC:
+                literal = ((b0 & 0x1F) << 2) + 4
+                pos += 1
+                if pos + literal > end:
+                    raise ValueError('Truncated RefPack data')
+                dst[o:o + literal] = src[pos:pos + literal]
+                o += literal
+                pos += literal
+                continue
+            else:
+                literal = b0 & 0x03
+                pos += 1
+                dst[o:o + literal] = src[pos:pos + literal]
+                o += literal
+                break
+            if literal:
+                dst[o:o + literal] = src[pos:pos + literal]
+                o += literal
+                pos += literal
+            start = o - offset
+            if start < 0 or o + length > declared:
+                raise ValueError('Corrupt RefPack back-reference')
+            if offset >= length:
+                dst[o:o + length] = dst[start:start + length]
+                o += length
+            else:
+                # Overlapping copy: repeat the period, doubling each pass.
+                while length:
+                    n = min(length, o - start)
+                    dst[o:o + n] = dst[start:start + n]
+                    o += n
+                    length -= n
+    except IndexError as e:
+        raise ValueError('Truncated RefPack data') from e
+    if o != declared:
+        raise ValueError(f'RefPack stream produced {o} of {declared} bytes')
+    dst.release()
+    return bytes(out)
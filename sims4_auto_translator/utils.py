@@ -7,6 +7,9 @@ from typing import Any, Dict
 from rich.console import Console
 
 console = Console()
+# DeepL requests in flight per translator; lives here so the CLI can show it
+# without importing the HTTP stack.
+DEFAULT_CONCURRENCY = 4
 
 
 def load_json(path: Path) -> Dict[str, Any]:
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .dbpf import DBPFPackage, StringTable
+from .packer import INSTANCE_MASK
+from .parsers import PLACEHOLDER_PATTERN, iter_strings_file
+
+SENTINEL_PREFIX = '§§PLH_'
+
+Entry = Tuple[int, str, str]  # (line, key, text)
+
+
+class Defect(NamedTuple):
+    path: str
+    line: int
+    key: str
+    kind: str
+    detail: str = ''
+
+
+def iter_numbered_strings(path: Path) -> Iterator[Entry]:
+    """Yield ``(line, key, text)`` from the translator's own ``.strings`` reader.
+
+    Entries are numbered in order; blank lines, which the reader skips and
+    the writer never produces, are not counted.
+    """
+    for number, (key, text) in enumerate(iter_strings_file(path), 1):
+        yield number, key, text
+
+
+def iter_numbered_table(table: StringTable) -> Iterator[Entry]:
+    for i, (key, text) in enumerate(zip(table.hex_keys(), table.texts()), 1):
+        yield i, key, text
+
+
+def _tokens(text: str) -> List[str]:
+    # Cheap pre-check: most strings carry no tokens at all.
+    if '{' not in text and '<' not in text and '\\' not in text and '\n' not in text:
+        return []
+    return sorted(PLACEHOLDER_PATTERN.findall(text))
+
+
+def verify_entries(source: Iterable[Entry], translated: Iterable[Entry], path: str) -> List[Defect]:
+    """Compare a translated table against its source.
+
+    The translated side is indexed by key once; the source side is streamed
+    against that index.
+    """
+    defects: List[Defect] = []
+    index: Dict[str, Tuple[int, str]] = {}
+    for line, key, text in translated:
+        if key in index:
+            defects.append(Defect(path, line, key, 'duplicate_key'))
+            continue
+        index[key] = (line, text)
+        if SENTINEL_PREFIX in text:
+            defects.append(Defect(path, line, key, 'sentinel_leak', text))
+    pop = index.pop
+    for src_line, key, text in source:
+        hit = pop(key, None)
+        if hit is None:
+            defects.append(Defect(path, src_line, key, 'missing_key'))
+            continue
+        line, translated_text = hit
+        expected = _tokens(text)
+        found = _tokens(translated_text)
+        if expected != found:
+            missing = sorted(set(expected) - set(found))
+            extra = sorted(set(found) - set(expected))
+            detail = f"missing {missing} extra {extra}" if missing or extra else 'placeholder count differs'
+            defects.append(Defect(path, line, key, 'placeholder_mismatch', detail))
+    for key, (line, _) in index.items():
+        defects.append(Defect(path, line, key, 'extra_key'))
+    return defects
+
+
+def _read_tables(path: Path) -> Dict[int, StringTable]:
+    with DBPFPackage(path) as pkg:
+        tables = {}
+        for inst, view in pkg.iter_stbl():
+            with view:
+                tables[inst & INSTANCE_MASK] = StringTable.parse(view)
+        return tables
+
+
+def _verify_job(job: Tuple[str, str, str]) -> List[Defect]:
+    kind, src, dst = job
+    src_path, dst_path = Path(src), Path(dst)
+    if kind == 'strings':
+        if not dst_path.exists():
+            return [Defect(dst, 0, '', 'missing_file')]
+        return verify_entries(iter_numbered_strings(src_path), iter_numbered_strings(dst_path), dst)
+    defects: List[Defect] = []
+    if kind == 'package':
+        if not dst_path.exists():
+            return [Defect(dst, 0, '', 'missing_file')]
+        translated = _read_tables(dst_path)
+        for inst, table in _read_tables(src_path).items():
+            label = f"{dst}#{inst:016X}"
+            other = translated.get(inst)
+            if other is None:
+                defects.append(Defect(label, 0, '', 'missing_table'))
+                continue
+            defects.extend(verify_entries(iter_numbered_table(table), iter_numbered_table(other), label))
+        return defects
+    # kind == 'dump': STBL instances compared with their extracted .strings.
+    with DBPFPackage(src_path) as pkg:
+        for inst, view in pkg.iter_stbl():
+            with view:
+                table = StringTable.parse(view)
+            out = dst_path.with_name(f"{dst_path.name}_{inst:08X}.strings")
+            if not out.exists():
+                defects.append(Defect(str(out), 0, '', 'missing_file'))
+                continue
+            defects.extend(verify_entries(iter_numbered_table(table), iter_numbered_strings(out), str(out)))
+    return defects
+
+
+def plan_jobs(source: Path, translated: Path) -> List[Tuple[str, str, str]]:
+    """Pair source files with their translated counterparts."""
+    if source.is_file():
+        if source.suffix == '.package':
+            if translated.suffix == '.package':
+                return [('package', str(source), str(translated))]
+            base = translated / source.stem if translated.is_dir() else translated.with_suffix('')
+            return [('dump', str(source), str(base))]
+        return [('strings', str(source), str(translated))]
+    jobs = [
+        ('strings', str(fp), str(translated / fp.relative_to(source)))
+        for fp in sorted(source.rglob('*.strings'))
+    ]
+    for pkg in sorted(source.rglob('Strings_*.package')):
+        rel = pkg.relative_to(source)
+        jobs.append(('dump', str(pkg), str(translated / rel.with_suffix(''))))
+    return jobs
+
+
+def verify_paths(source: Path, translated: Path, workers: Optional[int] = None) -> List[Defect]:
+    """Verify a file, package or folder against its translation."""
+    jobs = plan_jobs(source, translated)
+    if workers == 1 or len(jobs) <= 1:
+        results = map(_verify_job, jobs)
+        return [defect for result in results for defect in result]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [defect for result in pool.map(_verify_job, jobs, chunksize=8) for defect in result]
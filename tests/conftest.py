@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+
+
+class FakeTranslator:
+    """Stands in for ``DeepLTranslator``: upper-cases texts, or prefixes them
+    with the target language when ``tagged``, and records every call.  With
+    ``fail``, every batch fails and falls back to the source text."""
+
+    def __init__(self, tagged=False, fail=False):
+        self.tagged = tagged
+        self.fail = fail
+        self.calls = []
+        self.lock = threading.Lock()
+
+    @property
+    def batches(self):
+        return [texts for _, texts in self.calls]
+
+    def translate(self, texts, source, target, progress=None, cancel=None, failed=None):
+        texts = list(texts)
+        with self.lock:
+            self.calls.append((target, texts))
+        if progress is not None:
+            progress(len(texts), len(texts), 0)
+        if self.fail:
+            if failed is not None:
+                failed.update(texts)
+            return texts
+        if self.tagged:
+            return [f'{target}:{t}' for t in texts]
+        return [t.upper() for t in texts]
+
+
+@pytest.fixture
+def fake_translator():
+    """Factory for :class:`FakeTranslator`; call it once per translator needed."""
+    return FakeTranslator
@@ -0,0 +1,21 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from benchmarks.corpus import make_entries, make_package
+from benchmarks.run import compare, run_benchmarks
+from sims4_auto_translator.dbpf import DBPFPackage
+
+
+def test_corpus_is_deterministic(tmp_path):
+    assert make_entries(50, seed=3) == make_entries(50, seed=3)
+    a = make_package(tmp_path / 'a.package', 3, 20, seed=1, compress=True).read_bytes()
+    b = make_package(tmp_path / 'b.package', 3, 20, seed=1, compress=True).read_bytes()
+    assert a == b
+    with DBPFPackage(tmp_path / 'a.package') as pkg:
+        assert len(pkg) == 3
+
+
+def test_benchmarks_run_and_compare():
+    results = run_benchmarks(scale=0.001, repeat=1)
+    assert {'read_index', 'parse_stbl', 'mask_placeholders', 'cache_lookup', 'translate_e2e'} <= set(results)
+    slower = {name: {'seconds': r['seconds'] * 2} for name, r in results.items()}
+    assert compare(slower, results, 0.5) and not compare(results, slower, 0.5)
@@ -6,7 +6,7 @@ from sims4_auto_translator.deepl_api import DeepLTranslator
 def test_cache(tmp_path, monkeypatch):
     call_count = 0
 
-    def fake_post(url, data, timeout):
+    def fake_post(self, url, data, timeout):
         nonlocal call_count
         call_count += 1
         class Resp:
@@ -15,11 +15,65 @@ def test_cache(tmp_path, monkeypatch):
                 return {'translations': [{'text': data['text[0]'] + '_uk'}]}
         return Resp()
 
-    monkeypatch.setattr('sims4_auto_translator.deepl_api.requests.post', fake_post)
-    monkeypatch.setattr(deepl_api, 'CACHE_PATH', tmp_path / 'cache.json')
+    monkeypatch.setattr('sims4_auto_translator.deepl_api.requests.Session.post', fake_post)
+    from sims4_auto_translator.utils import save_json
+
+    # Keep the developer's real cache files out of the test.
+    legacy = tmp_path / 'translated_cache.json'
+    save_json({'en-uk||bye': 'bye_legacy'}, legacy)
+    monkeypatch.setattr(deepl_api, 'CACHE_PATH', tmp_path / 'translated_cache.db')
+    monkeypatch.setattr(deepl_api, 'LEGACY_CACHE_PATH', legacy)
     translator = DeepLTranslator('testkey')
     result1 = translator.translate(['hello'], 'EN', 'UK')
-    result2 = translator.translate(['hello'], 'EN', 'UK')
+    result2 = translator.translate(['hello', 'bye'], 'EN', 'UK')
     assert result1 == ['hello_uk']
-    assert result2 == ['hello_uk']
+    assert result2 == ['hello_uk', 'bye_legacy']
     assert call_count == 1
+    assert (tmp_path / 'translated_cache.db').exists()
+
+
+def test_legacy_json_migration(tmp_path):
+    from sims4_auto_translator.cache import SQLiteCache, cache_key
+    from sims4_auto_translator.utils import save_json
+
+    legacy = tmp_path / 'translated_cache.json'
+    save_json({'en-uk||Cancel': 'Скасувати', 'broken': 'x'}, legacy)
+    cache = SQLiteCache(tmp_path / 'cache.db', legacy_json=legacy)
+    key = cache_key('Cancel', 'EN', 'UK')
+    assert cache.get_many([key]) == {key: 'Скасувати'}
+    assert cache.stats()['pairs'] == {'en-uk': 1}
+    cache.set_many('en-uk', [(key, 'Відмінити')])
+    cache.close()
+    # The import only happens once.
+    cache = SQLiteCache(tmp_path / 'cache.db', legacy_json=legacy)
+    assert cache.get_many([key]) == {key: 'Відмінити'}
+    cache.compact()
+    cache.close()
+
+
+def test_incomplete_backend_fails_on_construction():
+    import pytest
+
+    from sims4_auto_translator.cache import TranslationCache
+
+    class NoStats(TranslationCache):
+        def get_many(self, keys):
+            return {}
+
+        def set_many(self, pair, items):
+            pass
+
+    with pytest.raises(TypeError):
+        NoStats()
+
+
+def test_cache_stats_does_not_create_a_database(tmp_path):
+    from typer.testing import CliRunner
+
+    from sims4_auto_translator.main import app
+
+    path = tmp_path / 'missing.db'
+    result = CliRunner().invoke(app, ['cache', 'stats', '--path', str(path)])
+    assert result.exit_code == 0
+    assert 'No cache' in result.output
+    assert not path.exists()
@@ -0,0 +1,29 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from typer.testing import CliRunner
+
+from sims4_auto_translator.main import app
+from sims4_auto_translator.parsers import parse_strings_file, write_strings_file
+
+
+def test_translate_command_end_to_end(tmp_path, monkeypatch):
+    class Resp:
+        status_code = 200
+        headers = {}
+
+        def __init__(self, data):
+            self.data = data
+
+        def json(self):
+            texts = [self.data[f'text[{i}]'] for i in range(len(self.data) - 3)]
+            return {'translations': [{'text': f"{self.data['target_lang']}:{t}"} for t in texts]}
+
+    monkeypatch.setattr('sims4_auto_translator.deepl_api.requests.Session.post', lambda self, url, data, timeout: Resp(data))
+    monkeypatch.chdir(tmp_path)
+    write_strings_file([('0x1', 'Cancel'), ('0x2', 'Hi {0.SimFirstName}')], tmp_path / 'english.strings')
+    result = CliRunner().invoke(app, ['translate', 'english.strings', '--apikey', 'key', '--target-lang', 'UK,DE'])
+    assert result.exit_code == 0, result.output
+    assert parse_strings_file(tmp_path / 'output' / 'en-de' / 'english.strings') == [
+        ('0x1', 'DE:Cancel'), ('0x2', 'DE:Hi {0.SimFirstName}'),
+    ]
+    assert parse_strings_file(tmp_path / 'output' / 'en-uk' / 'english.strings')[0] == ('0x1', 'UK:Cancel')
@@ -0,0 +1,104 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import http.client
+import json
+import stat
+import subprocess
+
+import pytest
+
+from sims4_auto_translator import devserver
+from sims4_auto_translator.cache import MemoryCache
+from sims4_auto_translator.client import DaemonError, create_token, load_token, submit
+from sims4_auto_translator.daemon import TranslatorService, serve_in_background
+from sims4_auto_translator.dbpf import DBPFPackage
+from sims4_auto_translator.deepl_api import DeepLTranslator
+from sims4_auto_translator.parsers import parse_strings_file, write_strings_file
+
+TOKEN = 'secret'
+
+
+@pytest.fixture
+def daemon():
+    fake = devserver.serve_in_background(devserver.ServerConfig(latency_ms=0))
+    translator = DeepLTranslator('key', cache=MemoryCache(), endpoint=fake.endpoint)
+    server = serve_in_background(TranslatorService(translator), TOKEN)
+    yield server
+    server.shutdown()
+    fake.shutdown()
+
+
+def test_jobs_reuse_the_warm_translator(daemon, tmp_path):
+    infile = tmp_path / 'one.strings'
+    write_strings_file([('0x1', 'Cancel'), ('0x2', 'Hi {0.SimFirstName}')], infile)
+    job = {
+        'infile': str(infile), 'outputs': [str(tmp_path / 'de.strings'), str(tmp_path / 'fr.strings')],
+        'source_lang': 'EN', 'targets': ['DE', 'FR'], 'memory': True, 'memory_skip': [],
+    }
+    result = submit(daemon.url, 'translate', job, token=TOKEN)
+    assert 'Translation memory' in result['memory']
+    assert parse_strings_file(tmp_path / 'fr.strings') == [('0x1', '[FR] Cancel'), ('0x2', '[FR] Hi {0.SimFirstName}')]
+    requests = daemon.service.translator.stats.requests
+
+    submit(daemon.url, 'translate', job, token=TOKEN)
+    assert daemon.service.translator.stats.requests == requests
+    assert daemon.service.jobs == 2
+
+    result = submit(
+        daemon.url, 'pack', {'infile': str(tmp_path / 'de.strings'), 'output': str(tmp_path / 'de.package')}, token=TOKEN,
+    )
+    assert result['count'] == 1
+    with DBPFPackage(tmp_path / 'de.package') as pkg:
+        assert len(pkg) == 1
+
+
+def test_bad_jobs_are_reported(daemon, tmp_path):
+    with pytest.raises(DaemonError, match='Missing job field'):
+        submit(daemon.url, 'translate', {'infile': str(tmp_path / 'x.strings')}, token=TOKEN)
+    with pytest.raises(DaemonError):
+        job = {'infile': str(tmp_path / 'missing.strings'), 'output': str(tmp_path / 'o.package')}
+        submit(daemon.url, 'pack', job, token=TOKEN)
+    with pytest.raises(DaemonError, match='Unknown job type'):
+        submit(daemon.url, 'verify', {}, token=TOKEN)
+
+
+def request(server, method, path, headers, body=b''):
+    conn = http.client.HTTPConnection(*server.server_address[:2])
+    try:
+        conn.request(method, path, body, headers)
+        resp = conn.getresponse()
+        return resp.status, json.loads(resp.read())
+    finally:
+        conn.close()
+
+
+def test_requests_without_token_json_or_loopback_host_are_rejected(daemon, tmp_path):
+    job = json.dumps({'infile': str(tmp_path / 'one.strings'), 'output': str(tmp_path / 'o.package')})
+    auth = {'Authorization': f'Bearer {TOKEN}'}
+    with pytest.raises(DaemonError, match='token'):
+        submit(daemon.url, 'pack', json.loads(job), token='wrong')
+    assert request(daemon, 'GET', '/status', {})[0] == 401
+    # A cross-site form post can only send text/plain.
+    assert request(daemon, 'POST', '/jobs/pack', {**auth, 'Content-Type': 'text/plain'}, job)[0] == 415
+    # A DNS-rebound page reaches loopback under its own host name.
+    assert request(daemon, 'GET', '/status', {**auth, 'Host': 'evil.example:8766'})[0] == 403
+    status, payload = request(daemon, 'GET', '/status', {**auth, 'Host': 'localhost'})
+    assert (status, payload['jobs']) == (200, 0)
+
+
+def test_token_file_is_private(tmp_path):
+    path = tmp_path / 'token'
+    with pytest.raises(DaemonError, match='No daemon token'):
+        load_token(path)
+    path.write_text('old')
+    path.chmod(0o644)
+    token = create_token(path)
+    assert load_token(path) == token != create_token(path)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+
+def test_cli_imports_lazily():
+    code = "import sys, sims4_auto_translator.main; print(sorted(m for m in ('requests', 'tkinter', 'sims4_auto_translator.deepl_api', 'sims4_auto_translator.gui') if m in sys.modules))"
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                         cwd=pathlib.Path(__file__).resolve().parents[1])
+    assert out.stdout.strip() == '[]'
@@ -0,0 +1,62 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import struct
+
+from sims4_auto_translator import dbpf
+from sims4_auto_translator.dbpf import (
+    STBL_TYPE_ID,
+    DBPFPackage,
+    build_stbl,
+    iter_stbl_from_package,
+    parse_stbl,
+)
+
+
+def _write_v1_package(path, resources):
+    body = bytearray()
+    index = bytearray()
+    for type_id, instance, data in resources:
+        offset = 96 + len(body)
+        body += data
+        index += struct.pack('<IIIIII', type_id, 0, instance >> 32, instance & 0xFFFFFFFF, offset, len(data))
+    header = struct.pack('<4s17I24s', b'DBPF', 1, 1, 0, 0, 0, 0, 0, 7, len(resources),
+                         96 + len(body), len(index), 0, 0, 0, 1, 0, 0, b'\x00' * 24)
+    path.write_bytes(header + body + index)
+
+
+def test_package_random_access(tmp_path):
+    pkg_path = tmp_path / 'Strings_ENG_US.package'
+    first = build_stbl([('0x1', 'Hello')])
+    second = build_stbl([('0x2', 'World')])
+    _write_v1_package(pkg_path, [
+        (STBL_TYPE_ID, 0x0000000100000002, first),
+        (0x12345678, 0x5, b'other'),
+        (STBL_TYPE_ID, 0x3, second),
+    ])
+    with DBPFPackage(pkg_path) as pkg:
+        assert len(pkg) == 3
+        [entry] = pkg.iter_entries(STBL_TYPE_ID, instance=0x3)
+        view = pkg.read(entry)
+        assert isinstance(view, memoryview)
+        assert parse_stbl(view) == [('0x00000002', 'World')]
+        view.release()
+    assert list(iter_stbl_from_package(pkg_path)) == [(0x0000000100000002, first), (0x3, second)]
+
+
+def test_rejects_non_package(tmp_path):
+    path = tmp_path / 'bad.package'
+    path.write_bytes(b'nope')
+    try:
+        DBPFPackage(path)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('expected ValueError')
+
+
+def test_empty_package_has_no_entries(tmp_path):
+    path = tmp_path / 'empty.package'
+    # No resources and no index: the index offset is left at 0.
+    path.write_bytes(dbpf._HEADER.pack(b'DBPF', 2, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 3, 0, 0, bytes(24)))
+    with DBPFPackage(path) as pkg:
+        assert pkg.entries == []
+    assert list(iter_stbl_from_package(path)) == []
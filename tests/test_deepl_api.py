@@ -0,0 +1,94 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import threading
+
+from sims4_auto_translator.cache import MemoryCache
+from sims4_auto_translator.deepl_api import MAX_TEXTS_PER_REQUEST, DeepLTranslator, plan_batches
+
+
+def test_plan_batches_respects_limits():
+    batches = plan_batches(['x' * 100] * 120, max_bytes=4000)
+    assert sum(map(len, batches)) == 120
+    assert all(len(b) <= MAX_TEXTS_PER_REQUEST for b in batches)
+    assert len(batches) > 3
+    assert plan_batches(['y' * 10000], max_bytes=100) == [['y' * 10000]]
+
+
+def test_concurrent_translate_keeps_order_and_retries(monkeypatch):
+    lock = threading.Lock()
+    calls = []
+
+    class Resp:
+        def __init__(self, status, payload=None, headers=None):
+            self.status_code = status
+            self._payload = payload
+            self.headers = headers or {}
+
+        def json(self):
+            return self._payload
+
+    def fake_post(self, url, data, timeout):
+        with lock:
+            calls.append(len(calls))
+            first = len(calls) == 1
+        if first:
+            return Resp(429, headers={'Retry-After': '0'})
+        texts = [data[f'text[{i}]'] for i in range(len(data) - 3)]
+        return Resp(200, {'translations': [{'text': t.upper()} for t in texts]})
+
+    monkeypatch.setattr('sims4_auto_translator.deepl_api.requests.Session.post', fake_post)
+    translator = DeepLTranslator('testkey', cache=MemoryCache(), concurrency=4)
+    texts = [f'text {i}' for i in range(200)] + ['text 5']
+    result = translator.translate(texts, 'EN', 'UK')
+    assert result == [t.upper() for t in texts]
+    assert len(calls) == 5  # four batches of 50 plus one throttled retry
+
+
+def test_cancel_keeps_finished_batches(monkeypatch):
+    from sims4_auto_translator.deepl_api import TranslationCancelled
+
+    cancel = threading.Event()
+    progress = []
+
+    class Resp:
+        status_code = 200
+        headers = {}
+
+        def __init__(self, texts):
+            self.texts = texts
+
+        def json(self):
+            return {'translations': [{'text': t + '!'} for t in self.texts]}
+
+    def fake_post(self, url, data, timeout):
+        cancel.set()  # cancel as soon as the first batch is in flight
+        return Resp([data[f'text[{i}]'] for i in range(len(data) - 3)])
+
+    monkeypatch.setattr('sims4_auto_translator.deepl_api.requests.Session.post', fake_post)
+    cache = MemoryCache()
+    translator = DeepLTranslator('testkey', cache=cache, concurrency=1)
+    texts = [f'text {i}' for i in range(150)]
+    try:
+        translator.translate(texts, 'EN', 'UK', progress=lambda *a: progress.append(a), cancel=cancel)
+    except TranslationCancelled:
+        pass
+    else:
+        raise AssertionError('expected TranslationCancelled')
+    assert cache.stats()['entries'] == 50
+    assert progress[0] == (0, 150, 0) and progress[1] == (50, 150, 0)
+
+
+def test_failed_batches_are_reported(monkeypatch):
+    from sims4_auto_translator import deepl_api
+
+    class Resp:
+        status_code = 503
+        headers = {'Retry-After': '0'}
+
+    monkeypatch.setattr('sims4_auto_translator.deepl_api.requests.Session.post', lambda self, url, data, timeout: Resp())
+    monkeypatch.setattr(deepl_api, 'MAX_ATTEMPTS', 2)
+    cache = MemoryCache()
+    translator = DeepLTranslator('testkey', cache=cache)
+    failed = set()
+    assert translator.translate(['Hello', 'Bye'], 'EN', 'UK', failed=failed) == ['Hello', 'Bye']
+    assert failed == {'Hello', 'Bye'}
+    assert cache.stats()['entries'] == 0
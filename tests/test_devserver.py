@@ -0,0 +1,32 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import requests
+
+from sims4_auto_translator.cache import MemoryCache
+from sims4_auto_translator.deepl_api import DeepLTranslator
+from sims4_auto_translator.devserver import ServerConfig, serve_in_background
+
+
+def test_translator_against_fake_server():
+    server = serve_in_background(ServerConfig(latency_ms=1, rate_429=0.3, retry_after=0, seed=1))
+    try:
+        translator = DeepLTranslator('key', cache=MemoryCache(), concurrency=4, endpoint=server.endpoint)
+        texts = [f'String {i}' for i in range(300)]
+        assert translator.translate(texts, 'EN', 'UK') == [f'[UK] {t}' for t in texts]
+        assert server.throttled > 0
+        assert translator.stats.retries == server.throttled
+        assert server.usage['key'] == sum(map(len, texts))
+    finally:
+        server.shutdown()
+
+
+def test_fake_server_quota():
+    server = serve_in_background(ServerConfig(latency_ms=0, quota_chars=10))
+    try:
+        ok = requests.post(server.endpoint, data={'auth_key': 'k', 'target_lang': 'UK', 'text[0]': 'hello'})
+        assert ok.json()['translations'][0]['text'] == '[UK] hello'
+        over = requests.post(server.endpoint, data={'auth_key': 'k', 'target_lang': 'UK', 'text[0]': 'too long now'})
+        assert over.status_code == 456
+        assert requests.post(server.endpoint, data={'target_lang': 'UK', 'text[0]': 'x'}).status_code == 403
+    finally:
+        server.shutdown()
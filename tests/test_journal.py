@@ -0,0 +1,91 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from sims4_auto_translator.cache import MemoryCache, cache_key
+from sims4_auto_translator.journal import JOURNAL_NAME, Journal, JournaledCache
+from sims4_auto_translator.parsers import parse_strings_file, write_strings_file
+from sims4_auto_translator.planner import translate_folder
+
+HEADER = {'folder': 'game', 'source': 'EN', 'target': 'UK'}
+
+
+def test_resume_replays_batches_and_ignores_torn_line(tmp_path):
+    journal = Journal(tmp_path, HEADER)
+    cache = JournaledCache(MemoryCache(), {'en-uk': journal})
+    key = cache_key('Hello', 'EN', 'UK')
+    cache.set_many('en-uk', [(key, 'Привіт')])
+    journal.record_output('one.strings', 'abc')
+    journal.close()  # simulated crash: the journal stays behind
+    with (tmp_path / JOURNAL_NAME).open('a', encoding='utf-8') as f:
+        f.write('{"type": "batch", "pa')
+
+    resumed = Journal(tmp_path, HEADER, resume=True)
+    fresh = MemoryCache()
+    assert resumed.replay(fresh) == 1
+    assert fresh.get_many([key]) == {key: 'Привіт'}
+    assert resumed.finished('one.strings', 'abc')
+    assert not resumed.finished('one.strings', 'changed')
+    resumed.record_output('two.strings', 'def')
+    resumed.close(completed=True)
+    assert not (tmp_path / JOURNAL_NAME).exists()
+
+
+def test_resume_rejects_other_runs(tmp_path):
+    Journal(tmp_path, HEADER).close()
+    with pytest.raises(ValueError):
+        Journal(tmp_path, {**HEADER, 'target': 'DE'}, resume=True)
+
+
+def test_translate_folder_skips_journaled_outputs(tmp_path, fake_translator):
+    game = tmp_path / 'game'
+    write_strings_file([('a', 'Cancel')], game / 'one.strings')
+    write_strings_file([('b', 'Accept')], game / 'two.strings')
+    out = tmp_path / 'out'
+    journal = Journal(out, HEADER)
+    translator = fake_translator()
+    translate_folder(game, out, translator, 'EN', 'UK', incremental=False, journal=journal)
+    journal.close()
+    write_strings_file([('a', 'kept')], out / 'one.strings')
+
+    (out / 'two.strings').unlink()
+    lines = (out / JOURNAL_NAME).read_text(encoding='utf-8').splitlines()
+    (out / JOURNAL_NAME).write_text('\n'.join(lines[:-1]) + '\n', encoding='utf-8')
+    translator = fake_translator()
+    journal = Journal(out, HEADER, resume=True)
+    translate_folder(game, out, translator, 'EN', 'UK', incremental=False, journal=journal)
+    assert translator.batches == [['Accept']]
+    assert parse_strings_file(out / 'one.strings') == [('a', 'kept')]
+    assert parse_strings_file(out / 'two.strings') == [('b', 'ACCEPT')]
+
+
+def test_only_fully_translated_outputs_are_journaled(tmp_path, fake_translator):
+    game = tmp_path / 'game'
+    write_strings_file([('a', 'Cancel')], game / 'one.strings')
+    out = tmp_path / 'out'
+    journal = Journal(out, HEADER)
+    plan = translate_folder(game, out, fake_translator(fail=True), 'EN', 'UK', incremental=False, journal=journal)
+    journal.close()
+    assert plan.incomplete == 1
+
+    translator = fake_translator()
+    journal = Journal(out, HEADER, resume=True)
+    translate_folder(game, out, translator, 'EN', 'UK', incremental=False, journal=journal)
+    assert translator.batches == [['Cancel']]
+    assert parse_strings_file(out / 'one.strings') == [('a', 'CANCEL')]
+
+
+def test_full_resume_retranslates_changed_sources(tmp_path, fake_translator):
+    game = tmp_path / 'game'
+    write_strings_file([('a', 'Cancel')], game / 'one.strings')
+    out = tmp_path / 'out'
+    journal = Journal(out, HEADER)
+    translate_folder(game, out, fake_translator(), 'EN', 'UK', incremental=False, journal=journal)
+    journal.close()
+
+    write_strings_file([('a', 'Accept')], game / 'one.strings')
+    translator = fake_translator()
+    journal = Journal(out, HEADER, resume=True)
+    translate_folder(game, out, translator, 'EN', 'UK', incremental=False, journal=journal)
+    assert translator.batches == [['Accept']]
+    assert parse_strings_file(out / 'one.strings') == [('a', 'ACCEPT')]
@@ -0,0 +1,64 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from sims4_auto_translator.memory import CATEGORIES, TranslationMemory
+from sims4_auto_translator.parsers import parse_strings_file, write_strings_file
+from sims4_auto_translator.planner import translate_folder
+
+
+def test_normalize_splits_affixes():
+    tm = TranslationMemory(enabled=CATEGORIES)
+    assert tm.normalize('  Level 12.  ') == ('  ', 'Level', ' 12.  ')
+    assert tm.normalize('Buy  now!') == ('', 'Buy now', '!')
+    assert tm.normalize('42') == ('', '42', '')
+    assert tm.normalize('...') == ('', '...', '')
+    assert TranslationMemory(['digits'], CATEGORIES).normalize('Level 2') == ('', 'Level 2', '')
+    with pytest.raises(ValueError):
+        TranslationMemory(['vowels'])
+    with pytest.raises(ValueError):
+        TranslationMemory(enabled=['vowels'])
+
+
+def test_lossy_normalisations_are_opt_in(fake_translator):
+    tm = TranslationMemory()
+    assert tm.normalize('  Are you  sure? ') == ('  ', 'Are you sure?', ' ')
+    assert tm.normalize('Page 1 of 3') == ('', 'Page 1 of 3', '')
+    tm.translate(fake_translator(), ['Cancel', ' Cancel', 'Other'], 'EN', 'UK')
+    assert tm.saved_chars == len('Cancel') + len(' Cancel') - len('Cancel')
+
+    # Stripping whitespace alone doesn't count as saving anything.
+    tm = TranslationMemory()
+    tm.translate(fake_translator(), ['Hello  world ', 'Bye'], 'EN', 'UK')
+    assert (tm.hit_rate, tm.saved_chars) == (0.0, 0)
+
+
+def test_variants_share_one_translation(fake_translator):
+    tm = TranslationMemory(enabled=CATEGORIES)
+    translator = fake_translator()
+    texts = ['Level 1', 'Level 2', ' Level 3 ', 'Level!', 'Other']
+    assert tm.translate(translator, texts, 'EN', 'UK') == ['LEVEL 1', 'LEVEL 2', ' LEVEL 3 ', 'LEVEL!', 'OTHER']
+    assert translator.batches == [['Level', 'Other']]
+    assert (tm.inputs, tm.templates) == (5, 2)
+    assert tm.hit_rate == pytest.approx(0.6)
+    assert tm.saved_chars == len('Level 1Level 2 Level 3 Level!') - len('Level')
+
+
+def test_translate_folder_with_memory(tmp_path, fake_translator):
+    game = tmp_path / 'game'
+    write_strings_file([('a', 'Level 1'), ('b', 'Level 2 for {0.SimFirstName}'), ('c', 'Level 3')], game / 'one.strings')
+    out = tmp_path / 'out'
+    translator = fake_translator()
+    translate_folder(game, out, translator, 'EN', 'UK', incremental=False, memory=TranslationMemory(enabled=['digits']))
+    assert translator.batches == [['Level', 'Level 2 for §§PLH_000§§']]
+    assert parse_strings_file(out / 'one.strings') == [
+        ('a', 'LEVEL 1'), ('b', 'LEVEL 2 FOR {0.SimFirstName}'), ('c', 'LEVEL 3'),
+    ]
+
+
+def test_failed_templates_mark_every_variant(fake_translator):
+    failed = set()
+    texts = ['Level 1', 'Level 2', 'Other']
+    tm = TranslationMemory(enabled=['digits'])
+    assert tm.translate(fake_translator(fail=True), texts, 'EN', 'UK', failed=failed) == texts
+    assert failed == set(texts)
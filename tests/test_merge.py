@@ -0,0 +1,44 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from sims4_auto_translator.dbpf import STBL_TYPE_ID, DBPFPackage, StringTable
+from sims4_auto_translator.packer import locale_code, pack_tables, with_locale
+from sims4_auto_translator.parsers import parse_strings_file, write_strings_file
+from sims4_auto_translator.planner import translate_folder
+
+
+DE = locale_code('DE')
+
+
+def test_merge_only_translates_missing_and_untranslated_keys(tmp_path, fake_translator):
+    game = tmp_path / 'game'
+    source = StringTable.from_entries([('0x1', 'Cancel'), ('0x2', 'Accept'), ('0x3', 'Walk')])
+    # Partial German table shipped by the mod: 0x2 was never translated and 0x3 is missing.
+    german = StringTable.from_entries([('0x00000001', 'Abbrechen'), ('0x2', 'Accept')])
+    pack_tables([(0x42, source), (with_locale(0x42, DE), german)], game / 'Strings_ENG_US.package')
+    out = tmp_path / 'out'
+    translator = fake_translator()
+    plan = translate_folder(game, out, translator, 'EN', 'DE', incremental=False, merge=True, patch=True)
+    assert translator.batches == [['Accept', 'Walk']]
+    assert len(plan.sources) == 1
+    assert parse_strings_file(out / 'Strings_ENG_US_00000042.strings') == [
+        ('0x00000001', 'Abbrechen'), ('0x00000002', 'ACCEPT'), ('0x00000003', 'WALK'),
+    ]
+    with DBPFPackage(out / 'Strings_ENG_US.package') as pkg:
+        tables = {e.instance: StringTable.parse(pkg.read(e)).entries() for e in pkg.iter_entries(STBL_TYPE_ID)}
+    assert list(tables) == [with_locale(0x42, DE)]
+    assert tables[with_locale(0x42, DE)][2] == ('0x00000003', 'WALK')
+
+
+def test_merge_reuses_existing_output_files(tmp_path, fake_translator):
+    game = tmp_path / 'game'
+    write_strings_file([('a', 'Cancel'), ('b', 'Accept'), ('c', 'Level')], game / 'one.strings')
+    out = tmp_path / 'out'
+    write_strings_file([('a', 'Скасувати'), ('c', 'Level')], out / 'one.strings')
+    translator = fake_translator()
+    translate_folder(game, out, translator, 'EN', 'UK', incremental=False, merge=True)
+    assert translator.batches == [['Accept', 'Level']]
+    assert parse_strings_file(out / 'one.strings') == [('a', 'Скасувати'), ('b', 'ACCEPT'), ('c', 'LEVEL')]
+
+    translator = fake_translator()
+    translate_folder(game, out, translator, 'EN', 'UK', incremental=False, merge=True)
+    assert translator.batches == []
@@ -0,0 +1,87 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import json
+
+import pytest
+
+from sims4_auto_translator import devserver
+from sims4_auto_translator.cache import MemoryCache
+from sims4_auto_translator import metrics as metrics_module
+from sims4_auto_translator.deepl_api import DeepLTranslator, RequestStats
+from sims4_auto_translator.metrics import Metrics, metrics
+from sims4_auto_translator.parsers import write_strings_file
+from sims4_auto_translator.planner import translate_folder
+
+
+@pytest.fixture
+def recording():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.enabled = False
+    metrics.reset()
+
+
+def test_disabled_metrics_record_nothing():
+    m = Metrics()
+    m.count('a')
+    m.observe('b', 1.0)
+    with m.timed('c'):
+        pass
+    assert m.snapshot() == {'counters': {}, 'timers': {}, 'histograms': {}}
+
+
+def test_snapshot_aggregates_timers_and_histograms(tmp_path):
+    m = Metrics(enabled=True)
+    m.count('strings', 3)
+    m.count('strings', 2)
+    for _ in range(2):
+        with m.timed('stage'):
+            pass
+    for value in (0.005, 0.02, 0.02, 3.0):
+        m.observe('latency', value)
+    m.observe('size', 50, buckets=(10, 50))
+    m.write_json(tmp_path / 'm.json', command='test')
+    snap = json.loads((tmp_path / 'm.json').read_text())
+    assert snap['command'] == 'test'
+    assert snap['counters'] == {'strings': 5}
+    assert snap['timers']['stage']['count'] == 2
+    latency = snap['histograms']['latency']
+    assert (latency['count'], latency['p50'], latency['max']) == (4, 0.02, 3.0)
+    assert latency['buckets']['le_0.01'] == 1 and latency['buckets']['le_0.025'] == 2 and latency['buckets']['le_5'] == 1
+    assert snap['histograms']['size']['buckets'] == {'le_10': 0, 'le_50': 1, 'inf': 0}
+
+
+def test_histograms_keep_a_bounded_window(monkeypatch):
+    monkeypatch.setattr(metrics_module, 'SAMPLE_WINDOW', 10)
+    m = Metrics(enabled=True)
+    stats = RequestStats()
+    for i in range(100):
+        m.observe('latency', i / 1000)
+    assert len(m.histograms['latency'].recent) == 10
+    latency = m.snapshot()['histograms']['latency']
+    assert (latency['count'], latency['max'], latency['p50']) == (100, 0.099, 0.095)
+    assert latency['buckets']['le_0.01'] == 11 and sum(latency['buckets'].values()) == 100
+    for _ in range(20000):
+        stats.record(0.5)
+    assert (stats.requests, len(stats.latencies), stats.percentile(50)) == (20000, 10000, 0.5)
+
+
+def test_folder_run_records_every_stage(recording, tmp_path):
+    folder = tmp_path / 'in'
+    write_strings_file([('0x1', 'Cancel'), ('0x2', 'Hi {0.SimFirstName}')], folder / 'a.strings')
+    fake = devserver.serve_in_background(devserver.ServerConfig(latency_ms=0))
+    try:
+        translator = DeepLTranslator('key', cache=MemoryCache(), endpoint=fake.endpoint)
+        translate_folder(folder, tmp_path / 'out', translator, 'EN', 'DE', pack=True)
+        translate_folder(folder, tmp_path / 'again', translator, 'EN', 'DE', incremental=False)
+    finally:
+        fake.shutdown()
+    snap = recording.snapshot()
+    counters = snap['counters']
+    assert counters['cache.misses'] == 2 and counters['cache.hits'] == 2
+    assert counters['parsers.bytes_read'] > 0
+    assert counters['dbpf.packages_written'] == 1
+    assert {'planner.scan', 'pipeline.translate', 'planner.write', 'cache.lookup', 'packer.pack'} <= set(snap['timers'])
+    assert snap['histograms']['deepl.request_latency']['count'] == 1
+    assert snap['histograms']['deepl.batch_size']['max'] == 2
@@ -1,6 +1,7 @@
-import sys, pathlib, zipfile
+import sys, pathlib
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
-from sims4_auto_translator.packer import pack_strings_to_package
+from sims4_auto_translator.dbpf import STBL_TYPE_ID, ZLIB_COMPRESSION, DBPFPackage, StringTable, fnv32, parse_stbl
+from sims4_auto_translator.packer import pack_strings_to_package, pack_tables, stbl_instance
 
 
 def test_pack(tmp_path):
@@ -8,7 +9,19 @@ def test_pack(tmp_path):
     data = [("key", "Value")]
     pack_strings_to_package(data, out)
     assert out.exists()
-    with zipfile.ZipFile(out) as zf:
-        assert "language.strings" in zf.namelist()
-        content = zf.read("language.strings").decode("utf-8").strip()
-    assert content == "key = Value"
+    with DBPFPackage(out) as pkg:
+        assert (pkg.major, pkg.minor) == (2, 1)
+        [(instance, body)] = [(i, bytes(v)) for i, v in pkg.iter_stbl()]
+    assert instance == stbl_instance("test")
+    assert parse_stbl(body) == [(f"0x{fnv32('key'):08X}", "Value")]
+
+
+def test_pack_many_compressed(tmp_path):
+    out = tmp_path / "many.package"
+    tables = [(i, [(f"0x{i:08X}", f"Text {i}" * 20)]) for i in range(20)]
+    pack_tables(((i, StringTable.from_entries(e)) for i, e in tables), out, compress=True, workers=4)
+    with DBPFPackage(out) as pkg:
+        entries = list(pkg.iter_entries(STBL_TYPE_ID))
+        assert [e.instance for e in entries] == list(range(20))
+        assert all(e.compression == ZLIB_COMPRESSION and e.size < e.mem_size for e in entries)
+        assert parse_stbl(pkg.read(entries[7])) == tables[7][1]
@@ -0,0 +1,77 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from sims4_auto_translator import dbpf, packer
+from sims4_auto_translator.dbpf import STBL_TYPE_ID, ZLIB_COMPRESSION, DBPFPackage, DBPFWriter, StringTable
+from sims4_auto_translator.packer import locale_code, patch_package, with_locale
+from sims4_auto_translator.parsers import write_strings_file
+from sims4_auto_translator.planner import translate_folder
+
+TUNING_TYPE = 0x0333406C
+
+
+def make_source(path):
+    with DBPFWriter(path) as writer:
+        writer.add(TUNING_TYPE, 7, 0x99, b'<I n="tuning"/>' * 100, compress=True)
+        writer.add(STBL_TYPE_ID, 0, 0x42, StringTable.from_entries([('0x1', 'Cancel')]).to_bytes())
+        writer.add(STBL_TYPE_ID, 0, 0x43, StringTable.from_entries([('0x2', 'Accept')]).to_bytes(), compress=True)
+
+
+@pytest.mark.parametrize('kernel', [True, False])
+def test_patch_replaces_tables_and_copies_the_rest(tmp_path, monkeypatch, kernel):
+    if not kernel:
+        monkeypatch.setattr(dbpf, '_kernel_copy', lambda *args: 0)
+    src = tmp_path / 'Strings_ENG_US.package'
+    make_source(src)
+    out = tmp_path / 'out' / 'Strings_ENG_US.package'
+    out.parent.mkdir()
+    translated = StringTable.from_entries([('0x1', 'Скасувати')])
+    assert patch_package(src, out, {0x42: translated}, locale_code('DE')) == 1
+    with DBPFPackage(src) as a, DBPFPackage(out) as b:
+        tuning_a, tuning_b = a.entries[0], b.entries[0]
+        assert tuning_b.compression == ZLIB_COMPRESSION
+        assert (tuning_b.size, tuning_b.mem_size, tuning_b.group) == (tuning_a.size, tuning_a.mem_size, 7)
+        assert bytes(b.read(tuning_b)) == bytes(a.read(tuning_a))
+        assert b.entries[1].instance == with_locale(0x42, 0x08)
+        assert StringTable.parse(b.read(b.entries[1])).entries() == [('0x00000001', 'Скасувати')]
+        assert b.entries[2].instance == 0x43
+        assert bytes(b.read(b.entries[2])) == bytes(a.read(a.entries[2]))
+
+
+def test_patch_refuses_to_overwrite_source(tmp_path):
+    src = tmp_path / 'Strings_ENG_US.package'
+    make_source(src)
+    with pytest.raises(ValueError):
+        patch_package(src, src, {}, 0)
+
+
+def test_locale_codes_cover_current_deepl_targets(monkeypatch, capsys):
+    monkeypatch.setattr(packer, '_warned_fallbacks', set())
+    assert (locale_code('zh-hans'), locale_code('ZH-HANT'), locale_code('ES-419')) == (0x01, 0x02, 0x13)
+    assert locale_code('EN-GB') == 0x00
+    assert capsys.readouterr().out == ''
+    assert locale_code('UK') == locale_code('UK') == 0x00
+    assert capsys.readouterr().out.count('no UK locale') == 1
+
+
+def test_failed_patch_removes_temp_file(tmp_path):
+    src = tmp_path / 'Strings_ENG_US.package'
+    make_source(src)
+    out = tmp_path / 'out' / 'Strings_ENG_US.package'
+    with pytest.raises(TypeError):
+        patch_package(src, out, {0x42: object()}, locale_code('DE'))
+    assert list(out.parent.iterdir()) == []
+
+
+def test_translate_folder_patches_packages(tmp_path, fake_translator):
+    game = tmp_path / 'game'
+    game.mkdir()
+    make_source(game / 'Strings_ENG_US.package')
+    write_strings_file([('a', 'Other')], game / 'one.strings')
+    out = tmp_path / 'out'
+    translate_folder(game, out, fake_translator(), 'EN', 'FR', patch=True)
+    with DBPFPackage(out / 'Strings_ENG_US.package') as pkg:
+        tables = {inst: StringTable.parse(view).texts() for inst, view in pkg.iter_stbl()}
+        assert len(pkg) == 3
+    assert tables == {with_locale(0x42, 0x07): ['CANCEL'], with_locale(0x43, 0x07): ['ACCEPT']}
@@ -0,0 +1,102 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import random
+import threading
+import time
+
+import pytest
+
+from sims4_auto_translator.parsers import write_strings_file
+from sims4_auto_translator.pipeline import Stage, run_pipeline
+from sims4_auto_translator.planner import TranslationPlan, scan_folder, translate_stream_targets
+
+
+def jittered(fn):
+    rng = random.Random(0)
+    lock = threading.Lock()
+
+    def wrapper(item):
+        with lock:
+            delay = rng.random() / 500
+        time.sleep(delay)
+        return fn(item)
+    return wrapper
+
+
+def test_results_come_back_in_order_and_stages_overlap():
+    active = set()
+    overlapped = []
+
+    def track(name):
+        def fn(item):
+            active.add(name)
+            overlapped.append(len(active))
+            time.sleep(0.002)
+            active.discard(name)
+            return item
+        return fn
+
+    stages = [
+        Stage('double', jittered(lambda x: x * 2), workers=3),
+        Stage('slow', track('slow')),
+        Stage('inc', jittered(lambda x: x + 1), workers=2),
+        Stage('fast', track('fast')),
+    ]
+    assert list(run_pipeline(range(200), stages)) == [x * 2 + 1 for x in range(200)]
+    assert max(overlapped) == 2
+
+
+def test_backpressure_bounds_items_in_flight():
+    pulled = []
+
+    def source():
+        for i in range(1000):
+            pulled.append(i)
+            yield i
+
+    results = run_pipeline(source(), [Stage('a', lambda x: x), Stage('b', lambda x: x, workers=2)], queue_size=2)
+    assert next(results) == 0
+    time.sleep(0.05)
+    assert len(pulled) < 20
+    results.close()
+
+
+def test_errors_propagate_from_stages_and_source():
+    def boom(x):
+        if x == 5:
+            raise KeyError(x)
+        return x
+
+    with pytest.raises(KeyError):
+        list(run_pipeline(range(100), [Stage('boom', boom, workers=2)]))
+
+    def broken():
+        yield 1
+        raise OSError('read failed')
+
+    with pytest.raises(OSError):
+        list(run_pipeline(broken(), [Stage('id', lambda x: x)]))
+
+
+def test_plan_yields_sources_before_later_chunks_are_translated(tmp_path, fake_translator):
+    for i in range(4):
+        write_strings_file([(f'k{i}', f'Text {i}'), ('shared', 'Cancel')], tmp_path / f'{i}.strings')
+    plan = TranslationPlan()
+    for source in scan_folder(tmp_path):
+        plan.add(source)
+    translator = fake_translator(tagged=True)
+    progress = []
+    stream = plan.stream(translator, 'EN', 'DE', progress=lambda *a: progress.append(a), chunk_size=1, workers=1)
+    source, restored = next(stream)
+    assert restored == ['DE:Text 0', 'DE:Cancel']
+    assert len(translator.calls) < plan.unique
+    rest = list(stream)
+    assert [r for _, r in rest][-1] == ['DE:Text 3', 'DE:Cancel']
+    assert len(translator.calls) == plan.unique == 5
+    assert progress[-1] == (5, 5, 0)
+
+
+def test_stream_targets_keeps_input_order(fake_translator):
+    entries = [(f'0x{i:08X}', f'String {i}') for i in range(53)]
+    rows = list(translate_stream_targets(iter(entries), fake_translator(tagged=True), 'EN', ['DE', 'FR'], batch_size=5))
+    assert rows == [(key, [f'DE:{text}', f'FR:{text}']) for key, text in entries]
@@ -0,0 +1,47 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import os
+
+from sims4_auto_translator.dbpf import STBL_TYPE_ID, DBPFWriter, StringTable
+from sims4_auto_translator.pkgindex import PackageIndex
+from sims4_auto_translator.planner import scan_folder
+
+
+def make_package(path, texts):
+    with DBPFWriter(path) as writer:
+        writer.add(0x0333406C, 0, 1, b'tuning')
+        for i, text in enumerate(texts):
+            writer.add(STBL_TYPE_ID, 0, 0x10 + i, StringTable.from_entries([('0x1', text)]).to_bytes())
+
+
+def test_index_round_trip_and_invalidation(tmp_path):
+    pkg = tmp_path / 'Strings_ENG_US.package'
+    make_package(pkg, ['Hello', 'Bye'])
+    cache_path = tmp_path / 'index.bin'
+    index = PackageIndex(cache_path)
+    first = index.lookup(pkg)
+    assert (first.count, [e.instance for e in first.stbl]) == (3, [0x10, 0x11])
+    index.save()
+
+    warm = PackageIndex(cache_path)
+    assert warm.lookup(pkg) == first
+    assert (warm.hits, warm.misses) == (1, 0)
+
+    make_package(pkg, ['Hello'])
+    os.utime(pkg, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+    assert [e.instance for e in warm.stbl_entries(pkg)] == [0x10]
+    assert warm.misses == 1
+
+
+def test_corrupt_cache_is_ignored(tmp_path):
+    cache_path = tmp_path / 'index.bin'
+    cache_path.write_bytes(b'S4PI\x01\x00\x05\x00\x00\x00garbage')
+    assert len(PackageIndex(cache_path)) == 0
+
+
+def test_scan_folder_uses_index(tmp_path):
+    make_package(tmp_path / 'Strings_ENG_US.package', ['Hello', 'Bye'])
+    index = PackageIndex(tmp_path / 'index.bin')
+    cold = [s.texts for s in scan_folder(tmp_path, index=index)]
+    warm = [s.texts for s in scan_folder(tmp_path, index=PackageIndex(tmp_path / 'index.bin'))]
+    assert cold == warm == [['Hello'], ['Bye']]
@@ -8,3 +8,21 @@ def test_mask_unmask():
     assert masked != text
     restored = unmask_placeholders(masked, mapping)
     assert restored == text
+
+
+def test_batch_mask_covers_game_grammar():
+    from sims4_auto_translator.parsers import mask_many, unmask_many
+
+    texts = [
+        '{M0.he}{F0.she} gave {0.SimFirstName} a gift',
+        '<i>Whispers</i>\\nLine two\nLine three',
+        'No tokens here',
+        ' '.join('{%d.String}' % i for i in range(40)),
+    ]
+    masked, maps = mask_many(texts)
+    assert masked[0] == '§§PLH_000§§§§PLH_001§§ gave §§PLH_002§§ a gift'
+    assert list(maps[1].values()) == ['<i>', '</i>', '\\n', '\n']
+    assert maps[2] == {} and masked[2] == texts[2]
+    assert '{' not in masked[3] and len(maps[3]) == 40
+    assert unmask_many(masked, maps) == texts
+    assert [unmask_placeholders(m, mp) for m, mp in zip(masked, maps)] == texts
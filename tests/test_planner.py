@@ -0,0 +1,88 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from sims4_auto_translator import planner
+from sims4_auto_translator.dbpf import StringTable
+from sims4_auto_translator.packer import pack_strings_to_package, pack_tables
+from sims4_auto_translator.parsers import parse_strings_file, write_strings_file
+from sims4_auto_translator.planner import scan_folder, translate_folder
+
+
+def test_translate_folder_dedupes_across_sources(tmp_path, fake_translator):
+    game = tmp_path / 'game'
+    write_strings_file([('a', 'Cancel'), ('b', 'Hi {0.SimFirstName}')], game / 'one.strings')
+    write_strings_file([('c', 'Cancel'), ('d', 'Hi {1.SimFirstName}')], game / 'sub' / 'two.strings')
+    pack_strings_to_package([('0x1', 'Cancel')], game / 'Strings_ENG_US.package', instance=0x42)
+    out = tmp_path / 'out'
+    translator = fake_translator()
+    plan = translate_folder(game, out, translator, 'EN', 'UK')
+    assert (plan.total, plan.unique) == (5, 2)
+    assert len(translator.calls) == 1
+    assert parse_strings_file(out / 'sub' / 'two.strings') == [('c', 'CANCEL'), ('d', 'HI {1.SimFirstName}')]
+    assert parse_strings_file(out / 'Strings_ENG_US_00000042.strings') == [('0x00000001', 'CANCEL')]
+
+
+def test_incremental_rerun_only_translates_changes(tmp_path, fake_translator):
+    game = tmp_path / 'game'
+    write_strings_file([('a', 'Cancel'), ('b', 'Accept')], game / 'one.strings')
+    write_strings_file([('c', 'Level')], game / 'two.strings')
+    pack_strings_to_package([('0x1', 'Walk'), ('0x2', 'Run')], game / 'Strings_ENG_US.package', instance=0x42)
+    out = tmp_path / 'out'
+    translate_folder(game, out, fake_translator(), 'EN', 'UK')
+
+    translator = fake_translator()
+    translate_folder(game, out, translator, 'EN', 'UK')
+    assert translator.batches == []
+
+    write_strings_file([('a', 'Cancel'), ('b', 'Decline')], game / 'one.strings')
+    pack_strings_to_package([('0x1', 'Walk'), ('0x2', 'Sprint')], game / 'Strings_ENG_US.package', instance=0x42)
+    translator = fake_translator()
+    plan = translate_folder(game, out, translator, 'EN', 'UK')
+    assert translator.batches == [['Decline', 'Sprint']]
+    assert len(plan.sources) == 2
+    assert parse_strings_file(out / 'one.strings') == [('a', 'CANCEL'), ('b', 'DECLINE')]
+    assert parse_strings_file(out / 'Strings_ENG_US_00000042.strings') == [('0x00000001', 'WALK'), ('0x00000002', 'SPRINT')]
+
+
+def test_parallel_scan_matches_serial(tmp_path):
+    game = tmp_path / 'game'
+    for n in range(3):
+        tables = [(i, [(f'0x{i:08X}', f'String {n}-{i}')]) for i in range(5)]
+        pack_tables(((i, StringTable.from_entries(e)) for i, e in tables), game / f'Strings_{n}.package', compress=n == 1)
+    serial = list(scan_folder(game))
+    parallel = list(scan_folder(game, workers=2, chunksize=2))
+    assert len(serial) == 15
+    assert parallel == serial
+
+
+def test_translate_folder_passes_pool_settings_to_the_scan(tmp_path, monkeypatch, fake_translator):
+    game = tmp_path / 'game'
+    pack_strings_to_package([('0x1', 'Walk')], game / 'Strings_ENG_US.package', instance=0x42)
+    scans = []
+
+    def scan(*args, **kwargs):
+        scans.append((kwargs['workers'], kwargs['chunksize']))
+        return scan_folder(*args, **kwargs)
+
+    monkeypatch.setattr(planner, 'scan_folder', scan)
+    translate_folder(game, tmp_path / 'out', fake_translator(), 'EN', 'UK', workers=2, chunksize=1)
+    assert scans == [(2, 1)]
+    assert parse_strings_file(tmp_path / 'out' / 'Strings_ENG_US_00000042.strings') == [('0x00000001', 'WALK')]
+
+
+def test_failed_batches_are_retried_on_the_next_run(tmp_path, fake_translator):
+    game = tmp_path / 'game'
+    write_strings_file([('a', 'Hello'), ('b', 'Bye')], game / 'one.strings')
+    pack_strings_to_package([('0x1', 'Walk')], game / 'Strings_ENG_US.package', instance=0x42)
+    out = tmp_path / 'out'
+    translate_folder(game, out, fake_translator(fail=True), 'EN', 'UK')
+    assert parse_strings_file(out / 'one.strings') == [('a', 'Hello'), ('b', 'Bye')]
+
+    translator = fake_translator()
+    translate_folder(game, out, translator, 'EN', 'UK')
+    assert translator.batches == [['Hello', 'Bye', 'Walk']]
+    assert parse_strings_file(out / 'one.strings') == [('a', 'HELLO'), ('b', 'BYE')]
+    assert parse_strings_file(out / 'Strings_ENG_US_00000042.strings') == [('0x00000001', 'WALK')]
+
+    translator = fake_translator()
+    translate_folder(game, out, translator, 'EN', 'UK')
+    assert translator.batches == []
@@ -0,0 +1,84 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import os
+import struct
+import zlib
+
+import pytest
+
+from benchmarks.corpus import refpack_compress
+from sims4_auto_translator import dbpf, refpack
+from sims4_auto_translator.dbpf import (DELETED, REFPACK_COMPRESSION, STBL_TYPE_ID, ZLIB_COMPRESSION,
+                                        DBPFPackage, StringTable, build_stbl, decode_resource)
+from sims4_auto_translator.packer import patch_package
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'abc',
+    b'a' * 5000,                                   # overlapping back-references
+    b'hello world ' * 500,
+    os.urandom(300),                               # literal runs only
+    os.urandom(20000) + os.urandom(3000) * 3,      # long-offset 4-byte commands
+    build_stbl([(i, f'Level {i % 7} for {{0.SimFirstName}}') for i in range(500)]),
+])
+def test_round_trip(data):
+    packed = refpack_compress(data)
+    assert refpack.is_refpack(packed)
+    assert refpack.decompressed_size(packed) == len(data)
+    assert refpack.decompress(packed, len(data)) == data
+
+
+def test_bad_streams_raise_value_error():
+    packed = refpack_compress(b'hello world ' * 50)
+    with pytest.raises(ValueError):
+        refpack.decompress(packed, 1)
+    with pytest.raises(ValueError):
+        refpack.decompress(packed[:len(packed) // 2])
+    with pytest.raises(ValueError):
+        refpack.decompress(b'not refpack')
+    with pytest.raises(ValueError):
+        decode_resource(zlib.compress(b'abc'), ZLIB_COMPRESSION, 4)
+
+
+def write_constant_index_package(path, group, resources):
+    """DBPF 2.1 package whose index stores type and group once (flags 0b11)."""
+    body = bytearray(dbpf.HEADER_SIZE)
+    rows = []
+    for instance, data, mem_size, compression in resources:
+        rows.append(struct.pack('<IIIIIHH', instance >> 32, instance & 0xFFFFFFFF, len(body),
+                                len(data) | 0x80000000, mem_size, compression, 1))
+        body += data
+    index = struct.pack('<III', 0b11, STBL_TYPE_ID, group) + b''.join(rows)
+    header = dbpf._HEADER.pack(b'DBPF', 2, 1, 0, 0, 0, 0, 0, 0, len(rows), 0, len(index),
+                               0, 0, 0, 3, len(body), 0, bytes(24))
+    body[:dbpf.HEADER_SIZE] = header
+    path.write_bytes(bytes(body) + index)
+
+
+def test_constant_field_index_with_refpack_and_deleted_entries(tmp_path):
+    plain = build_stbl([(0x1, 'Cancel')])
+    packed = build_stbl([(0x2, 'Accept')] * 20)
+    path = tmp_path / 'Strings.package'
+    write_constant_index_package(path, 0x80000000, [
+        (0x0800000000000042, plain, len(plain), 0),
+        (0x0800000000000043, refpack_compress(packed), len(packed), REFPACK_COMPRESSION),
+        (0x0800000000000044, b'', 0, DELETED),
+    ])
+    with DBPFPackage(path) as pkg:
+        assert len(pkg.entries) == 3
+        assert {e.group for e in pkg.entries} == {0x80000000}
+        assert [e.instance for e in pkg.iter_entries(STBL_TYPE_ID)] == [0x0800000000000042, 0x0800000000000043]
+        assert len(list(pkg.iter_entries(include_deleted=True))) == 3
+        tables = {instance: StringTable.parse(view).entries() for instance, view in pkg.iter_stbl()}
+        with pytest.raises(ValueError):
+            pkg.read_resource(pkg.entries[2])
+    assert tables[0x0800000000000043][0] == ('0x00000002', 'Accept')
+    assert StringTable.parse(refpack_compress(packed)).entries() == tables[0x0800000000000043]
+
+    out = tmp_path / 'out.package'
+    assert patch_package(path, out, {0x0800000000000043: StringTable.from_entries([('0x2', 'Akzeptieren')])}, 0x08) == 1
+    with DBPFPackage(out) as pkg:
+        assert len(pkg.entries) == 3
+        tables = {instance: StringTable.parse(view).entries() for instance, view in pkg.iter_stbl()}
+    assert tables[0x0800000000000043] == [('0x00000002', 'Akzeptieren')]
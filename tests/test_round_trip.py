@@ -1,5 +1,4 @@
 import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
-from pathlib import Path
 
 from sims4_auto_translator.parsers import parse_strings_file, write_strings_file
 
@@ -10,3 +9,20 @@ def test_round_trip(tmp_path):
     write_strings_file(data, path)
     parsed = parse_strings_file(path)
     assert parsed == data
+
+
+def test_streaming_reader_handles_blocks_and_newlines(tmp_path, monkeypatch, fake_translator):
+    from sims4_auto_translator import parsers
+    from sims4_auto_translator.planner import translate_stream
+
+    path = tmp_path / 'big.strings'
+    path.write_bytes('a = Привіт\r\n\r\nb = x = y\rc=Кінець'.encode('utf-8'))
+    monkeypatch.setattr(parsers, 'READ_BLOCK_SIZE', 5)
+    entries = list(parsers.iter_strings_file(path))
+    assert entries == [('a', 'Привіт'), ('b', 'x = y'), ('c', 'Кінець')]
+
+    translator = fake_translator()
+    out = tmp_path / 'out.strings'
+    write_strings_file(translate_stream(iter(entries), translator, 'EN', 'UK', batch_size=2), out)
+    assert [len(batch) for batch in translator.batches] == [2, 1]
+    assert parse_strings_file(out) == [('a', 'ПРИВІТ'), ('b', 'X = Y'), ('c', 'КІНЕЦЬ')]
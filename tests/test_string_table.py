@@ -0,0 +1,25 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from sims4_auto_translator.dbpf import StringTable, build_stbl, parse_stbl
+
+
+def test_string_table_round_trip():
+    entries = [('0x0000000A', 'Cancel'), ('0xDEADBEEF', 'Привіт {0.SimFirstName}'), ('0x00000003', '')]
+    data = build_stbl(entries)
+    table = StringTable.parse(data)
+    assert len(table) == 3
+    assert list(table.keys) == [0xA, 0xDEADBEEF, 0x3]
+    assert table.text(1) == 'Привіт {0.SimFirstName}'
+    assert table.entries() == entries
+    assert build_stbl(table) == data
+    assert parse_stbl(build_stbl(StringTable.from_entries(table))) == entries
+
+
+def test_truncated_stbl_rejected():
+    data = build_stbl([('0x1', 'Hello')])
+    try:
+        StringTable.parse(data[:-2])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('expected ValueError')
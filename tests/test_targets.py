@@ -0,0 +1,36 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from sims4_auto_translator.main import parse_targets
+from sims4_auto_translator.parsers import parse_strings_file, write_strings_file, write_strings_files
+from sims4_auto_translator.planner import translate_folder_targets, translate_stream_targets
+
+
+def test_parse_targets():
+    assert parse_targets(['uk, de', 'FR', 'de']) == ['UK', 'DE', 'FR']
+
+
+def test_folder_translates_every_target_once(tmp_path, fake_translator):
+    game = tmp_path / 'game'
+    write_strings_file([('a', 'Cancel'), ('b', 'Hi {0.SimFirstName}')], game / 'one.strings')
+    roots = {'UK': tmp_path / 'en-uk', 'DE': tmp_path / 'en-de'}
+    translator = fake_translator(tagged=True)
+    plans = translate_folder_targets(game, roots, translator, 'EN')
+    assert sorted(target for target, _ in translator.calls) == ['DE', 'UK']
+    assert plans['DE'].unique == 2
+    assert parse_strings_file(roots['DE'] / 'one.strings') == [('a', 'DE:Cancel'), ('b', 'DE:Hi {0.SimFirstName}')]
+    assert parse_strings_file(roots['UK'] / 'one.strings')[0] == ('a', 'UK:Cancel')
+
+    # A new target only translates for that target; the others are unchanged.
+    roots['PL'] = tmp_path / 'en-pl'
+    translator = fake_translator(tagged=True)
+    translate_folder_targets(game, roots, translator, 'EN')
+    assert [target for target, _ in translator.calls] == ['PL']
+
+
+def test_stream_targets_write_in_one_pass(tmp_path, fake_translator):
+    translator = fake_translator(tagged=True)
+    rows = translate_stream_targets([('a', 'Hi'), ('b', 'Bye')], translator, 'EN', ['UK', 'DE'], batch_size=1)
+    paths = [tmp_path / 'uk.strings', tmp_path / 'de.strings']
+    write_strings_files(rows, paths)
+    assert parse_strings_file(paths[0]) == [('a', 'UK:Hi'), ('b', 'UK:Bye')]
+    assert parse_strings_file(paths[1]) == [('a', 'DE:Hi'), ('b', 'DE:Bye')]
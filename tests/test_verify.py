@@ -0,0 +1,35 @@
+import sys, pathlib; sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from sims4_auto_translator.packer import pack_strings_to_package
+from sims4_auto_translator.parsers import parse_strings_file, write_strings_file
+from sims4_auto_translator.verify import iter_numbered_strings, verify_paths
+
+
+def test_verify_reports_defects(tmp_path):
+    src = tmp_path / 'src'
+    out = tmp_path / 'out'
+    write_strings_file([('a', 'Hi {0.SimFirstName}'), ('b', '<i>Bye</i>'), ('c', 'Ok')], src / 'one.strings')
+    write_strings_file([('a', 'Привіт'), ('b', '§§PLH_000§§Бувай</i>'), ('d', 'Extra'), ('d', 'Twice')], out / 'one.strings')
+    pack_strings_to_package([('0x1', 'Walk {0.String}')], src / 'Strings_ENG_US.package', instance=0x7)
+    write_strings_file([('0x00000001', 'Іти {0.String}')], out / 'Strings_ENG_US_00000007.strings')
+
+    defects = verify_paths(src, out, workers=2)
+    kinds = sorted((d.key, d.kind) for d in defects)
+    assert kinds == [
+        ('a', 'placeholder_mismatch'),
+        ('b', 'placeholder_mismatch'),
+        ('b', 'sentinel_leak'),
+        ('c', 'missing_key'),
+        ('d', 'duplicate_key'),
+        ('d', 'extra_key'),
+    ]
+    leak = next(d for d in defects if d.kind == 'sentinel_leak')
+    assert leak.line == 2 and leak.path.endswith('one.strings')
+
+
+def test_strings_are_read_like_the_translator_reads_them(tmp_path):
+    path = tmp_path / 'mixed.strings'
+    path.write_bytes('a = One\rb = Two = 2\r\n\nc = Три\n'.encode('utf-8'))
+    entries = list(iter_numbered_strings(path))
+    assert [(key, text) for _, key, text in entries] == parse_strings_file(path)
+    assert [line for line, _, _ in entries] == [1, 2, 3]